@@ -0,0 +1,63 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utilities.helpers import tokenize_url, redact_url
+from utilities.git_helpers import write_bundle, BUNDLE_DIR
+
+BUNDLE_WORKERS = int(os.getenv("BUNDLE_WORKERS", "4"))
+
+
+def create_bundles(repo_urls, bundle_dir, workers=BUNDLE_WORKERS):
+    """
+    Write a bundle snapshot of every repo into `bundle_dir`, `workers` repos
+    at a time. Returns (written, failures); written maps repo_url to the
+    bundle path and failures is a list of (repo_url, error).
+    """
+    def bundle(repo_url):
+        return write_bundle(tokenize_url(repo_url), bundle_dir)
+
+    written = {}
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(bundle, repo_url): repo_url for repo_url in repo_urls}
+        for future in as_completed(futures):
+            repo_url = futures[future]
+            try:
+                written[repo_url], _ = future.result()
+            except Exception as e:
+                failures.append((repo_url, e))
+    return written, failures
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python create_git_bundles.py <promotion_repo_url> <services_list_file> [bundle_dir]")
+        sys.exit(1)
+
+    promotion_repo_url = sys.argv[1]
+    services_list_file = sys.argv[2]
+    bundle_dir = sys.argv[3] if len(sys.argv) > 3 else BUNDLE_DIR
+
+    if not bundle_dir:
+        print("Error: No bundle directory given and GIT_BUNDLE_DIR is not set.")
+        sys.exit(1)
+
+    if not os.path.exists(services_list_file):
+        print(f"Error: Services list file '{services_list_file}' not found.")
+        sys.exit(1)
+
+    with open(services_list_file, 'r') as f:
+        app_repo_list = [line.strip() for line in f.readlines() if line.strip()]
+
+    written, failures = create_bundles([promotion_repo_url] + app_repo_list, bundle_dir)
+    print(f"{len(written)} bundles in {bundle_dir}")
+
+    if failures:
+        for repo_url, error in failures:
+            print(f"Error: could not bundle {redact_url(repo_url)}: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
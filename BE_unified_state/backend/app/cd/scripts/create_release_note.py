@@ -9,33 +9,51 @@ import datetime
 from utilities.dir_helpers import make_dir
 from utilities.helpers import tokenize_url, get_parent_path, create_upgrade_services_txt
 # from utilities.excel_helpers import write_changes_to_excel
-from utilities.discarded_features import create_release_note_summary
-from utilities.json_and_yaml_helpers import dump_and_replace, prepare_data, fetch_json, copy_missing_yaml_files
-from utilities.git_helpers import clone_single_branch_and_checkout, stage_commit_and_push
+from utilities.discarded_features import create_release_note_summary, get_summary_dir
+from utilities.json_and_yaml_helpers import prepare_data, fetch_json, copy_missing_yaml_files, SCRATCH_JSON_SNAPSHOTS
+from utilities.git_helpers import checkout_worktrees, stage_commit_and_push, changed_paths, GitBlobReader
 from utilities.garuda_engine import compare, compare_list_of_dicts
+from utilities.change_record import ChangeRecord, JsonText
+from utilities.repo_layout import get_env_paths, makedirs
 
 envs = []
 changes = []
 
 
-def compare_json_files(le_old_data, le_new_data, he_old_data, envs):
+def compare_json_files(le_old_data, le_new_data, he_old_data, envs, unchanged=()):
+    """
+    Services listed in `unchanged` are identical in both lower-env trees and
+    need not be in le_old_data; they are still compared against the higher
+    env so pending adds and deletes keep showing up. Returns ChangeRecords,
+    whose JSON cells are rendered by the sink (write_changes_to_excel).
+    """
     changes = []
  
     # Check for changes in the JSON files
     for root in le_new_data.keys():
-        if root not in le_old_data:
-            modified_json = dump_and_replace(le_new_data[root], lower_env=envs[0], higher_env=envs[1])
-            changes.append((root, 'add', '', json.dumps(le_new_data[root], indent=4), '', modified_json, '', 'root object added'))
+        if root in unchanged:
+            compare(le_new_data[root], le_new_data[root], root, changes, he_old_data[root], envs)
+        elif root not in le_old_data:
+            changes.append(ChangeRecord(root, 'add', '', JsonText(le_new_data[root]), '', JsonText(le_new_data[root], envs), '', 'root object added'))
         else:
             compare(le_old_data[root], le_new_data[root], root, changes, he_old_data[root], envs)
  
     for root in le_old_data.keys():
         if root not in le_new_data:
-            modified_json = dump_and_replace(le_old_data[root],lower_env=envs[0], higher_env=envs[1])
-            changes.append((root, 'delete', '', '',json.dumps(le_old_data[root], indent=4), modified_json,'', 'root object deleted'))
+            changes.append(ChangeRecord(root, 'delete', '', '', JsonText(le_old_data[root]), JsonText(le_old_data[root], envs), '', 'root object deleted'))
 
     return changes
 
+def get_changed_services(repo_dir, old_rev, new_rev, values_folder):
+    """Root objects whose YAML under `values_folder` was added, modified or deleted between the revs."""
+    changed = set()
+    for path in changed_paths(repo_dir, old_rev, new_rev, values_folder):
+        name = path[len(values_folder.rstrip('/')) + 1:]
+        if '/' not in name and name.endswith(('.yaml', '.yml')):
+            changed.add(os.path.splitext(name)[0])
+    return changed
+
+
 def write_changes_to_excel(changes, release_note_path, envs):
     if not changes:
         print("No differences found; skipping the creation of release note.")
@@ -71,25 +89,31 @@ def write_changes_to_excel(changes, release_note_path, envs):
     ws.append([
         'Service name', 'Change Request', 'Key', f'{envs[0]}-current value', f'{envs[0]}-previous value', f'{envs[1]}-current value', f'{envs[1]}-previous value','Comment'])
 
-    # Write the changes for the environment
-    for change in changes:
-        # print(change)
-        service_name, change_type, key, le_cur, le_prev, he_cur, he_prev, comment = change
-
+    def higher_current(change):
+        he_cur = change.he_cur
         # 🔄 If key is image//repository, update he_cur with transformed tag
-        if key == 'image//image_name':
+        if change.key == 'image//image_name':
             he_cur = update_image_tag(he_cur, envs[0], envs[1]) # replace after 2nd hyphen
             he_cur = f'"{he_cur}"'
 
         # 🧠 Scenario 2: Root object with embedded image.repository
-        elif isinstance(comment, str) and comment.strip().lower() == 'root object added':
+        elif isinstance(change.comment, str) and change.comment.strip().lower() == 'root object added':
             he_cur = update_image_repo_in_json_string(he_cur, envs[0], envs[1])
+        return he_cur
+
+    # Write the changes for the environment; value cells are rendered only
+    # where they are written
+    for change in changes:
+        if not isinstance(change, ChangeRecord):
+            change = ChangeRecord(*change)
+        service_name, change_type, key, comment = change.root, change.change_type, change.key, change.comment
+        le_cur = change.le_cur
 
         # Check if value exceeds 32,767 characters
         if isinstance(le_cur, str) and len(le_cur) > 32767:
             # Save large data to a text file
             #solve for character exceed limit - shantanu tk
-            he_cur = update_image_repo_in_json_string(he_cur, envs[0], envs[1])
+            he_cur = update_image_repo_in_json_string(higher_current(change), envs[0], envs[1])
 
             txt_file_name = f"{service_name}.txt"
             txt_file_path = os.path.join(release_note_path, txt_file_name)
@@ -108,9 +132,9 @@ def write_changes_to_excel(changes, release_note_path, envs):
                 change_type,
                 key,
                 safe_excel_value(le_cur),
-                safe_excel_value(le_prev),
-                safe_excel_value(he_cur),
-                safe_excel_value(he_prev),
+                safe_excel_value(change.le_prev),
+                safe_excel_value(higher_current(change)),
+                safe_excel_value(change.he_prev),
                 comment
             ])
 
@@ -118,6 +142,17 @@ def write_changes_to_excel(changes, release_note_path, envs):
     wb.save(excel_file_path)
 
 
+def get_written_paths(target_folder_x, envs, helmignore_path, release_note_path, yaml_path):
+    """Everything main() writes into the x checkout, i.e. what its commit must contain."""
+    return [
+        helmignore_path,
+        release_note_path,
+        get_summary_dir(target_folder_x, envs[1]),
+        os.path.join(target_folder_x, 'upgrade-services.txt'),
+        os.path.join(yaml_path, f"config-{envs[0]}.json"),
+    ]
+
+
 def touch_helmignore(meta_sheet_file_path, higher_env, helmignore_path):
     workbook = openpyxl.load_workbook(meta_sheet_file_path)
     sheet = workbook.active
@@ -196,7 +231,7 @@ def create_release_note_dir(release_note_path):
                     print(f"Error deleting file {file_path}: {e}")
     else:
         print(f"Folder does not exist: {release_note_path}, hence creating one")
-        os.makedirs(release_note_path)
+        makedirs(release_note_path)
 
 
 def main():
@@ -219,20 +254,24 @@ def main():
     envs.append(sys.argv[3].strip())
     envs.append(sys.argv[4].strip())
     
-    target_folder = make_dir()
-    meta_sheet_file_path = os.path.join(target_folder, f"meta-sheet.xlsx")
-    clone_single_branch_and_checkout(repo_url, promote_branch_x_1, target_folder_x_1)
-    clone_single_branch_and_checkout(repo_url, promote_branch_x, target_folder_x)
-    clone_single_branch_and_checkout(repo_url, "master", target_folder)
+    # own folder: checkout_worktrees() wipes it, and temp/ holds other scripts' clones
+    master_dir = make_dir(dir_name='master')
+    meta_sheet_file_path = os.path.join(master_dir, f"meta-sheet.xlsx")
+    lower_values, higher_values = (f"helm-charts/{env}-values" for env in envs)
+    checkout_worktrees(repo_url, [
+        (promote_branch_x, target_folder_x, [lower_values, higher_values]),
+        (promote_branch_x_1, target_folder_x_1, [f"{higher_values}/app-values"]),
+        ("master", master_dir, []),
+    ], depth=1)
 
     helmignore_path = os.path.join(target_folder_x, "helm-charts", ".helmignore")
     touch_helmignore(meta_sheet_file_path, envs[1], helmignore_path)
 
-    release_note_path = os.path.join(target_folder_x, "helm-charts", f"{envs[1]}-values", "app-values", "release_note")
+    release_note_path = get_env_paths(target_folder_x, envs[1]).release_note
     create_release_note_dir(release_note_path)
  
-    higher_env_x_1 = os.path.join(target_folder_x_1, f"helm-charts/{envs[1]}-values/app-values")
-    lower_env_x = os.path.join(target_folder_x, f"helm-charts/{envs[0]}-values/app-values")
+    higher_env_x_1 = get_env_paths(target_folder_x_1, envs[1]).app_values
+    lower_env_x = get_env_paths(target_folder_x, envs[0]).app_values
  
     if os.path.exists(higher_env_x_1) and os.path.exists(lower_env_x):
         '''
@@ -241,11 +280,18 @@ def main():
         '''
         copy_missing_yaml_files(higher_env_x_1, lower_env_x, envs[0], envs[1])
 
-    le_x_1_json_data = prepare_data(target_folder_x_1, envs[0])
-    le_x_json_data = prepare_data(target_folder_x, envs[0])
-    he_x_1_json_data = prepare_data(target_folder_x_1, envs[1])
-
-    changes = compare_json_files(le_x_1_json_data, le_x_json_data, he_x_1_json_data, envs)
+    # Both lower-env trees come straight from the shared object store; the
+    # higher env is read from disk since copy_missing_yaml_files may add to it.
+    # Of x-1 only the services that changed since x-1 are parsed.
+    changed_services = get_changed_services(target_folder_x, promote_branch_x_1, promote_branch_x, f"{lower_values}/app-values")
+    print(f"{len(changed_services)} services changed in {envs[0]} between {promote_branch_x_1} and {promote_branch_x}")
+    with GitBlobReader(target_folder_x) as reader:
+        le_x_1_json_data = prepare_data(target_folder_x_1, envs[0], rev=promote_branch_x_1, reader=reader, only=changed_services)
+        le_x_json_data = prepare_data(target_folder_x, envs[0], rev=promote_branch_x, reader=reader)
+    he_x_1_json_data = prepare_data(target_folder_x_1, envs[1], snapshot=SCRATCH_JSON_SNAPSHOTS, compact=True)
+
+    unchanged_services = set(le_x_json_data) - changed_services
+    changes = compare_json_files(le_x_1_json_data, le_x_json_data, he_x_1_json_data, envs, unchanged=unchanged_services)
     write_changes_to_excel(changes, release_note_path, envs)
 
     yaml_path = os.path.dirname(fetch_json(target_folder_x, envs[0]))
@@ -253,9 +299,10 @@ def main():
     
     create_upgrade_services_txt(release_note_path, envs[1], target_folder_x, envs[0])
 
+    written_paths = get_written_paths(target_folder_x, envs, helmignore_path, release_note_path, yaml_path)
     try:
         commit_message = f'Pushing the release_note into the branch: {sys.argv[2]}'
-        stage_commit_and_push(repo_url, target_folder_x, sys.argv[2], commit_message, rebase=True)
+        stage_commit_and_push(repo_url, target_folder_x, sys.argv[2], commit_message, rebase=True, paths=written_paths)
         print("Push successful.")
     except subprocess.CalledProcessError as e:
         print("Git command failed!")
@@ -1,4 +1,3 @@
-import subprocess
 import sys
 import os
 import tempfile
@@ -6,6 +5,7 @@ import tempfile
 from utilities.git_helpers import (
     clone_single_branch_and_checkout,
 )
+from utilities.command_runner import run_command
 from utilities.helpers import tokenize_url as inject_git_token
  
  
@@ -18,9 +18,11 @@ def deploy_service(text_file, env, env_namespace):
         service = items.strip()
         env_namespace = env_namespace.strip()
  
-        command = f"helm upgrade --install {service} helm-charts -f helm-charts/{env}-values/app-values/{service}.yaml -n {env_namespace}"
+        command = ["helm", "upgrade", "--install", service, "helm-charts",
+                   "-f", f"helm-charts/{env}-values/app-values/{service}.yaml", "-n", env_namespace]
  
-        result = subprocess.run(command, shell=True, check=True)
+        result = run_command(command, check=True)
+        print(result.stdout)
  
  
 def main():
@@ -47,7 +49,12 @@ def main():
     # Create a temporary directory which is auto-deleted
     with tempfile.TemporaryDirectory() as tmpdir:
         # Clone the repo in tmpdir
-        clone_single_branch_and_checkout(repo_url, branch, tmpdir)
+        # helm only needs the chart itself and this env's values
+        clone_single_branch_and_checkout(repo_url, branch, tmpdir, paths=[
+            "helm-charts/templates",
+            "helm-charts/charts",
+            f"helm-charts/{env_name}-values/app-values",
+        ], depth=1)
  
         # Construct path to the environment-specific text file inside cloned repo
         text_file_path = os.path.join(tmpdir, f"helm-charts/{env_name}-values/app-values/{env_name}.txt")
@@ -1,24 +1,35 @@
 import os
+import re
 import openpyxl
 from openpyxl import load_workbook
 import subprocess
 import sys
 
 from utilities.dir_helpers import make_dir
-from utilities.json_and_yaml_helpers import read_yaml_files_to_json
+from utilities.json_and_yaml_helpers import read_yaml_files_to_json, YAML_PARALLEL, SCRATCH_JSON_SNAPSHOTS
 from utilities.excel_helpers import get_sheet, get_cell_value, get_headers, get_sheets_with_values
 from utilities.helpers import tokenize_url, extract_hyperlink_path
-from utilities.git_helpers import clone_repo_and_checkout, stage_commit_and_push
-from utilities.json_and_yaml_helpers import save_json_to_file, create_yaml_files_from_json, try_parse_json
+from utilities.git_helpers import clone_repo_and_checkout, checkout_worktrees, stage_commit_and_push
+from utilities.json_and_yaml_helpers import save_json_to_file, write_yaml_files, read_yaml_sources, write_if_changed, to_json_types, try_parse_json
 from utilities.deployment_helpers import update_txt_file_with_yaml_values, insert_hardcoded_value, modify_deployment_yaml
 from utilities.garuda_engine import handle_data_env
+from utilities.yaml_codec import HelmValuesDumper
+from utilities.repo_layout import get_env_paths
  
 update_template= []
 deleted_services = []
 
+# `value: 08` and `value: Y` are plain scalars to PyYAML but an int/bool to
+# helm, so they get double quotes. Regenerated files are quoted while dumping
+# (HelmValuesDumper); these are the same substitutions as text, line by line,
+# as the former `sed -E` pass made them ([[:space:]] never spans lines there).
+_SPACE = r'[ \t\r\f\v]'
+LEADING_ZERO_VALUE = re.compile(rf'({_SPACE}+value:{_SPACE}*)(0[0-9]+)({_SPACE}*$)')
+CAPITAL_LETTER_VALUE = re.compile(rf'({_SPACE}+value:{_SPACE}*)([A-Z])({_SPACE}*$)')
+
 
 def get_release_note(target_folder_x, higher_env):
-    release_note_path = os.path.join(target_folder_x, "helm-charts", f"{higher_env}-values", "app-values", f"release_note")
+    release_note_path = get_env_paths(target_folder_x, higher_env).release_note
 
     foldernames = os.listdir(target_folder_x)
  
@@ -31,7 +42,10 @@ def get_release_note(target_folder_x, higher_env):
     return excel_file_path
 
 
-def apply_changes_to_json(json_data, excel_file_path, sheet_name, lower_env, higher_env):
+def apply_changes_to_json(json_data, excel_file_path, sheet_name, lower_env, higher_env, changed_paths=None):
+    # changed_paths, when given, collects {service: [key path, ...]} of every
+    # change applied; [] stands for the whole service
+    changed_paths = {} if changed_paths is None else changed_paths
     wb = load_workbook(excel_file_path, data_only=True)
     ws = wb[sheet_name]
  
@@ -77,6 +91,7 @@ def apply_changes_to_json(json_data, excel_file_path, sheet_name, lower_env, hig
                         with open(hyperlink_path, 'r') as txt_file:
                             he_cur = txt_file.read().strip() 
                     json_data[new_root_object] = try_parse_json(he_cur)
+                changed_paths.setdefault(new_root_object, []).append([])
                 update_template.append(service_name)
                 continue
             elif service_name in ['data', 'env']:
@@ -96,10 +111,12 @@ def apply_changes_to_json(json_data, excel_file_path, sheet_name, lower_env, hig
 
         if service_name in ['data', 'env']:
             handle_data_env(json_data, service_name, change_request, parsed_value)
+            changed_paths.setdefault(service_name, []).append([])
             continue
 
         # General handling for other services with keys
         key_path = key.split('//')
+        changed_paths.setdefault(service_name, []).append(key_path)
         obj = json_data.setdefault(service_name, {})
 
         for k in key_path[:-1]:
@@ -172,20 +189,25 @@ def apply_changes_to_json(json_data, excel_file_path, sheet_name, lower_env, hig
     return json_data
 
 
-def apply_sed_to_yaml(folder_path):
+def quote_ambiguous_values(text):
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        line = LEADING_ZERO_VALUE.sub(r'\1"\2"\3', line, count=1)
+        lines[i] = CAPITAL_LETTER_VALUE.sub(r'\1"\2"\3', line, count=1)
+    return '\n'.join(lines)
+
+
+def quote_ambiguous_values_in_folder(folder_path, skip=()):
+    """quote_ambiguous_values() on every .yaml file in `folder_path` except those named in `skip`."""
     if not os.path.exists(folder_path):
         print(f"Error: Folder '{folder_path}' does not exist.")
         return
     for file_name in os.listdir(folder_path):
-        if file_name.endswith(".yaml"):
+        if file_name.endswith(".yaml") and file_name not in skip:
             file_path = os.path.join(folder_path, file_name)
-            sed_command = f"sed -i -E -e 's/([[:space:]]+value:[[:space:]]*)(0[0-9]+)([[:space:]]*$)/\\1\"\\2\"\\3/' -e 's/([[:space:]]+value:[[:space:]]*)([A-Z])([[:space:]]*$)/\\1\"\\2\"\\3/' {file_path}"
- 
-            try:
-                subprocess.run(sed_command, shell=True, check=True)
-                # print(f"Processed: {file_name}")
-            except subprocess.CalledProcessError as e:
-                print(f"Error processing {file_name}: {e}")
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            write_if_changed(file_path, quote_ambiguous_values(content.decode()).encode())
 
  
 def create_txt_file(excel_path, env, txt_path, output_folder):
@@ -221,7 +243,7 @@ def update_meta_sheet(lower_env, higher_env, promote_branch, repo_url):
     master_dir = make_dir(dir_name='master')
  
     try:
-        clone_repo_and_checkout(repo_url, "master", master_dir)
+        clone_repo_and_checkout(repo_url, "master", master_dir, paths=[], depth=1)
         # Process Excel file
         meta_sheet_file_path = os.path.join(master_dir, f"meta-sheet.xlsx")
         ws = get_sheet(meta_sheet_file_path)
@@ -249,7 +271,8 @@ def update_meta_sheet(lower_env, higher_env, promote_branch, repo_url):
         print("saved excel file")
  
         # Commit and push changes to master branch
-        stage_commit_and_push(repo_url, master_dir, 'master', f'Promoted {promote_branch} from {lower_env} to {higher_env}')
+        stage_commit_and_push(repo_url, master_dir, 'master', f'Promoted {promote_branch} from {lower_env} to {higher_env}',
+                              paths=[meta_sheet_file_path])
  
     except subprocess.CalledProcessError as e:
         print(f"Git operation failed: {e}")
@@ -278,13 +301,15 @@ def main():
         print(f"Logging error: {e}")
         raise
 
-    clone_repo_and_checkout(repo_url, promote_branch_x_1, target_folder_x_1)
-    clone_repo_and_checkout(repo_url, promote_branch_x, target_folder_x)
-
-    
     lower_env = sys.argv[3]
     higher_env = sys.argv[4]
 
+    higher_values = f"helm-charts/{higher_env}-values"
+    checkout_worktrees(repo_url, [
+        (promote_branch_x, target_folder_x, [higher_values, "helm-charts/templates"]),
+        (promote_branch_x_1, target_folder_x_1, [f"{higher_values}/app-values"]),
+    ], depth=1)
+
     release_note_file_path = get_release_note(target_folder_x, higher_env)
     sheet = get_sheets_with_values(release_note_file_path, higher_env)
 
@@ -295,21 +320,32 @@ def main():
     output_folder = os.path.join(target_folder_x, app_values_path)
     txt_file_path = os.path.join(target_folder_x, app_values_path, f"{sheet}.txt" )
 
-    json_data = read_yaml_files_to_json(folder_path)
-    save_json_to_file(json_data, initial_output_file)
+    json_data = read_yaml_files_to_json(folder_path, parallel=YAML_PARALLEL)
+    if SCRATCH_JSON_SNAPSHOTS:
+        save_json_to_file(json_data, initial_output_file, compact=True)
 
-    updated_json = apply_changes_to_json(json_data, release_note_file_path, sheet, lower_env, higher_env)
+    changed_paths = {}
+    updated_json = apply_changes_to_json(json_data, release_note_file_path, sheet, lower_env, higher_env, changed_paths)
 
     insert_hardcoded_value(target_folder_x, update_template, higher_env)
     modify_deployment_yaml(target_folder_x, deleted_services, higher_env)
     save_json_to_file(updated_json, updated_output_file)
-    create_yaml_files_from_json(updated_output_file, output_folder)
-    apply_sed_to_yaml(output_folder)
+    # Services are emitted from the JSON form of the data, exactly as when
+    # they were reloaded from config-<env>.json: patched in place in the x-1
+    # text where only scalars changed, dumped in full otherwise. The x-1 files
+    # are themselves generate-config output, so their values are quoted already.
+    updated_json = to_json_types(updated_json)
+    sources = read_yaml_sources(folder_path, changed_paths)
+    written = write_yaml_files(updated_json, output_folder, dumper=HelmValuesDumper, sources=sources)
+    print(f"{len(written)} of {len(updated_json)} service files changed")
+    # files of services that were not regenerated keep getting the same quoting
+    quote_ambiguous_values_in_folder(output_folder, skip={f"{root_object}.yaml" for root_object in updated_json})
     create_txt_file(release_note_file_path, sheet, txt_file_path, output_folder)
             
     try:
         commit_message = f'Config files generated: {sys.argv[2]}'
-        stage_commit_and_push(repo_url, target_folder_x, sys.argv[2], commit_message, rebase=True)
+        written_paths = [output_folder, os.path.join(target_folder_x, "helm-charts", "templates", "deployment.yaml")]
+        stage_commit_and_push(repo_url, target_folder_x, sys.argv[2], commit_message, rebase=True, paths=written_paths)
         print("Push successful.")
         update_meta_sheet(lower_env, sheet, promote_branch_x, repo_url)
     except subprocess.CalledProcessError as e:
@@ -24,12 +24,25 @@ Example:
 Note:
     --target-branch and --promote-branch-x are auto-generated from new-version
     Example: new-version 2.0.0 → release/2.0.0
+
+    By default the three steps run inside one promotion transaction: they push
+    to a local copy of the promotion repo and master plus the release branch
+    are published together at the end with a single atomic push.
+    Set PROMOTION_TRANSACTION=0 to let every step push on its own.
 """
 
 import sys
 import os
+import atexit
+import shutil
 import subprocess
 
+from utilities.helpers import tokenize_url
+from utilities.dir_helpers import on_rm_error
+from utilities.git_helpers import TRANSACTION_ENV, begin_transaction, commit_transaction
+
+TRANSACTION_ENABLED = os.getenv("PROMOTION_TRANSACTION", "1") != "0"
+
 
 def print_section(title):
     """Print a formatted section header."""
@@ -154,6 +167,18 @@ def main():
         else:
             print()
 
+    # ==================================
+    # Open the promotion transaction
+    # ==================================
+    if TRANSACTION_ENABLED:
+        print_section("Opening promotion transaction")
+        txn_repo = os.path.join(os.getcwd(), "promotion-txn")
+        begin_transaction(tokenize_url(promotional_repo), txn_repo)
+        atexit.register(shutil.rmtree, txn_repo, onerror=on_rm_error)
+        # Inherited by the step subprocesses
+        os.environ[TRANSACTION_ENV] = txn_repo
+        print(f"Steps push to {txn_repo}; the remote is updated once at the end.\n")
+
     # ====================
     # Step 1: Run merger.py
     # ====================
@@ -221,6 +246,18 @@ def main():
         print("\n❌ Pipeline failed at create-release-note.py")
         sys.exit(1)
 
+    # ======================================
+    # Publish the promotion transaction
+    # ======================================
+    if TRANSACTION_ENABLED:
+        print_section("Publishing promotion transaction")
+        try:
+            pushed = commit_transaction(tokenize_url(promotional_repo), os.environ[TRANSACTION_ENV])
+            print(f"\n✅ Pushed {len(pushed)} branch(es) in one atomic push.")
+        except Exception as e:
+            print(f"\n❌ Pipeline failed while pushing the promotion transaction: {e}")
+            sys.exit(1)
+
     # Success!
     print_section("Pipeline Completed Successfully")
     print("✅ All scripts executed successfully!")
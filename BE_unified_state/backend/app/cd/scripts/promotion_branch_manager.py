@@ -4,16 +4,19 @@ import os
 
 from utilities.git_helpers import (
     clone_repo_and_checkout,
-    clone_branch_and_checkout_new_branch,
+    create_branch_from_base,
+    list_tree_entries,
+    make_tree,
+    hash_blob,
     stage_commit_and_push,
-    is_base_branch_exists
+    is_base_branch_exists,
+    WORKSPACE_REUSE
 )
 
 from utilities.helpers import tokenize_url
 
 from utilities.dir_helpers import (
     make_dir, 
-    clean_non_dev_folders,
     on_rm_error
 )
 from utilities.excel_helpers import (
@@ -60,15 +63,50 @@ def fetch_branches(file_path, lower_env, update_lower_env, new_branch_created, h
         return higher_branch, lower_branch, update_lower_env, new_branch_created
 
  
+def readme_only_tree(repo_dir, tree, readme_blob, memo):
+    """
+    Tree-object version of clean_non_dev_folders for one env folder: every
+    directory that holds files keeps only readme.md, subdirectories are
+    rewritten the same way. `memo` maps already rewritten trees.
+    """
+    if tree not in memo:
+        entries = []
+        has_files = False
+        for mode, object_type, sha, name in list_tree_entries(repo_dir, tree):
+            if object_type == 'tree':
+                entries.append((mode, object_type, readme_only_tree(repo_dir, sha, readme_blob, memo), name))
+            else:
+                has_files = True
+        if has_files:
+            entries.append(('100644', 'blob', readme_blob, 'readme.md'))
+        memo[tree] = make_tree(repo_dir, entries)
+    return memo[tree]
+
+
+def clean_env_trees(repo_dir, root_tree):
+    """Swap every helm-charts/*values subtree of `root_tree` for its readme-only tree."""
+    root_entries = list_tree_entries(repo_dir, root_tree)
+    new_root = []
+    for mode, object_type, sha, name in root_entries:
+        if name == 'helm-charts' and object_type == 'tree':
+            helm_entries = []
+            for env_mode, env_type, env_sha, env_name in list_tree_entries(repo_dir, sha):
+                if env_type == 'tree' and env_name.endswith('values'):
+                    readme_blob = hash_blob(repo_dir, f"The files of helm-charts/{env_name} are stored here")
+                    env_sha = readme_only_tree(repo_dir, env_sha, readme_blob, {})
+                helm_entries.append((env_mode, env_type, env_sha, env_name))
+            sha = make_tree(repo_dir, helm_entries)
+        new_root.append((mode, object_type, sha, name))
+    return make_tree(repo_dir, new_root)
+
+
 def create_github_branch(github_url, base_branch, new_branch, lower_env, temp_dir):
     try:
         if is_base_branch_exists(github_url, base_branch):
-            new_branch_dir = make_dir(parent_dir=temp_dir, dir_name='new_branch')
-            clone_branch_and_checkout_new_branch(github_url, base_branch, new_branch_dir, new_branch)
-            clean_non_dev_folders(new_branch_dir)
-
+            # Built from tree objects only: nothing under the env folders is checked out
+            new_branch_dir = os.path.join(temp_dir, 'new_branch')
             commit_message = f'Initialize {new_branch}: Clean  environment folders'
-            stage_commit_and_push(github_url, new_branch_dir, new_branch, commit_message)
+            create_branch_from_base(github_url, base_branch, new_branch, commit_message, clean_env_trees, new_branch_dir)
         else:
             raise ValueError(f"Base branch '{base_branch}' not found in repository")
     except Exception as e:
@@ -96,7 +134,7 @@ def main():
     temp_folder = make_dir()
     master_dir = make_dir(temp_folder, 'master')
 
-    clone_repo_and_checkout(github_url, "master", master_dir)
+    clone_repo_and_checkout(github_url, "master", master_dir, paths=[], depth=1)
     meta_sheet_file_path = os.path.join(master_dir, f"meta-sheet.xlsx")
     
     # if lower_env != 'dev1' and lower_env != 'dev2':
@@ -108,7 +146,7 @@ def main():
     if new_branch_created:
         create_github_branch(github_url, prev_branch, present_branch, lower_env, temp_folder)
         commit_message = f'Add {present_branch} to meta-sheet'
-        stage_commit_and_push(github_url, master_dir, 'master', commit_message)
+        stage_commit_and_push(github_url, master_dir, 'master', commit_message, paths=[meta_sheet_file_path])
 
     envs = []
  
@@ -120,7 +158,8 @@ def main():
         envs.append(lower_env)
         envs.append(higher_env)
 
-    shutil.rmtree('temp', onerror=on_rm_error)
+    if not WORKSPACE_REUSE:
+        shutil.rmtree('temp', onerror=on_rm_error)
     x1 = prev_branch
     x2 = present_branch
     low = envs[0]
@@ -1,27 +1,42 @@
 import os
 import sys
+import json
 import shutil
 import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from utilities.helpers import tokenize_url
+from utilities.helpers import tokenize_url, redact_url
 
 from utilities.dir_helpers import (
     make_dir,
-    isDirClean,
     on_rm_error
 )
 from utilities.git_helpers import (
     clone_repo_and_checkout,
-    stage_commit_and_push
+    clone_single_branch_and_checkout,
+    clone_branch_and_checkout_new_branch,
+    get_remote_sha,
+    prefetch_remote_refs,
+    is_base_branch_exists,
+    stage_commit_and_push,
+    get_repo_slug,
+    WORKSPACE_REUSE
 )
 
+# Repos handled at once. Their git commands also go through command_runner,
+# so at most min(SYNC_WORKERS, COMMAND_CONCURRENCY, COMMAND_HOST_CONCURRENCY)
+# clones run together; raise those with it.
+SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "8"))
+SYNC_REPO_TIMEOUT = int(os.getenv("SYNC_REPO_TIMEOUT", "120"))
+SYNC_MANIFEST_NAME = "sync-manifest.json"
+
 def write_and_verify(destination_folder, collected_files):
     missing_file_count = {'count': 0, 'fileName':[]}
     found_file_count = 0
     for file_name, content in collected_files:
         dest_file_path = os.path.join(destination_folder, file_name)
-        with open(dest_file_path, 'x') as f:
+        with open(dest_file_path, 'w') as f:
             f.write(content)
 
     print("\nVerifying written files in promotion repo...\n")
@@ -45,23 +60,23 @@ def prepare_promotion_repo(promotion_repo_url, workspace, branch):
 
     try:
         print(f"Cloning promotion repo: {promotion_repo_url}")
-        try:
-            clone_repo_and_checkout(promotion_repo_url, branch, promo_repo_path)
+        if is_base_branch_exists(promotion_repo_url, branch):
+            clone_repo_and_checkout(promotion_repo_url, branch, promo_repo_path, depth=1)
             print(f"Branch '{branch}' ready!")
-            return promo_repo_path
-        except subprocess.CalledProcessError as e:
+        else:
             print(f"Branch '{branch}' not found. Creating from mb-baseline")
-            if isDirClean(promo_repo_path):
-                clone_repo_and_checkout(promotion_repo_url, "mb-baseline", promo_repo_path)
+            clone_branch_and_checkout_new_branch(promotion_repo_url, "mb-baseline", promo_repo_path, branch)
+        return promo_repo_path
     except Exception as e:
         print(f"Error: {e}")
         raise
 
-def collect_yaml_files_from_repo(url, working_dir, relative_path, yaml_files):
-    repo_name = Path(url).stem
-    repo_path = make_dir(working_dir, repo_name)
+def collect_yaml_files_from_repo(url, working_dir, relative_path, yaml_files, timeout=None):
+    # org-a/config and org-b/config must not share a clone directory
+    repo_path = make_dir(working_dir, get_repo_slug(url))
 
-    clone_repo_and_checkout(url, 'main', repo_path)
+    # Only the tip of main and only the dev-values folder are read
+    clone_single_branch_and_checkout(url, 'main', repo_path, paths=[relative_path], depth=1, timeout=timeout)
 
     source_path = os.path.join(repo_path, relative_path)
     print("Ssssooouurrccee", source_path)
@@ -72,6 +87,133 @@ def collect_yaml_files_from_repo(url, working_dir, relative_path, yaml_files):
     print(f"Fetched {len(yaml_files)} yaml files from {url}")
     return yaml_files
 
+def collect_yaml_files_by_repo(app_repo_list, working_dir, relative_path, workers=SYNC_WORKERS, timeout=SYNC_REPO_TIMEOUT):
+    """
+    Collect dev-values YAML files from every service repo, `workers` repos at
+    a time, each clone bounded by `timeout` seconds.
+    Returns (results, failures); results maps repo_url to its files and
+    failures is a list of (repo_url, error).
+    """
+    def collect(repo_url):
+        return collect_yaml_files_from_repo(tokenize_url(repo_url), working_dir, relative_path, [], timeout=timeout)
+
+    results = {}
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(collect, repo_url): repo_url for repo_url in app_repo_list}
+        for future in as_completed(futures):
+            repo_url = futures[future]
+            try:
+                results[repo_url] = future.result()
+            except Exception as e:
+                failures.append((repo_url, e))
+    return results, failures
+
+
+def collect_all_yaml_files(app_repo_list, working_dir, relative_path, workers=SYNC_WORKERS, timeout=SYNC_REPO_TIMEOUT):
+    """
+    Same as collect_yaml_files_by_repo, but returns (collected_files, failures)
+    with the collected files flattened in the order of app_repo_list.
+    """
+    results, failures = collect_yaml_files_by_repo(app_repo_list, working_dir, relative_path, workers, timeout)
+    collected_files = [f for repo_url in app_repo_list for f in results.get(repo_url, [])]
+    return collected_files, failures
+
+
+def get_remote_heads(app_repo_list, branch='main'):
+    """
+    Current `branch` SHA of every service repo; the ls-remotes run
+    concurrently through the command runner. A repo whose ls-remote fails
+    maps to None so it is always re-synced.
+    """
+    tokenized = {}
+    for repo_url in app_repo_list:
+        try:
+            tokenized[repo_url] = tokenize_url(repo_url)
+        except Exception as e:
+            print(f"Could not resolve {branch} of {redact_url(repo_url)}: {e}")
+    prefetch_remote_refs(tokenized.values())
+
+    heads = {}
+    for repo_url in app_repo_list:
+        try:
+            heads[repo_url] = get_remote_sha(tokenized[repo_url], branch) if repo_url in tokenized else None
+        except Exception as e:
+            print(f"Could not resolve {branch} of {redact_url(repo_url)}: {e}")
+            heads[repo_url] = None
+    return heads
+
+
+def load_sync_manifest(manifest_path):
+    """
+    Read the manifest kept on the promotion branch:
+    {repo_url: {"sha": <synced commit>, "files": [<yaml file names>]}}.
+    A missing or unreadable manifest means every repo is synced.
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable sync manifest {manifest_path}: {e}")
+        return {}
+
+
+def save_sync_manifest(manifest_path, manifest):
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def select_changed_repos(app_repo_list, manifest, remote_heads, destination_folder):
+    """
+    Repos whose main moved since the last sync, that were never synced, or
+    whose synced files are no longer in the promotion branch.
+    """
+    changed = []
+    for repo_url in app_repo_list:
+        entry = manifest.get(redact_url(repo_url))
+        sha = remote_heads.get(repo_url)
+        if (
+            entry is None or sha is None or entry.get("sha") != sha
+            or not all(os.path.exists(os.path.join(destination_folder, f)) for f in entry.get("files", []))
+        ):
+            changed.append(repo_url)
+    return changed
+
+
+def apply_sync_results(destination_folder, manifest, results, remote_heads, app_repo_list):
+    """
+    Write the files of the re-synced repos, delete files a repo no longer
+    has, and return (collected_files, manifest) with the manifest updated
+    for every repo in app_repo_list.
+    """
+    collected_files = []
+    for repo_url, files in results.items():
+        key = redact_url(repo_url)
+        new_names = [name for name, _ in files]
+        for stale in set(manifest.get(key, {}).get("files", [])) - set(new_names):
+            stale_path = os.path.join(destination_folder, stale)
+            if os.path.exists(stale_path):
+                print(f"Removing {stale}, no longer in {key}")
+                os.remove(stale_path)
+        manifest[key] = {"sha": remote_heads.get(repo_url), "files": sorted(new_names)}
+        collected_files.extend(files)
+    # Services dropped from the list stop being tracked; their files are left as they were
+    tracked = {redact_url(repo_url) for repo_url in app_repo_list}
+    manifest = {key: entry for key, entry in manifest.items() if key in tracked}
+    return collected_files, manifest
+
+
+def print_failure_report(failures, total):
+    print(f"\nFailed to fetch {len(failures)} of {total} repositories:")
+    for repo_url, error in failures:
+        if isinstance(error, subprocess.TimeoutExpired):
+            error = f"timed out after {error.timeout}s"
+        print(f"  - {repo_url}: {error}")
+
+
 def main():
     promotion_repo_url = sys.argv[1]
     promotion_repo_url = tokenize_url(promotion_repo_url)
@@ -109,29 +251,37 @@ def main():
     # raw_app_list = os.getenv('app_repo_list', 'https://github.hdfcbank.com/HDFCBANK/mb-helmcharts.git')
     # repo_url_list = [item.strip() for item in raw_app_list.split('\n') if item.strip()]
 
-    collected_files = []
-
-    for repo_url in app_repo_list:
-        yaml_files = []
-        try:
-            repo_url = tokenize_url(repo_url)
-            yaml_files = collect_yaml_files_from_repo(repo_url, temp_dir, source_app_relative_path, yaml_files)
-            collected_files.extend(yaml_files)
-        except Exception as e:
-            print(f"Failed to fetch from {repo_url}: {e}")
-
     try:
         promo_repo_path = prepare_promotion_repo(promotion_repo_url, temp_dir, target_branch)
         destination_folder = make_dir(promo_repo_path, destination_app_relative_path)
+        # The manifest sits next to app-values so it never reaches the release note
+        manifest_path = os.path.join(os.path.dirname(destination_folder), SYNC_MANIFEST_NAME)
+        manifest = load_sync_manifest(manifest_path)
+
+        remote_heads = get_remote_heads(app_repo_list)
+        changed_repos = select_changed_repos(app_repo_list, manifest, remote_heads, destination_folder)
+        print(f"{len(changed_repos)} of {len(app_repo_list)} repositories changed since the last sync")
+
+        results, failures = collect_yaml_files_by_repo(changed_repos, temp_dir, source_app_relative_path)
+        if failures:
+            # A missing service would show up as a deleted root object in the release note
+            print_failure_report(failures, len(changed_repos))
+            sys.exit(1)
+
+        collected_files, manifest = apply_sync_results(destination_folder, manifest, results, remote_heads, app_repo_list)
         write_and_verify(destination_folder, collected_files)
+        save_sync_manifest(manifest_path, manifest)
 
         commit_message = "Sync dev1-values from all services"
-        stage_commit_and_push(promotion_repo_url, promo_repo_path, target_branch, commit_message)
+        stage_commit_and_push(promotion_repo_url, promo_repo_path, target_branch, commit_message,
+                              paths=[destination_folder, manifest_path])
         print("Promotion repository updated successfully.")
     except Exception as e:
         print(f"Failed to update promotion repo: {e}")
     finally:
-        shutil.rmtree(temp_dir, onerror=on_rm_error)
+        # Keep the clones for the next run unless workspace reuse is off
+        if not WORKSPACE_REUSE:
+            shutil.rmtree(temp_dir, onerror=on_rm_error)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import json
+
+
+def get_json_text(value, texts=None):
+    """
+    json.dumps(value, indent=4). Dicts and lists are memoised in `texts`
+    by id(), with a reference to the value so its id is not reused, when
+    the caller passes one: the same subtree often fills several columns (le_cur
+    and the env-replaced he_cur), and is then only serialised once.
+    """
+    if texts is None or not isinstance(value, (dict, list)):
+        return json.dumps(value, indent=4)
+    hit = texts.get(id(value))
+    if hit is None:
+        hit = texts[id(value)] = (value, json.dumps(value, indent=4))
+    return hit[1]
+
+
+class JsonText:
+    """
+    A release note cell holding `value` as JSON, rendered when read: the
+    text of json.dumps(value, indent=4), with `envs` (lower, higher) swapped
+    as dump_and_replace() does, and wrapped in [] when `bracketed`.
+    """
+
+    __slots__ = ('value', 'envs', 'bracketed')
+
+    def __init__(self, value, envs=None, bracketed=False):
+        self.value = value
+        self.envs = envs
+        self.bracketed = bracketed
+
+    def render(self, texts=None):
+        text = get_json_text(self.value, texts)
+        if self.envs and self.envs[0] and self.envs[1]:
+            text = text.replace(self.envs[0], self.envs[1])
+        return f"[{text}]" if self.bracketed else text
+
+
+_PLAIN_FIELDS = {0: 'root', 1: 'change_type', 2: 'key', 7: 'comment', -8: 'root', -7: 'change_type', -6: 'key', -1: 'comment'}
+
+
+class ChangeRecord:
+    """
+    One release note row: (service, change type, key, <lower>-current,
+    <lower>-previous, <higher>-current, <higher>-previous, comment).
+
+    The four value cells may be JsonText references to the compared values;
+    each is rendered the first time it is read, and kept. A value shared by
+    several cells is serialised once, through a memo that lives on the
+    record until its last JsonText cell is rendered. The le_cur, le_prev,
+    he_cur and he_prev attributes render only their own cell; index, iteration
+    or unpacking render the whole row. Otherwise a record behaves as the
+    8-tuple of strings compare() used to build, and compares equal to it.
+    """
+
+    __slots__ = ('root', 'change_type', 'key', 'cells', 'comment', '_texts')
+
+    def __init__(self, root, change_type, key, le_cur, le_prev, he_cur, he_prev, comment):
+        self.root = root
+        self.change_type = change_type
+        self.key = key
+        self.cells = [le_cur, le_prev, he_cur, he_prev]
+        self.comment = comment
+        self._texts = {}
+
+    def _cell(self, index):
+        value = self.cells[index]
+        if isinstance(value, JsonText):
+            value = self.cells[index] = value.render(self._texts)
+            if not any(isinstance(cell, JsonText) for cell in self.cells):
+                self._texts = None
+        return value
+
+    le_cur = property(lambda self: self._cell(0))
+    le_prev = property(lambda self: self._cell(1))
+    he_cur = property(lambda self: self._cell(2))
+    he_prev = property(lambda self: self._cell(3))
+
+    def as_tuple(self):
+        return (self.root, self.change_type, self.key, *(self._cell(i) for i in range(4)), self.comment)
+
+    def __getitem__(self, index):
+        # service, type, key and comment are answered without rendering
+        if type(index) is int and index in _PLAIN_FIELDS:
+            return getattr(self, _PLAIN_FIELDS[index])
+        return self.as_tuple()[index]
+
+    def __len__(self):
+        return 8
+
+    def __iter__(self):
+        return iter(self.as_tuple())
+
+    def __eq__(self, other):
+        if isinstance(other, ChangeRecord):
+            other = other.as_tuple()
+        if not isinstance(other, tuple):
+            return NotImplemented
+        return self.as_tuple() == other
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __repr__(self):
+        return f"ChangeRecord{self.as_tuple()!r}"
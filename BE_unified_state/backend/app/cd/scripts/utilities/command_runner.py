@@ -0,0 +1,164 @@
+import os
+import time
+import asyncio
+import threading
+import subprocess
+import urllib.parse
+
+# Process-wide caps: at most COMMAND_CONCURRENCY commands at once, and at most
+# COMMAND_HOST_CONCURRENCY of them against the same remote host. Pools running
+# git commands (sync_yaml's SYNC_WORKERS) are bounded by both: their repos
+# usually live on one host, so the host cap defaults to the global one rather
+# than silently idling workers. Lower it only to throttle a single host.
+MAX_CONCURRENCY = int(os.getenv("COMMAND_CONCURRENCY", "8"))
+HOST_CONCURRENCY = int(os.getenv("COMMAND_HOST_CONCURRENCY", str(MAX_CONCURRENCY)))
+RETRIES = int(os.getenv("COMMAND_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("COMMAND_RETRY_BACKOFF", "1.0"))
+
+# git commands that only read from a remote, so a failed attempt can simply
+# be repeated. Others (push, commit-tree, ...) may have half-happened and are
+# only retried when the caller passes retries=.
+RETRY_GIT_COMMANDS = ('fetch', 'clone', 'ls-remote')
+
+# stderr fragments of network failures that are worth another attempt
+TRANSIENT_ERRORS = (
+    "Could not resolve host",
+    "Connection timed out",
+    "Connection reset",
+    "Connection refused",
+    "Operation timed out",
+    "The remote end hung up unexpectedly",
+    "early EOF",
+    "RPC failed",
+    "TLS connection",
+    "HTTP 429",
+    "returned error: 5",
+    "Service Unavailable",
+    "Bad Gateway",
+)
+
+_loop = None
+_loop_lock = threading.Lock()
+_global_limit = None
+_host_limits = {}
+
+
+class CommandResult(subprocess.CompletedProcess):
+    """CompletedProcess with the wall time of the last attempt and the number of attempts."""
+
+    def __init__(self, args, returncode, stdout, stderr, duration, attempts):
+        super().__init__(args, returncode, stdout, stderr)
+        self.duration = duration
+        self.attempts = attempts
+
+
+def host_of(cmd):
+    """Remote host named by the first URL argument of `cmd`, or None for local commands."""
+    for arg in cmd:
+        if "://" in str(arg):
+            host = urllib.parse.urlsplit(str(arg)).hostname
+            if host:
+                return host
+    return None
+
+
+def is_transient(stderr):
+    return any(fragment in (stderr or "") for fragment in TRANSIENT_ERRORS)
+
+
+def default_retries(cmd):
+    """RETRIES for a read-only git network command, 0 for anything else."""
+    if not cmd or os.path.basename(str(cmd[0])) != 'git':
+        return 0
+    args = iter(cmd[1:])
+    for arg in args:
+        if arg in ('-C', '-c'):
+            next(args, None)
+        elif not str(arg).startswith('-'):
+            return RETRIES if arg in RETRY_GIT_COMMANDS else 0
+    return 0
+
+
+def _limits(host):
+    global _global_limit
+    if _global_limit is None:
+        _global_limit = asyncio.Semaphore(MAX_CONCURRENCY)
+    if host and host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(HOST_CONCURRENCY)
+    return _global_limit, _host_limits.get(host)
+
+
+async def _run_once(cmd, cwd, timeout, input, env):
+    process = await asyncio.create_subprocess_exec(
+        *cmd, cwd=cwd, env=env,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(input.encode() if input is not None else None), timeout
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+async def run_command_async(cmd, cwd=None, check=False, timeout=None, input=None, env=None, host=None, retries=None):
+    """
+    Run `cmd` (an argument list, no shell) with stdout/stderr captured as text.
+    Waits for a slot under the global cap and the cap of `host` (taken from
+    the first URL in `cmd` when not given). Failures whose stderr looks like
+    a transient network error are retried `retries` times with exponential
+    backoff; by default only read-only git commands are (see default_retries). With check=True a failure raises CalledProcessError; a timeout
+    always raises TimeoutExpired.
+    """
+    cmd = [str(arg) for arg in cmd]
+    retries = default_retries(cmd) if retries is None else retries
+    global_limit, host_limit = _limits(host or host_of(cmd))
+    attempt = 0
+    while True:
+        attempt += 1
+        async with global_limit:
+            if host_limit:
+                async with host_limit:
+                    started = time.monotonic()
+                    returncode, stdout, stderr = await _run_once(cmd, cwd, timeout, input, env)
+            else:
+                started = time.monotonic()
+                returncode, stdout, stderr = await _run_once(cmd, cwd, timeout, input, env)
+        result = CommandResult(cmd, returncode, stdout, stderr, time.monotonic() - started, attempt)
+        if returncode == 0 or attempt > retries or not is_transient(stderr):
+            break
+        delay = RETRY_BACKOFF * 2 ** (attempt - 1)
+        print(f"Transient failure running {cmd[0]} {cmd[1] if len(cmd) > 1 else ''}, retrying in {delay:.0f}s")
+        await asyncio.sleep(delay)
+    if check:
+        result.check_returncode()
+    return result
+
+
+def _get_loop():
+    """One background event loop per process, so the caps hold across threads."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="command-runner", daemon=True).start()
+    return _loop
+
+
+def run_command(cmd, **kwargs):
+    """Blocking wrapper around run_command_async; takes the same arguments."""
+    return asyncio.run_coroutine_threadsafe(run_command_async(cmd, **kwargs), _get_loop()).result()
+
+
+def run_commands(commands, **kwargs):
+    """
+    Run independent commands concurrently (within the caps) and return their
+    results in order. A command that raised is returned as its exception.
+    """
+    async def run_all():
+        return await asyncio.gather(*(run_command_async(cmd, **kwargs) for cmd in commands), return_exceptions=True)
+    return asyncio.run_coroutine_threadsafe(run_all(), _get_loop()).result()
@@ -1,8 +1,9 @@
 import os
-import yaml
 import re
 import shutil
 
+from utilities import yaml_codec
+
 def get_fname(line):
     return line.split(":")[0]
 
@@ -52,7 +53,7 @@ def update_txt_file_with_yaml_values(txt_file_path, yaml_folder_path):
         yaml_file_path = os.path.join(yaml_folder_path, f"{filename}.yaml")
         if os.path.exists(yaml_file_path):
             with open(yaml_file_path, 'r') as yaml_file:
-                yaml_content = yaml.safe_load(yaml_file)
+                yaml_content = yaml_codec.load(yaml_file)
                 name_value = ''
                 name_value = yaml_content.get('app', {}).get('name', None)
                 if name_value:
@@ -2,9 +2,16 @@ import os
 import openpyxl
 import shutil
 import re
-import yaml
 from openpyxl.utils import get_column_letter
 
+from utilities import yaml_codec
+from utilities.repo_layout import makedirs
+
+def get_summary_dir(target_folder_x, input_sheet_name):
+    """Folder create_release_note_summary writes release-note-summary.xlsx to."""
+    return os.path.join(target_folder_x, "helm-charts", f"{input_sheet_name}-values", "release_note")
+
+
 def create_release_note_summary(files_path, target_folder_x, existing_release_note_dir,input_sheet_name):
     print("Executing create release note.py")
     # Find first Excel file in existing release note folder
@@ -24,10 +31,10 @@ def create_release_note_summary(files_path, target_folder_x, existing_release_no
         print("Path to summary sheet not specified")
  
     # Compose the directory in which the file is to be copied
-    new_dir = os.path.join(target_folder_x, "helm-charts", f"{input_sheet_name}-values", "release_note")
+    new_dir = get_summary_dir(target_folder_x, input_sheet_name)
  
     # Create directory if it doesn't exist
-    os.makedirs(new_dir, exist_ok=True)
+    makedirs(new_dir)
  
     # Then, compose the full new Excel file path
     new_excel_file = os.path.join(new_dir, "release-note-summary.xlsx")
@@ -147,7 +154,7 @@ def create_release_note_summary(files_path, target_folder_x, existing_release_no
             if os.path.exists(yaml_file_path):
                 try:
                     with open(yaml_file_path, 'r') as yf:
-                        yaml_content = yaml.safe_load(yf)
+                        yaml_content = yaml_codec.load(yf)
  
                     # Search for 'image_name' key anywhere in yaml (top level or nested)
                     # If your structure is nested, you may need a recursive search
@@ -1,8 +1,17 @@
-import json
 from utilities.helpers import get_parent_path
-from utilities.json_and_yaml_helpers import dump_and_replace
+from utilities.change_record import ChangeRecord, JsonText
+from utilities import structural_hash
+
+def compare(le_old, le_new, root, changes, he_old, envs, path='', memo=None):
+    # A subtree that is the same in all three trees yields no change; skip it
+    # by digest. le_old == le_new alone is not enough: he_old differing still
+    # gives pending adds and deletes. The digest memo lives for this call and
+    # its recursion only, so later edits to the documents are never missed.
+    if memo is None:
+        memo = {}
+    if isinstance(le_old, (dict, list)) and structural_hash.same(le_old, le_new, he_old, memo=memo):
+        return
 
-def compare(le_old, le_new, root, changes, he_old, envs, path=''):
     # Handle dictionary structures
     if isinstance(le_old, dict) and isinstance(le_new, dict):
 
@@ -19,50 +28,40 @@ def compare(le_old, le_new, root, changes, he_old, envs, path=''):
 
             # 🔴 Deleted (exists in old lower but removed in new)
             if k in le_old and k not in le_new:
-                modified_json = dump_and_replace(
-                    le_old_val,
-                    lower_env=envs[0],
-                    higher_env=envs[1]
-                )
-
-                changes.append((
+                changes.append(ChangeRecord(
                     root, 'delete', get_parent_path(new_key_path),
                     '',
-                    json.dumps(le_old_val, indent=4),
+                    JsonText(le_old_val),
                     '',
-                    json.dumps(he_val, indent=4) if he_val else '',
+                    JsonText(he_val) if he_val else '',
                     'Deleted'
                 ))
             # 🔴 Deletion Pending (exists in higher, removed in new)
             elif k in he_old and k not in le_new:
-                changes.append((
+                changes.append(ChangeRecord(
                     root, 'pending delete', get_parent_path(new_key_path),
                     '', '', '',
-                    json.dumps(he_val, indent=4),
+                    JsonText(he_val),
                     'Deletion Pending'
                 ))
 
             # 🟢 Added / Promotion Pending
             elif k in le_new and k not in he_old:
-                modified_json = dump_and_replace(
-                    le_new_val,
-                    lower_env=envs[0],
-                    higher_env=envs[1]
-                )
+                modified_json = JsonText(le_new_val, envs)
 
                 if k not in le_old:
-                    changes.append((
+                    changes.append(ChangeRecord(
                         root, 'add', get_parent_path(new_key_path),
-                        json.dumps(le_new_val, indent=4),
+                        JsonText(le_new_val),
                         '',
                         modified_json,
                         '',
                         'Added'
                     ))
                 else:
-                    changes.append((
+                    changes.append(ChangeRecord(
                         root, 'pending add', get_parent_path(new_key_path),
-                        json.dumps(le_new_val, indent=4),
+                        JsonText(le_new_val),
                         '',
                         modified_json,
                         '',
@@ -78,7 +77,8 @@ def compare(le_old, le_new, root, changes, he_old, envs, path=''):
                     changes,
                     he_val,
                     envs,
-                    new_key_path
+                    new_key_path,
+                    memo
                 )
 
     # Handle lists
@@ -92,24 +92,22 @@ def compare(le_old, le_new, root, changes, he_old, envs, path=''):
                 for i, le_old_item in enumerate(le_old):
                     if i < len(le_new):
                         if le_old_item != le_new[i]:
-                            modified_json = dump_and_replace(le_new[i], lower_env=envs[0], higher_env=envs[1])
-                            changes.append((root, 'modify', f"{path}", "["+json.dumps(le_new[i], indent=4)+"]", "["+json.dumps(le_old_item, indent=4)+"]",  "["+modified_json+"]","["+json.dumps(he_old[i], indent=4)+"]",'Modified'))
+                            changes.append(ChangeRecord(root, 'modify', f"{path}", JsonText(le_new[i], bracketed=True), JsonText(le_old_item, bracketed=True),  JsonText(le_new[i], envs, bracketed=True),JsonText(he_old[i], bracketed=True),'Modified'))
                     else:
-                        modified_json = dump_and_replace(le_old_item, lower_env=envs[0], higher_env=envs[1])
-                        changes.append((root, 'delete', f"{path}", '',json.dumps(le_old_item, indent=4), '',json.dumps(he_old[i], indent=4),'Deleted'))
+                        changes.append(ChangeRecord(root, 'delete', f"{path}", '',JsonText(le_old_item), '',JsonText(he_old[i]),'Deleted'))
  
  
                 # Add any new elements from the new list
                 for i in range(len(le_old), len(le_new)):
-                    modified_json = dump_and_replace(le_new[i], lower_env=envs[0], higher_env=envs[1])
-                    changes.append((root, 'add', f"{path}", json.dumps(le_new[i], indent=4), '',modified_json,'', 'Added'))
+                    modified_json = JsonText(le_new[i], envs)
+                    changes.append(ChangeRecord(root, 'add', f"{path}", JsonText(le_new[i]), '',modified_json,'', 'Added'))
  
     # Compare scalar values
     else:
         if le_old != le_new:
             path = get_parent_path(path)
-            modified_json = dump_and_replace(le_new, lower_env=envs[0], higher_env=envs[1])
-            changes.append((root, 'modify', path, json.dumps(le_new, indent=4), json.dumps(le_old, indent=4) ,modified_json,json.dumps(he_old, indent=4) ,'Modified'))
+            modified_json = JsonText(le_new, envs)
+            changes.append(ChangeRecord(root, 'modify', path, JsonText(le_new), JsonText(le_old) ,modified_json,JsonText(he_old) ,'Modified'))
 
 
 def compare_list_of_dicts(le_old_list, le_new_list, root, changes, he_old_list, envs, path=''):
@@ -129,49 +127,40 @@ def compare_list_of_dicts(le_old_list, le_new_list, root, changes, he_old_list,
 
         # 🔴 Deleted
         if key in le_old_dict and key not in le_new_dict:
-            modified_json = dump_and_replace(
-                le_old_item,
-                lower_env=envs[0],
-                higher_env=envs[1]
-            )
-            changes.append((
+            changes.append(ChangeRecord(
                 root, 'delete', get_parent_path(key_path),
                 '',
-                json.dumps(le_old_item, indent=4),
+                JsonText(le_old_item),
                 '',
-                json.dumps(he_old_item, indent=4) if he_old_item else '',
+                JsonText(he_old_item) if he_old_item else '',
                 'Deleted'
             ))
         # 🔴 Deletion Pending
         elif key in he_old_dict and key not in le_new_dict:
-            changes.append((
+            changes.append(ChangeRecord(
                 root, 'pending delete', get_parent_path(key_path),
                 '', '', '',
-                json.dumps(he_old_item, indent=4),
+                JsonText(he_old_item),
                 'Deletion Pending'
             ))
 
         # 🟢 Added / Promotion Pending
         elif key in le_new_dict and key not in he_old_dict:
-            modified_json = dump_and_replace(
-                le_new_item,
-                lower_env=envs[0],
-                higher_env=envs[1]
-            )
+            modified_json = JsonText(le_new_item, envs)
 
             if key not in le_old_dict:
-                changes.append((
+                changes.append(ChangeRecord(
                     root, 'add', get_parent_path(key_path),
-                    json.dumps(le_new_item, indent=4),
+                    JsonText(le_new_item),
                     '',
                     modified_json,
                     '',
                     'Added'
                 ))
             else:
-                changes.append((
+                changes.append(ChangeRecord(
                     root, 'pending add', get_parent_path(key_path),
-                    json.dumps(le_new_item, indent=4),
+                    JsonText(le_new_item),
                     '',
                     modified_json,
                     '',
@@ -180,17 +169,13 @@ def compare_list_of_dicts(le_old_list, le_new_list, root, changes, he_old_list,
 
         # 🔁 Modified
         elif le_old_item != le_new_item:
-            modified_json = dump_and_replace(
-                le_new_item,
-                lower_env=envs[0],
-                higher_env=envs[1]
-            )
-            changes.append((
+            modified_json = JsonText(le_new_item, envs)
+            changes.append(ChangeRecord(
                 root, 'modify', get_parent_path(key_path),
-                json.dumps(le_new_item, indent=4),
-                json.dumps(le_old_item, indent=4),
+                JsonText(le_new_item),
+                JsonText(le_old_item),
                 modified_json,
-                json.dumps(he_old_item, indent=4) if he_old_item else '',
+                JsonText(he_old_item) if he_old_item else '',
                 'Modified'
             ))
 
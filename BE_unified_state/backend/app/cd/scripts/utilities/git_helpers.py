@@ -1,73 +1,711 @@
+import os
+import hashlib
+import itertools
 import subprocess
+from pathlib import Path
 
 from utilities.dir_helpers import isDirClean
+from utilities import repo_layout
+from utilities.command_runner import run_command, run_commands, host_of
+from utilities.helpers import redact_url, redact_urls
 
+# Persistent bare mirrors, one per remote URL. Set GIT_MIRROR_DIR to an empty
+# string to clone straight from the remote.
+MIRROR_ROOT = os.getenv("GIT_MIRROR_DIR", os.path.join(os.path.expanduser("~"), ".cache", "git-mirrors"))
+MIRROR_FETCH_TIMEOUT = int(os.getenv("GIT_MIRROR_FETCH_TIMEOUT", "600"))
+# Bundle snapshots written by create_git_bundles.py (a local or bucket-mounted
+# path). A mirror created on a cold agent is seeded from here first, so the
+# remote only sends what changed since the snapshot.
+BUNDLE_DIR = os.getenv("GIT_BUNDLE_DIR", "")
+# Reset an existing clone of the same remote instead of deleting and recloning it.
+WORKSPACE_REUSE = os.getenv("GIT_WORKSPACE_REUSE", "1") != "0"
 
-def is_base_branch_exists(url, branch):
-    ls_remote = subprocess.run(['git', 'ls-remote', '--heads', url, branch], capture_output=True, text=True, check=True)
-    if ls_remote:
-        return True
-    else:
+# main.py exports the path of the open promotion transaction here; while it is
+# set, every operation on that repo's URL goes to the local transaction repo.
+TRANSACTION_ENV = "PROMOTION_TXN_REPO"
+
+_refreshed_mirrors = set()
+_remote_refs = {}
+_transaction_urls = {}
+
+
+def describe_error(e):
+    """`e` as printed on failure: with git's stderr, which run_command captures, and no credentials."""
+    message = str(e)
+    stderr = getattr(e, 'stderr', None)
+    if stderr and stderr.strip():
+        message += f"\n{stderr.strip()}"
+    return redact_urls(message)
+
+
+def get_repo_slug(url):
+    """<repo name>-<short hash of the URL without credentials>: a directory name unique per repo."""
+    clean_url = redact_url(url)
+    digest = hashlib.sha1(clean_url.encode()).hexdigest()[:12]
+    return f"{Path(clean_url).stem}-{digest}"
+
+
+def get_mirror_path(url):
+    return os.path.join(MIRROR_ROOT, f"{get_repo_slug(url)}.git")
+
+
+def get_bundle_path(url, bundle_dir=None):
+    """Snapshot bundle of `url`, named after its mirror, or None when the bundle directory is unset."""
+    bundle_dir = BUNDLE_DIR if bundle_dir is None else bundle_dir
+    if not bundle_dir:
+        return None
+    return os.path.join(bundle_dir, os.path.basename(get_mirror_path(url))[:-len('.git')] + '.bundle')
+
+
+def seed_from_bundle(mirror_path, bundle_path):
+    """Fetch every ref of `bundle_path` into a new mirror. Returns False if the bundle is unusable."""
+    result = run_command(
+        ['git', 'fetch', '--quiet', bundle_path, '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*'],
+        cwd=mirror_path, timeout=MIRROR_FETCH_TIMEOUT
+    )
+    if result.returncode != 0:
+        print(f"Could not seed mirror from {bundle_path}, fetching everything: {result.stderr.strip()}")
         return False
-    
-def clone_single_branch_and_checkout(url, checkout_branch, clone_dir):
+    print(f"Seeded mirror from {bundle_path}")
+    return True
+
+
+def refresh_mirror(url, create=True):
+    """
+    Create or incrementally fetch the local bare mirror of `url`.
+    Runs at most once per process; returns the mirror path, or None when the
+    cache is disabled or unavailable so callers fall back to a plain clone.
+    With create=False an absent mirror is not built (shallow clones would
+    otherwise pay for the full history once) unless a bundle snapshot can
+    seed it.
+    """
+    if not MIRROR_ROOT:
+        return None
+    mirror_path = get_mirror_path(url)
+    if mirror_path in _refreshed_mirrors:
+        return mirror_path
+    bundle_path = get_bundle_path(url)
+    if bundle_path and not os.path.isfile(bundle_path):
+        bundle_path = None
+    if not create and not os.path.isdir(mirror_path) and not bundle_path:
+        return None
+    try:
+        if not os.path.isdir(mirror_path):
+            os.makedirs(MIRROR_ROOT, exist_ok=True)
+            run_command(['git', 'init', '--bare', '--quiet', mirror_path], check=True)
+            # Clones borrow objects from here through alternates, so never let gc drop them
+            run_command(['git', 'config', 'gc.auto', '0'], cwd=mirror_path, check=True)
+            if bundle_path:
+                seed_from_bundle(mirror_path, bundle_path)
+        # The URL is passed per fetch so the token never lands in the mirror config
+        run_command(
+            ['git', 'fetch', '--prune', '--quiet', url,
+             '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*'],
+            cwd=mirror_path, check=True, timeout=MIRROR_FETCH_TIMEOUT
+        )
+    except Exception as e:
+        print(f"Mirror refresh failed for {redact_url(url)}, cloning from remote: {describe_error(e)}")
+        return None
+    _refreshed_mirrors.add(mirror_path)
+    return mirror_path
+
+
+def write_bundle(url, bundle_dir=None):
+    """
+    Refresh the mirror of `url` and snapshot all its refs into
+    `bundle_dir` (GIT_BUNDLE_DIR by default). The bundle is written next to
+    the old one and renamed over it, and skipped when its refs already match
+    the mirror. Returns the bundle path and whether it was rewritten.
+    """
+    bundle_path = get_bundle_path(url, bundle_dir)
+    if not bundle_path:
+        raise ValueError("No bundle directory given and GIT_BUNDLE_DIR is not set")
+    mirror_path = refresh_mirror(url)
+    if not mirror_path:
+        raise RuntimeError(f"Could not refresh the mirror of {redact_url(url)}")
+
+    mirror_refs = run_command(
+        ['git', 'for-each-ref', '--format=%(objectname) %(refname)', 'refs/heads', 'refs/tags'],
+        cwd=mirror_path, check=True
+    ).stdout.split('\n')
+    if os.path.isfile(bundle_path):
+        bundle_refs = run_command(['git', 'bundle', 'list-heads', bundle_path], cwd=mirror_path).stdout.split('\n')
+        if sorted(filter(None, bundle_refs)) == sorted(filter(None, mirror_refs)):
+            print(f"Bundle of {redact_url(url)} is up to date")
+            return bundle_path, False
+
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    partial_path = bundle_path + '.partial'
+    try:
+        run_command(['git', 'bundle', 'create', '--quiet', partial_path, '--branches', '--tags'],
+                    cwd=mirror_path, check=True, timeout=MIRROR_FETCH_TIMEOUT)
+        os.replace(partial_path, bundle_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    print(f"Wrote bundle of {redact_url(url)} to {bundle_path}")
+    return bundle_path, True
+
+
+def get_transaction_repo(url):
+    """Path of the open transaction repo when it was begun for `url`, else None."""
+    txn_repo = os.getenv(TRANSACTION_ENV)
+    if not txn_repo or not os.path.isdir(txn_repo):
+        return None
+    if txn_repo not in _transaction_urls:
+        _transaction_urls[txn_repo] = run_command(
+            ['git', 'config', '--get', 'promotion.url'], cwd=txn_repo
+        ).stdout.strip()
+    return txn_repo if _transaction_urls[txn_repo] == redact_url(url) else None
+
+
+def set_sparse_paths(repo_dir, paths, timeout=None):
+    """Restrict the working tree to `paths` (cone mode); root-level files are always kept."""
+    run_command(['git', 'sparse-checkout', 'set', '--cone', '--', *paths], cwd=repo_dir, check=True, timeout=timeout)
+
+
+def _clone(url, checkout_branch, clone_dir, clone_args, timeout=None, paths=None, depth=None):
+    txn_repo = get_transaction_repo(url)
+    # A transaction repo is local: the clone hardlinks its objects, no mirror needed
+    mirror_path = None if txn_repo else refresh_mirror(url, create=depth is None)
+    reference_args = ['--reference-if-able', mirror_path] if mirror_path else []
+    if depth:
+        # Tip-only mode: one commit of one branch, no tags
+        clone_args = [*clone_args, '--depth', str(depth), '--no-tags']
+        if '--single-branch' not in clone_args:
+            clone_args.append('--single-branch')
+    # paths=None is a full checkout, paths=[] keeps only the root files (e.g. meta-sheet.xlsx)
+    sparse_args = ['--filter=blob:none', '--sparse'] if paths is not None else []
+    run_command(
+        ['git', 'clone', *clone_args, *sparse_args, *reference_args, '-b', checkout_branch, txn_repo or url, clone_dir],
+        check=True, timeout=timeout
+    )
+    if paths:
+        set_sparse_paths(clone_dir, paths, timeout=timeout)
+    repo_layout.invalidate(clone_dir)
+
+
+def reuse_clone(url, checkout_branch, clone_dir, paths=None, depth=None, timeout=None):
+    """
+    Bring an existing clone of `url` in `clone_dir` to the tip of
+    `checkout_branch`: fetch, reset --hard and clean -fdx, then apply `paths`
+    the way a fresh clone would. Returns False when the directory is not a
+    clone of the same remote or the reset fails, so the caller reclones.
+    """
+    if not WORKSPACE_REUSE or not os.path.isdir(os.path.join(clone_dir, '.git')):
+        return False
+    source = get_transaction_repo(url) or url
+    try:
+        origin = run_command(['git', 'config', '--get', 'remote.origin.url'], cwd=clone_dir).stdout.strip()
+        if redact_url(origin) != redact_url(source):
+            return False
+        # The stored URL may carry an expired token
+        run_command(['git', 'remote', 'set-url', 'origin', source], cwd=clone_dir, check=True)
+        depth_args = ['--depth', str(depth), '--no-tags'] if depth else []
+        run_command(
+            ['git', 'fetch', '--quiet', '--prune', *depth_args, 'origin',
+             f'+refs/heads/{checkout_branch}:refs/remotes/origin/{checkout_branch}'],
+            cwd=clone_dir, check=True, timeout=timeout, host=host_of([source])
+        )
+        if paths is not None:
+            set_sparse_paths(clone_dir, paths, timeout=timeout)
+        else:
+            run_command(['git', 'sparse-checkout', 'disable'], cwd=clone_dir, check=True, timeout=timeout)
+        run_command(['git', 'checkout', '--quiet', '--force', '-B', checkout_branch, f'origin/{checkout_branch}'],
+                    cwd=clone_dir, check=True, timeout=timeout)
+        run_command(['git', 'reset', '--quiet', '--hard', f'origin/{checkout_branch}'], cwd=clone_dir, check=True, timeout=timeout)
+        run_command(['git', 'clean', '-fdxq'], cwd=clone_dir, check=True, timeout=timeout)
+    except Exception as e:
+        print(f"Could not reuse {clone_dir}, recloning: {describe_error(e)}")
+        return False
+    finally:
+        repo_layout.invalidate(clone_dir)
+    print(f"Reused existing clone in {clone_dir} at origin/{checkout_branch}")
+    return True
+
+
+def get_remote_refs(url):
+    """
+    All heads and tags of `url` as {refname: sha}. One `git ls-remote` per
+    remote per run; stage_commit_and_push drops the entry after our own push.
+    Inside a transaction the refs are those of the transaction repo.
+    """
+    key = redact_url(url)
+    if key not in _remote_refs:
+        source = get_transaction_repo(url) or url
+        ls_remote = run_command(['git', 'ls-remote', '--heads', '--tags', source], check=True, timeout=60)
+        _remote_refs[key] = _parse_ls_remote(ls_remote.stdout)
+    return _remote_refs[key]
+
+
+def _parse_ls_remote(output):
+    refs = {}
+    for line in output.splitlines():
+        sha, ref = line.split('\t', 1)
+        refs[ref] = sha
+    return refs
+
+
+def prefetch_remote_refs(urls):
+    """
+    Fill the ref cache for many remotes at once: the ls-remotes run
+    concurrently under the command runner's caps. A remote that fails is
+    left uncached, so its own get_remote_refs call reports the error.
+    """
+    pending = [url for url in dict.fromkeys(urls) if redact_url(url) not in _remote_refs]
+    results = run_commands([['git', 'ls-remote', '--heads', '--tags', get_transaction_repo(url) or url]
+                            for url in pending], timeout=60)
+    for url, result in zip(pending, results):
+        if isinstance(result, subprocess.CompletedProcess) and result.returncode == 0:
+            _remote_refs[redact_url(url)] = _parse_ls_remote(result.stdout)
+
+
+def invalidate_remote_refs(url):
+    _remote_refs.pop(redact_url(url), None)
+
+
+def get_remote_sha(url, ref):
+    refs = get_remote_refs(url)
+    for name in (ref, f"refs/heads/{ref}", f"refs/tags/{ref}"):
+        if name in refs:
+            return refs[name]
+    return None
+
+
+def is_base_branch_exists(url, branch):
+    return f"refs/heads/{branch}" in get_remote_refs(url)
+
+def clone_single_branch_and_checkout(url, checkout_branch, clone_dir, paths=None, depth=None, timeout=30):
+    if reuse_clone(url, checkout_branch, clone_dir, paths=paths, depth=depth, timeout=timeout):
+        return
     if isDirClean(clone_dir):
         try:
-            subprocess.run(
-                ['git', 'clone', '--single-branch', '-b', checkout_branch, url, clone_dir],
-                check=True,timeout = 30, 
-                stdout=subprocess.DEVNULL
-            )
+            _clone(url, checkout_branch, clone_dir, ['--single-branch'], timeout=timeout, paths=paths, depth=depth)
         except Exception as e:
-            print(f"Error occured while cloning and checking out: {e}")
+            print(f"Error occured while cloning and checking out: {describe_error(e)}")
             raise
 
-def clone_branch_and_checkout_new_branch(url, checkout_branch, clone_dir, new_branch):
-    if isDirClean(clone_dir):
+def clone_branch_and_checkout_new_branch(url, checkout_branch, clone_dir, new_branch, paths=None):
+    reused = reuse_clone(url, checkout_branch, clone_dir, paths=paths, timeout=30)
+    if reused or isDirClean(clone_dir):
         try:
-            subprocess.run(
-                ['git', 'clone', '--single-branch', '-b', checkout_branch, url, clone_dir],
-                check=True,timeout = 30, 
-                stdout=subprocess.DEVNULL
-            )
-            subprocess.run(['git', 'checkout', '-b', new_branch], cwd=clone_dir, check=True, timeout=30)
+            if not reused:
+                _clone(url, checkout_branch, clone_dir, ['--single-branch'], timeout=30, paths=paths)
+            # -B: a reused clone may still have new_branch from an earlier run
+            run_command(['git', 'checkout', '-B', new_branch], cwd=clone_dir, check=True, timeout=30)
         except Exception as e:
-            print(f"Error occured while cloning and checking out: {e}")
+            print(f"Error occured while cloning and checking out: {describe_error(e)}")
             raise
 
-def clone_repo_and_checkout(url, checkout_branch, clone_dir):
+def clone_repo_and_checkout(url, checkout_branch, clone_dir, paths=None, depth=None):
+    if reuse_clone(url, checkout_branch, clone_dir, paths=paths, depth=depth):
+        return
     if isDirClean(clone_dir):
         try:
-            subprocess.run(
-                ["git", "clone", "-b", checkout_branch, url, clone_dir],
-                check=True,
-                stdout=subprocess.DEVNULL 
-            )
+            _clone(url, checkout_branch, clone_dir, [], paths=paths, depth=depth)
         except Exception as e:
-            print(f"Error occured while cloning and checking out: {e}")
+            print(f"Error occured while cloning and checking out: {describe_error(e)}")
             raise
 
-def stage_commit_and_push(url, push_dir, to_branch, commit_message, rebase=False):
+def checkout_worktrees(url, checkouts, base_dir=None, depth=None):
+    """
+    Materialise several branches of one repo side by side as git worktrees.
+
+    `checkouts` is a list of (branch, worktree_dir) or (branch, worktree_dir,
+    paths) tuples. The branches are fetched once into a shared bare repo at
+    `base_dir` and each directory becomes a worktree on a local branch
+    tracking origin/<branch>, so stage_commit_and_push works in them
+    unchanged. When `paths` is given the worktree is a cone-mode sparse
+    checkout of just those directories. A branch listed twice is checked out
+    detached the second time; list the one you push from first. With
+    `depth` only that many commits of each branch are fetched, without tags.
+    Returns the worktree paths in the order given.
+    """
+    base_dir = base_dir or os.path.join(os.getcwd(), "worktree-base", get_repo_slug(url))
+    checkouts = [(*checkout, None)[:3] for checkout in checkouts]
+    branches = list(dict.fromkeys(branch for branch, _, _ in checkouts))
     try:
-        subprocess.run(['git', 'add', '.'], cwd=push_dir, check=True, timeout=30)
-        subprocess.run(['git', 'commit', '-m', commit_message], cwd=push_dir, check=True, timeout=30, stdout=subprocess.DEVNULL)
-        subprocess.run(['git', 'remote', 'set-url', 'origin', url], cwd=push_dir, check=True)
+        isDirClean(base_dir)
+        run_command(['git', 'init', '--bare', '--quiet', base_dir], check=True)
+        txn_repo = get_transaction_repo(url)
+        object_store = txn_repo or refresh_mirror(url, create=depth is None)
+        run_command(['git', 'remote', 'add', 'origin', txn_repo or url], cwd=base_dir, check=True)
+        filter_args = []
+        if object_store:
+            with open(os.path.join(base_dir, 'objects', 'info', 'alternates'), 'w') as f:
+                f.write(os.path.join(object_store, 'objects') + "\n")
+        elif all(paths is not None for _, _, paths in checkouts):
+            # Every worktree is sparse: fetch trees only, blobs arrive on checkout
+            run_command(['git', 'config', 'remote.origin.promisor', 'true'], cwd=base_dir, check=True)
+            run_command(['git', 'config', 'remote.origin.partialclonefilter', 'blob:none'], cwd=base_dir, check=True)
+            filter_args = ['--filter=blob:none']
+        depth_args = ['--depth', str(depth), '--no-tags'] if depth else []
+        run_command(
+            ['git', 'fetch', '--quiet', *filter_args, *depth_args, 'origin',
+             *[f'+refs/heads/{b}:refs/remotes/origin/{b}' for b in branches]],
+            cwd=base_dir, check=True, timeout=120, host=host_of([url])
+        )
+
+        checked_out = set()
+        for branch, worktree_dir, paths in checkouts:
+            isDirClean(worktree_dir)
+            if branch in checked_out:
+                target = ['--detach', worktree_dir, f'origin/{branch}']
+            else:
+                target = ['-B', branch, worktree_dir, f'origin/{branch}']
+                checked_out.add(branch)
+            checkout_args = ['--no-checkout'] if paths is not None else []
+            run_command(['git', 'worktree', 'add', '--quiet', *checkout_args, *target], cwd=base_dir, check=True)
+            if paths is not None:
+                set_sparse_paths(worktree_dir, paths)
+                run_command(['git', 'checkout', '--quiet'], cwd=worktree_dir, check=True)
+            repo_layout.invalidate(worktree_dir)
+    except Exception as e:
+        print(f"Error occured while creating worktrees: {describe_error(e)}")
+        raise
+    return [worktree_dir for _, worktree_dir, _ in checkouts]
+
+class GitBlobReader:
+    """
+    Read blobs straight from a repository's object store without a checkout.
+    One long-lived `git cat-file --batch` process serves every read; use it
+    as a context manager so the process is closed afterwards.
+    """
+
+    def __init__(self, repo_dir):
+        self.repo_dir = repo_dir
+        self._process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'], cwd=repo_dir,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def list_tree(self, rev, folder):
+        """Return (file_name, blob_sha) for the files directly under `folder` at `rev`."""
+        listing = run_command(
+            ['git', 'ls-tree', '-z', rev, '--', f"{folder.rstrip('/')}/"],
+            cwd=self.repo_dir, check=True
+        ).stdout
+        entries = []
+        for entry in filter(None, listing.split('\0')):
+            meta, path = entry.split('\t', 1)
+            _, object_type, sha = meta.split()
+            if object_type == 'blob':
+                entries.append((path.rsplit('/', 1)[-1], sha))
+        return entries
+
+    def read(self, object_name):
+        self._process.stdin.write(f"{object_name}\n".encode())
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().decode().split()
+        if len(header) != 3:
+            raise KeyError(f"Object not found in {self.repo_dir}: {object_name}")
+        content = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # trailing newline after each object
+        return content
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+
+def begin_transaction(url, txn_dir):
+    """
+    Open a promotion transaction: a local bare repo seeded with every branch
+    of `url`. Export its path as PROMOTION_TXN_REPO and the stages clone from
+    and push to it instead of the remote; commit_transaction publishes the
+    result. The starting heads are kept under refs/txn-base/heads/.
+    """
+    try:
+        isDirClean(txn_dir)
+        run_command(['git', 'init', '--bare', '--quiet', txn_dir], check=True)
+        mirror_path = refresh_mirror(url)
+        if mirror_path:
+            with open(os.path.join(txn_dir, 'objects', 'info', 'alternates'), 'w') as f:
+                f.write(os.path.join(mirror_path, 'objects') + "\n")
+        run_command(
+            ['git', 'fetch', '--quiet', url, '+refs/heads/*:refs/heads/*', '+refs/heads/*:refs/txn-base/heads/*'],
+            cwd=txn_dir, check=True, timeout=MIRROR_FETCH_TIMEOUT
+        )
+        run_command(['git', 'config', 'promotion.url', redact_url(url)], cwd=txn_dir, check=True)
+    except Exception as e:
+        print(f"Error occured while opening the promotion transaction: {describe_error(e)}")
+        raise
+    return txn_dir
+
+
+def _git_output(repo_dir, *args, input=None):
+    return run_command(['git', *args], cwd=repo_dir, check=True, input=input).stdout.strip()
+
+
+def _is_ancestor(repo_dir, ancestor, descendant):
+    return run_command(['git', 'merge-base', '--is-ancestor', ancestor, descendant], cwd=repo_dir).returncode == 0
+
+
+def commit_transaction(url, txn_dir, timeout=120):
+    """
+    Publish the transaction: squash the commits each stage added to a branch
+    into one commit on top of where that branch started, then push every
+    changed branch to `url` with a single `git push --atomic`, so either all
+    branches move or none do. A branch created in the transaction from the
+    head of another changed branch is squashed onto that branch's squashed
+    commit, so it stays a descendant of its base; one that forked from a
+    commit the other branch has since moved past cannot be, and is rejected
+    (ValueError) before anything is pushed. Returns the list of pushed branches.
+    """
+    heads, bases = {}, {}
+    for line in _git_output(txn_dir, 'for-each-ref', '--format=%(objectname) %(refname)',
+                            'refs/heads', 'refs/txn-base/heads').splitlines():
+        sha, ref = line.split(' ', 1)
+        if ref.startswith('refs/heads/'):
+            heads[ref[len('refs/heads/'):]] = sha
+        else:
+            bases[ref[len('refs/txn-base/heads/'):]] = sha
+
+    changed = []
+    try:
+        moved = sorted(branch for branch, sha in heads.items() if bases.get(branch) != sha)
+
+        def contains(b, a):
+            # b's head contains a's; of two branches on one commit, the one that
+            # existed before the transaction (else the first by name) is the base
+            if heads[a] == heads[b]:
+                return (a in bases, b) > (b in bases, a)
+            return _is_ancestor(txn_dir, heads[a], heads[b])
+
+        contained = {b: {a for a in moved if a != b and contains(b, a)} for b in moved}
+        base_args = ['--glob=refs/txn-base/heads/*']
+        for branch, other in itertools.combinations(moved, 2):
+            if branch in contained[other] or other in contained[branch]:
+                continue
+            # commits of this run both heads reach, beyond heads they both contain
+            merge_base = run_command(['git', 'merge-base', heads[branch], heads[other]], cwd=txn_dir).stdout.strip()
+            if merge_base and _git_output(txn_dir, 'rev-list', '-n', '1', merge_base, '--not', *base_args,
+                                          *[heads[a] for a in contained[branch] & contained[other]]):
+                raise ValueError(f"{branch} and {other} share commits of this transaction, but neither was created "
+                                 f"from the other's head; their squashed commits cannot keep that history")
+        # the nearest changed branch each one was created from
+        base_of = {}
+        for branch in moved:
+            base = max(contained[branch], key=lambda a: len(contained[a]), default=None)
+            if base and contained[branch] - {base} - contained[base]:
+                raise ValueError(f"{branch} contains the heads of {', '.join(sorted(contained[branch]))}, "
+                                 f"which are not on one line of history")
+            base_of[branch] = base
+
+        squashed = {}
+        # a base contains fewer changed heads than the branches built on it
+        for branch in sorted(moved, key=lambda b: (len(contained[b]), b)):
+            sha, base = heads[branch], base_of[branch]
+            commits = _git_output(txn_dir, 'rev-list', '--reverse', sha, '--not', *base_args,
+                                  *([heads[base]] if base else [])).split()
+            if base:
+                parent = squashed[base]
+            elif commits:
+                parent = _git_output(txn_dir, 'rev-parse', f'{commits[0]}^')
+            else:
+                parent = None
+            if not commits:
+                # created from `base` without commits of its own
+                new_sha = parent
+            elif len(commits) > 1 or (base and parent != heads[base]):
+                messages = [_git_output(txn_dir, 'log', '-1', '--format=%B', c) for c in commits]
+                new_sha = _git_output(txn_dir, 'commit-tree', f'{sha}^{{tree}}', '-p', parent, '-F', '-',
+                                      input="\n\n".join(messages) + "\n")
+            else:
+                new_sha = sha
+            if new_sha and new_sha != sha:
+                run_command(['git', 'update-ref', f'refs/heads/{branch}', new_sha, sha], cwd=txn_dir, check=True)
+            squashed[branch] = new_sha or sha
+        changed = moved
+
+        if not changed:
+            print("Nothing to push - no branch changed in this run")
+            return changed
+        print(f"Pushing {', '.join(changed)} atomically")
+        try:
+            run_command(['git', 'push', '--atomic', '--quiet', url,
+                         *[f'refs/heads/{b}:refs/heads/{b}' for b in changed]],
+                        cwd=txn_dir, check=True, timeout=timeout)
+        finally:
+            invalidate_remote_refs(url)
+    except Exception as e:
+        print(f"Error occured while pushing the promotion transaction: {describe_error(e)}")
+        raise
+    return changed
+
+
+def changed_paths(repo_dir, old_rev, new_rev, folder):
+    """
+    Paths under `folder` that differ between two commits, from one
+    `git diff --name-only`. Rename detection is off so only trees are read.
+    """
+    output = _git_output(repo_dir, 'diff', '--name-only', '--no-renames', '-z', old_rev, new_rev,
+                         '--', f"{folder.rstrip('/')}/")
+    return [path for path in output.split('\0') if path]
+
+
+def list_tree_entries(repo_dir, tree):
+    """Entries of one tree object as (mode, type, sha, name), not recursive."""
+    listing = run_command(['git', 'ls-tree', '-z', tree], cwd=repo_dir, check=True).stdout
+    entries = []
+    for entry in filter(None, listing.split('\0')):
+        meta, name = entry.split('\t', 1)
+        mode, object_type, sha = meta.split()
+        entries.append((mode, object_type, sha, name))
+    return entries
+
+
+def make_tree(repo_dir, entries):
+    """Write a tree object from (mode, type, sha, name) entries and return its sha."""
+    listing = ''.join(f"{mode} {object_type} {sha}\t{name}\0" for mode, object_type, sha, name in entries)
+    return _git_output(repo_dir, 'mktree', '-z', input=listing)
+
+
+def hash_blob(repo_dir, content):
+    return _git_output(repo_dir, 'hash-object', '-w', '--stdin', input=content)
+
+
+def create_branch_from_base(url, base_branch, new_branch, commit_message, rewrite_tree, work_dir):
+    """
+    Create `new_branch` on `url` from the tip of `base_branch` without a
+    working tree. Only the trees of the base commit are fetched into a bare
+    repo at `work_dir`; rewrite_tree(work_dir, root_tree) returns the tree of
+    the new commit, which is committed on top of the base and pushed as the
+    new branch. Returns the new commit.
+    """
+    txn_repo = get_transaction_repo(url)
+    try:
+        isDirClean(work_dir)
+        run_command(['git', 'init', '--bare', '--quiet', work_dir], check=True)
+        object_store = txn_repo or refresh_mirror(url)
+        if object_store:
+            with open(os.path.join(work_dir, 'objects', 'info', 'alternates'), 'w') as f:
+                f.write(os.path.join(object_store, 'objects') + "\n")
+        run_command(['git', 'remote', 'add', 'origin', txn_repo or url], cwd=work_dir, check=True)
+        run_command(['git', 'config', 'remote.origin.promisor', 'true'], cwd=work_dir, check=True)
+        run_command(['git', 'config', 'remote.origin.partialclonefilter', 'blob:none'], cwd=work_dir, check=True)
+        run_command(
+            ['git', 'fetch', '--quiet', '--depth', '1', '--filter=blob:none', 'origin',
+             f'+refs/heads/{base_branch}:refs/heads/{base_branch}'],
+            cwd=work_dir, check=True, timeout=120, host=host_of([url])
+        )
+        base = _git_output(work_dir, 'rev-parse', f'refs/heads/{base_branch}')
+        tree = rewrite_tree(work_dir, _git_output(work_dir, 'rev-parse', f'{base}^{{tree}}'))
+        commit = _git_output(work_dir, 'commit-tree', tree, '-p', base, '-F', '-', input=commit_message + "\n")
+        try:
+            run_command(['git', 'push', '--quiet', 'origin', f'{commit}:refs/heads/{new_branch}'],
+                        cwd=work_dir, check=True, timeout=120, host=host_of([url]))
+        finally:
+            invalidate_remote_refs(url)
+    except Exception as e:
+        print(f"Error occured while creating {new_branch} from {base_branch}: {describe_error(e)}")
+        raise
+    return commit
+
+
+def is_shallow(repo_dir):
+    return run_command(['git', 'rev-parse', '--is-shallow-repository'], cwd=repo_dir).stdout.strip() == "true"
+
+
+def pull_rebase(repo_dir, branch, timeout=30, host=None):
+    """
+    `git pull --rebase origin <branch>`. A shallow clone may not have the
+    merge base with the remote tip; it is unshallowed and the pull retried.
+    """
+    try:
+        run_command(['git', 'pull', '--rebase', 'origin', branch], cwd=repo_dir, check=True, timeout=timeout, host=host)
+    except subprocess.CalledProcessError:
+        if not is_shallow(repo_dir):
+            raise
+        print(f"Rebase failed in shallow clone {repo_dir}, fetching full history of {branch}")
+        run_command(['git', 'rebase', '--abort'], cwd=repo_dir)
+        run_command(['git', 'fetch', '--quiet', '--unshallow', 'origin', branch], cwd=repo_dir, check=True,
+                    timeout=MIRROR_FETCH_TIMEOUT, host=host)
+        run_command(['git', 'pull', '--rebase', 'origin', branch], cwd=repo_dir, check=True, timeout=timeout, host=host)
+
+
+def commit_paths(repo_dir, paths, commit_message, timeout=30):
+    """
+    Commit only `paths` (files or directories, absolute or relative to
+    `repo_dir`) through the index: update-index, write-tree, commit-tree and
+    update-ref, so the cost follows the number of paths rather than the size
+    of the checkout. Files deleted under a listed directory, or a listed
+    path deleted altogether, are removed. Entries outside a sparse
+    checkout's cone (skip-worktree) are never touched, although they are
+    absent from disk. Returns the new commit, or None when the tree did not change.
+    """
+    entries = []
+    skipped = set()
+    for path in paths:
+        rel_path = os.path.relpath(os.path.join(repo_dir, path), repo_dir)
+        full_path = os.path.join(repo_dir, rel_path)
+        if os.path.isdir(full_path) or not os.path.exists(full_path):
+            # tracked entries under the path, tagged S when skip-worktree
+            for line in _git_output(repo_dir, 'ls-files', '-t', '-z', '--', rel_path).split('\0'):
+                if not line:
+                    continue
+                tag, entry = line.split(' ', 1)
+                (skipped.add if tag == 'S' else entries.append)(entry)
+            entries.extend(os.path.relpath(os.path.join(root, f), repo_dir)
+                           for root, _, files in os.walk(full_path) for f in files)
+        else:
+            entries.append(rel_path)
+    entries = [e for e in dict.fromkeys(e.replace(os.sep, '/') for e in entries if e) if e not in skipped]
+
+    if entries:
+        run_command(['git', 'update-index', '--add', '--remove', '-z', '--stdin'], cwd=repo_dir, check=True,
+                    timeout=timeout, input='\0'.join(entries) + '\0')
+    tree = _git_output(repo_dir, 'write-tree')
+    head = _git_output(repo_dir, 'rev-parse', 'HEAD')
+    if tree == _git_output(repo_dir, 'rev-parse', 'HEAD^{tree}'):
+        return None
+    commit = _git_output(repo_dir, 'commit-tree', tree, '-p', head, '-F', '-', input=commit_message + "\n")
+    run_command(['git', 'update-ref', '-m', f'commit: {commit_message}', 'HEAD', commit, head],
+                cwd=repo_dir, check=True, timeout=timeout)
+    return commit
+
+
+def stage_commit_and_push(url, push_dir, to_branch, commit_message, rebase=False, paths=None):
+    """
+    Commit and push `push_dir` to `to_branch`. With `paths` only those files
+    and directories are committed (see commit_paths) instead of `git add .`.
+    Inside a transaction the push lands in the transaction repo, not on the remote.
+    """
+    try:
+        if paths is None:
+            run_command(['git', 'add', '.'], cwd=push_dir, check=True, timeout=30)
+            run_command(['git', 'commit', '-m', commit_message], cwd=push_dir, check=True, timeout=30)
+        elif not commit_paths(push_dir, paths, commit_message):
+            print("No changes to commit - files haven't changed")
+            return False
+        run_command(['git', 'remote', 'set-url', 'origin', get_transaction_repo(url) or url], cwd=push_dir, check=True)
         if rebase:
-            subprocess.run(['git', 'pull', '--rebase', 'origin', to_branch], cwd=push_dir, check=True, timeout=30)
-        subprocess.run(['git', 'push', 'origin', to_branch], cwd=push_dir, check=True, timeout=30)
+            pull_rebase(push_dir, to_branch, host=host_of([url]))
+        try:
+            run_command(['git', 'push', 'origin', to_branch], cwd=push_dir, check=True, timeout=30, host=host_of([url]))
+        finally:
+            invalidate_remote_refs(url)
     except subprocess.CalledProcessError as e:
         if e.cmd and 'git' in ' '.join(e.cmd).lower():
             cmd_name = ' '.join(e.cmd[-2:])
             if 'commit' in cmd_name:
                 print("No changes to commit - files haven't changed")
             elif 'push' in cmd_name:
-                print(f"Push failed: {e.stderr or 'Remote rejected changes'}")
-                print(f"   Branch: {to_branch}, Remote: {url}")
+                print(f"Push failed: {redact_urls(e.stderr or 'Remote rejected changes')}")
+                print(f"   Branch: {to_branch}, Remote: {redact_url(url)}")
             elif 'add' in cmd_name:
                 print("Git add failed - check if files exist in directory")
             else:
                 print(f"Git command failed: {cmd_name}")
-                print(f"   Error: {e.stderr or e.output or 'Unknown error'}")
+                print(f"   Error: {redact_urls(e.stderr or e.output or 'Unknown error')}")
         else:
-            print(f"Subprocess error: {e}")
+            print(f"Subprocess error: {describe_error(e)}")
         return False
\ No newline at end of file
@@ -21,6 +21,19 @@ def tokenize_url(git_repo_url):
     raise ValueError("Unsupported repository_url format. Must start with https://")
 
 
+def redact_url(git_repo_url):
+    """Strip any user:token@ credentials so the URL is safe to log or use as a key."""
+    parts = urllib.parse.urlsplit(git_repo_url)
+    if parts.scheme and "@" in parts.netloc:
+        return urllib.parse.urlunsplit(parts._replace(netloc=parts.netloc.rsplit("@", 1)[1]))
+    return git_repo_url
+
+
+def redact_urls(text):
+    """redact_url() applied to every URL in `text` (e.g. a git command or its stderr)."""
+    return re.sub(r"[A-Za-z][A-Za-z0-9+.-]*://[^\s'\"]+", lambda m: redact_url(m.group(0)), text)
+
+
 def extract_hyperlink_path(hyperlink_formula):
     """
     Extracts the file path from an Excel HYPERLINK formula.
@@ -1,48 +1,136 @@
 import os
-import yaml
 import json
+from concurrent.futures import ProcessPoolExecutor
+
+from utilities import yaml_codec, parse_cache
+from utilities.repo_layout import find_env_paths, get_env_paths, makedirs
+from utilities.yaml_patch import patch_yaml
+
+# Folder loads fan out over a process pool unless YAML_PARALLEL=0; folders
+# with fewer files than YAML_PARALLEL_MIN_FILES are not worth the pool start-up.
+YAML_PARALLEL = os.getenv("YAML_PARALLEL", "1") != "0"
+YAML_PARALLEL_MIN_FILES = int(os.getenv("YAML_PARALLEL_MIN_FILES", "32"))
+# config-<env>.json snapshots in the x-1 worktrees are never committed; they
+# are only written (compact) with SCRATCH_JSON_SNAPSHOTS=1, for debugging.
+SCRATCH_JSON_SNAPSHOTS = os.getenv("SCRATCH_JSON_SNAPSHOTS", "0") == "1"
 
 
 def fetch_json(target_folder, env):
-    json_path = ''
-    foldername = f"{env}-values"
-    for root, folders, files in os.walk(target_folder):
-        if foldername in folders:
-            lower_env_path = os.path.join(root, foldername, 'app-values')
-            for filename in os.listdir(lower_env_path):
-                if filename == f"config-{env}.json":
-                    json_path = os.path.join(lower_env_path, filename)
-                    break
-            if not json_path:
-                json_path = os.path.join(lower_env_path, f"config-{env}.json")
-                with open(json_path, 'w') as f:
-                    json.dump({}, f)
-            break
+    env_paths = find_env_paths(target_folder, env)
+    if env_paths is None:
+        return ''
+
+    json_path = os.path.join(env_paths.app_values, f"config-{env}.json")
+    if not os.path.exists(json_path):
+        with open(json_path, 'w') as f:
+            json.dump({}, f)
  
     return json_path
 
 
-def get_json_data_for_env(target_folder, env):
-    lower_env_x_1_json_path = fetch_json(target_folder, env)
-    lower_env_path = os.path.dirname(lower_env_x_1_json_path)
-    json_data = read_yaml_files_to_json(lower_env_path)
+def get_json_data_for_env(target_folder, env, rev=None, reader=None, only=None, snapshot=True, compact=False):
+    """
+    Parsed app-values of `env`, from the checkout or from `rev` through
+    `reader`. With `snapshot`, the result is also written to
+    app-values/config-<env>.json (see write_json_snapshot), unless only part
+    of the env was read or its folder is not checked out.
+    """
+    if rev is None:
+        json_data = read_yaml_files_to_json(get_env_paths(target_folder, env).app_values, parallel=YAML_PARALLEL)
+    else:
+        json_data = read_yaml_tree_to_json(reader, rev, f"helm-charts/{env}-values/app-values", only=only)
 
-    with open(lower_env_x_1_json_path, 'w') as file:
-        json.dump(json_data, file, indent=4)
+    env_paths = find_env_paths(target_folder, env)
+    if snapshot and only is None and env_paths is not None:
+        write_json_snapshot(json_data, os.path.join(env_paths.app_values, f"config-{env}.json"), compact=compact)
 
     return json_data
 
 
-def read_yaml_files_to_json(folder_path):
+def write_json_snapshot(json_data, output_file, compact=False):
+    """
+    Write `json_data` to `output_file` with indent=4, or without whitespace
+    when `compact`. A file that already holds the same bytes is left alone so
+    it shows no git diff. Returns True when the file was written.
+    """
+    if compact:
+        content = json.dumps(json_data, separators=(',', ':')).encode()
+    else:
+        content = json.dumps(json_data, indent=4).encode()
+    return write_if_changed(output_file, content)
+
+
+def write_if_changed(file_path, content):
+    """Write `content` (bytes) unless `file_path` already holds exactly that. Returns True when written."""
+    try:
+        if os.path.getsize(file_path) == len(content):
+            with open(file_path, 'rb') as f:
+                if f.read() == content:
+                    return False
+    except FileNotFoundError:
+        pass
+    with open(file_path, 'wb') as f:
+        f.write(content)
+    return True
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def load_yaml_file(yaml_file_path):
+    with open(yaml_file_path, 'rb') as f:
+        return parse_cache.load_yaml_bytes(f.read())
+
+
+def read_yaml_files_to_json(folder_path, parallel=False, workers=None):
+    """
+    {root object: parsed YAML} for every .yaml/.yml file in `folder_path`.
+    With parallel=True the files are parsed in a process pool of `workers`
+    (default: the usable cores), handed out in chunks; keys keep the same
+    order as a serial read.
+    """
+    filenames = [f for f in os.listdir(folder_path) if f.endswith('.yaml') or f.endswith('.yml')]
+    paths = [os.path.join(folder_path, filename) for filename in filenames]
+    workers = min(workers or available_cpus(), len(paths))
+
+    if parallel and workers > 1 and len(paths) >= YAML_PARALLEL_MIN_FILES:
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            contents = list(executor.map(load_yaml_file, paths, chunksize=chunksize))
+        # the workers wrote any new cache entries; trim the cache from here
+        parse_cache.schedule_eviction()
+    else:
+        contents = [load_yaml_file(path) for path in paths]
+
     json_data = {}
- 
-    for filename in os.listdir(folder_path):
+    for filename, yaml_content in zip(filenames, contents):
+        root_object = os.path.splitext(filename)[0]
+        json_data[root_object] = yaml_content
+    return json_data
+
+
+def read_yaml_tree_to_json(reader, rev, folder_path, only=None):
+    """
+    Same result as read_yaml_files_to_json, but read from the git object
+    store at `rev` through a GitBlobReader instead of a checked-out folder.
+    With `only`, just those root objects are parsed. Blobs already in the
+    parse cache are not read at all.
+    """
+    json_data = {}
+
+    for filename, blob_sha in reader.list_tree(rev, folder_path):
         if filename.endswith('.yaml') or filename.endswith('.yml'):
-            yaml_file_path = os.path.join(folder_path, filename)
-            with open(yaml_file_path, 'r') as f:
-                yaml_content = yaml.safe_load(f)
-                root_object = os.path.splitext(filename)[0]
-                json_data[root_object] = yaml_content
+            root_object = os.path.splitext(filename)[0]
+            if only is not None and root_object not in only:
+                continue
+            hit, yaml_content = parse_cache.get(blob_sha)
+            if not hit:
+                yaml_content = parse_cache.parse_and_store(reader.read(blob_sha), blob_sha)
+            json_data[root_object] = yaml_content
     return json_data
 
 
@@ -53,37 +141,69 @@ def dump_and_replace(json_obj, lower_env, higher_env):
     return json_str
 
 
-def prepare_data(target_folder, env):
-    data = get_json_data_for_env(target_folder, env)
+def prepare_data(target_folder, env, rev=None, reader=None, only=None, snapshot=True, compact=False):
+    data = get_json_data_for_env(target_folder, env, rev=rev, reader=reader, only=only, snapshot=snapshot, compact=compact)
     return data
 
 
-def save_json_to_file(json_data, output_file):
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, 'w') as f:
-        json.dump(json_data, f, indent=4)
+def save_json_to_file(json_data, output_file, compact=False):
+    makedirs(os.path.dirname(output_file))
+    return write_json_snapshot(json_data, output_file, compact=compact)
 
 
-def process_json_data(data):
-    if isinstance(data, list):
-        return [process_json_data(item) for item in data]
-    elif isinstance(data, dict):
-        return {key: process_json_data(value) for key, value in data.items()}
-    return data
+def to_json_types(data):
+    """`data` as it reads back from config-<env>.json: non-string keys become strings."""
+    return json.loads(json.dumps(data))
+
+
+def write_yaml_files(json_data, output_folder, postprocess=None, dumper=None, sources=None):
+    """
+    Write every root object of `json_data` to `output_folder`/<root>.yaml.
+    Each document is dumped once (with `dumper` when given), passed through
+    `postprocess(text)` when given, and only written when the bytes differ
+    from the file on disk. A root object with an entry in `sources`
+    ({root: (YAML text it was read from, key paths changed since)}) is
+    patched from that text instead where yaml_patch.patch_yaml can, so its
+    untouched bytes stay as they were. Returns the paths that were written.
+    """
+    makedirs(output_folder)
+    written = []
+    sources = sources or {}
+
+    for root_object, data in json_data.items():
+        yaml_file_path = os.path.join(output_folder, f"{root_object}.yaml")
+        content = None
+        if root_object in sources:
+            text, key_paths = sources[root_object]
+            content = patch_yaml(text, data, key_paths, dumper=dumper)
+        if content is None:
+            content = yaml_codec.dump(data, dumper=dumper, default_flow_style=False, sort_keys=False)
+        if postprocess:
+            content = postprocess(content)
+        if write_if_changed(yaml_file_path, content.encode()):
+            written.append(yaml_file_path)
+    return written
+
+
+def read_yaml_sources(folder_path, changed_paths):
+    """
+    write_yaml_files `sources` for the <root>.yaml files in `folder_path`:
+    their text and the key paths of `changed_paths` ({root: [key path, ...]}).
+    """
+    sources = {}
+    for filename in os.listdir(folder_path):
+        if filename.endswith('.yaml'):
+            root_object = filename[:-len('.yaml')]
+            with open(os.path.join(folder_path, filename), 'rb') as f:
+                sources[root_object] = (f.read().decode(), changed_paths.get(root_object, []))
+    return sources
 
 
 def create_yaml_files_from_json(updated_output_file, output_folder):
     with open(updated_output_file, 'r') as json_file:
         json_data = json.load(json_file)
  
-    os.makedirs(output_folder, exist_ok=True)
- 
-    for root_object, data in json_data.items():
-        yaml_file_path = os.path.join(output_folder, f"{root_object}.yaml")
-        processed_data = process_json_data(data)
- 
-        with open(yaml_file_path, 'w') as yaml_file:
-            yaml.dump(processed_data, yaml_file, default_flow_style=False, sort_keys=False)
+    return write_yaml_files(json_data, output_folder)
 
 
 def try_parse_json(value):
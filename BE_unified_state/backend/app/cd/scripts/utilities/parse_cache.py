@@ -0,0 +1,126 @@
+import os
+import atexit
+import pickle
+import hashlib
+
+from utilities import yaml_codec
+
+# Parsed YAML documents keyed by the git blob SHA of their bytes, so a file on
+# disk and the same blob read from the object store share one entry. Set
+# YAML_PARSE_CACHE_DIR to an empty string to disable the cache.
+CACHE_DIR = os.getenv("YAML_PARSE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "yaml-parse-cache"))
+# Entry layout version: bump it when what is pickled changes, so entries of
+# the old layout are never read (they age out through evict())
+CACHE_VERSION = "2"
+# Least recently used entries are evicted once the cache outgrows this many bytes
+CACHE_MAX_BYTES = int(os.getenv("YAML_PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+_stats = {"hits": 0, "misses": 0}
+_eviction_scheduled = False
+
+
+def blob_sha(data):
+    """The SHA git gives `data` as a blob (what ls-tree prints)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def get_entry_path(sha):
+    return os.path.join(CACHE_DIR, f"v{CACHE_VERSION}", sha[:2], f"{sha[2:]}.pickle")
+
+
+def get(sha):
+    """(True, parsed document) when `sha` is cached, else (False, None). A hit refreshes the entry's mtime."""
+    if not CACHE_DIR:
+        return False, None
+    path = get_entry_path(sha)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        os.utime(path)
+    except FileNotFoundError:
+        _stats["misses"] += 1
+        return False, None
+    except Exception as e:
+        print(f"Ignoring unreadable parse cache entry {path}: {e}")
+        _stats["misses"] += 1
+        return False, None
+    _stats["hits"] += 1
+    return True, value
+
+
+def put(sha, value):
+    """Store `value` under `sha`; written to a temp file and renamed so readers never see half an entry."""
+    if not CACHE_DIR:
+        return
+    path = get_entry_path(sha)
+    partial_path = f"{path}.{os.getpid()}.partial"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(partial_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial_path, path)
+    except OSError as e:
+        print(f"Could not write parse cache entry {path}: {e}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def parse_and_store(data, sha):
+    """Parse YAML `data` (bytes) and cache the result under `sha`."""
+    value = yaml_codec.load(data)
+    put(sha, value)
+    schedule_eviction()
+    return value
+
+
+def load_yaml_bytes(data):
+    """Parse YAML `data` (bytes), or return the cached result for the same bytes."""
+    sha = blob_sha(data)
+    hit, value = get(sha)
+    return value if hit else parse_and_store(data, sha)
+
+
+def evict(max_bytes=None):
+    """
+    Delete least recently used entries until the cache fits in `max_bytes`
+    (CACHE_MAX_BYTES by default). Returns the number of entries removed.
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not CACHE_DIR or not os.path.isdir(CACHE_DIR):
+        return 0
+    entries = []
+    total = 0
+    for root, _, files in os.walk(CACHE_DIR):
+        for name in files:
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def schedule_eviction():
+    """Run evict() once when this process exits, however many entries it wrote."""
+    global _eviction_scheduled
+    if CACHE_DIR and not _eviction_scheduled:
+        _eviction_scheduled = True
+        atexit.register(evict)
+
+
+def stats():
+    return dict(_stats)
@@ -0,0 +1,75 @@
+import os
+from collections import namedtuple
+
+# Where an environment's files live inside a promotion repo checkout
+EnvPaths = namedtuple('EnvPaths', ['values', 'app_values', 'release_note', 'infra_values'])
+
+# Folders that never contain env folders; not descended into while indexing
+_SKIP_DIRS = {'.git', 'release_note'}
+
+_layouts = {}
+
+
+def make_env_paths(values_dir):
+    app_values = os.path.join(values_dir, 'app-values')
+    return EnvPaths(
+        values=values_dir,
+        app_values=app_values,
+        release_note=os.path.join(app_values, 'release_note'),
+        infra_values=os.path.join(values_dir, 'infra-values'),
+    )
+
+
+def build_layout(repo_root):
+    """
+    {env: EnvPaths} for every `<env>-values` folder under `repo_root`.
+    Like the os.walk it replaces, the first folder found for an env wins;
+    .git, release notes and the env folders themselves are not descended into.
+    """
+    layout = {}
+    for root, folders, _ in os.walk(repo_root):
+        for folder in folders:
+            if folder.endswith('-values'):
+                layout.setdefault(folder[:-len('-values')], make_env_paths(os.path.join(root, folder)))
+        folders[:] = [f for f in folders if f not in _SKIP_DIRS and not f.endswith('-values')]
+    return layout
+
+
+def find_env_paths(repo_root, env):
+    """
+    EnvPaths of `env` in the checkout at `repo_root`, or None when it has no
+    such folder. The index is built on first use and answers misses too; it
+    is rebuilt when a folder it found has gone, and otherwise only after
+    invalidate() (see makedirs, and the clone helpers in git_helpers).
+    """
+    key = os.path.abspath(repo_root)
+    layout = _layouts.get(key)
+    env_paths = layout.get(env) if layout is not None else None
+    if layout is None or (env_paths is not None and not os.path.isdir(env_paths.values)):
+        _layouts[key] = build_layout(key)
+        env_paths = _layouts[key].get(env)
+    return env_paths
+
+
+def get_env_paths(repo_root, env):
+    """Same as find_env_paths, falling back to helm-charts/<env>-values for folders not created yet."""
+    return find_env_paths(repo_root, env) or \
+        make_env_paths(os.path.join(os.path.abspath(repo_root), 'helm-charts', f'{env}-values'))
+
+
+def invalidate(path=None):
+    """Forget the index of every checkout at, inside or containing `path`, or of every checkout."""
+    if path is None:
+        _layouts.clear()
+        return
+    path = os.path.abspath(path)
+    for key in list(_layouts):
+        if path == key or path.startswith(key + os.sep) or key.startswith(path + os.sep):
+            del _layouts[key]
+
+
+def makedirs(path):
+    """os.makedirs(path, exist_ok=True), invalidating the checkouts it adds folders to."""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        invalidate(path)
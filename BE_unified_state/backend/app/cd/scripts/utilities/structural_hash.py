@@ -0,0 +1,56 @@
+from hashlib import blake2b
+
+_SIZE = 16
+
+
+def _hash(data):
+    return blake2b(data, digest_size=_SIZE).digest()
+
+
+def _scalar_digest(value):
+    # type-tagged, so equal digests mean equal values (1, 1.0 and True differ)
+    if value is None:
+        return _hash(b'n')
+    if isinstance(value, bool):
+        return _hash(b'b1' if value else b'b0')
+    if isinstance(value, int):
+        return _hash(b'i' + str(value).encode())
+    if isinstance(value, float):
+        return _hash(b'f' + repr(value).encode())
+    if isinstance(value, str):
+        return _hash(b's' + value.encode('utf-8', 'surrogatepass'))
+    return _hash(f"o{type(value).__qualname__}:{value!r}".encode('utf-8', 'surrogatepass'))
+
+
+def digest(value, memo=None):
+    """
+    Structural digest of a parsed YAML/JSON value. Two values with the same
+    digest are equal; dicts hash independently of key order, as they compare.
+
+    `memo` maps id() of each dict and list to (node, digest) and is filled
+    as nodes are hashed, so hashing a subtree again is O(1). It holds the
+    nodes (their ids are not reused) and describes them as they were when
+    hashed: keep one memo per comparison, while the documents do not change.
+    """
+    if not isinstance(value, (dict, list)):
+        return _scalar_digest(value)
+    if memo is None:
+        memo = {}
+    hit = memo.get(id(value))
+    if hit is not None:
+        return hit[1]
+    if isinstance(value, dict):
+        pairs = sorted(_hash(b'p' + digest(k, memo) + digest(v, memo)) for k, v in value.items())
+        result = _hash(b'd' + b''.join(pairs))
+    else:
+        result = _hash(b'l' + b''.join(digest(item, memo) for item in value))
+    memo[id(value)] = (value, result)
+    return result
+
+
+def same(*values, memo=None):
+    """True when all `values` are structurally equal, judged by digest."""
+    if memo is None:
+        memo = {}
+    first = digest(values[0], memo)
+    return all(digest(value, memo) == first for value in values[1:])
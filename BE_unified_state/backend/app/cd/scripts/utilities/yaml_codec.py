@@ -0,0 +1,95 @@
+import re
+import yaml
+
+# libyaml's C parser when PyYAML was built with it, the pure Python one
+# otherwise; both resolve the same safe tag set. Dumping stays on the pure
+# Python SafeDumper: libyaml's emitter folds long non-ASCII strings and quotes
+# empty keys differently, so its text is not the same as yaml.dump's.
+from yaml import SafeDumper as Dumper
+try:
+    from yaml import CSafeLoader as Loader
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as Loader
+    LIBYAML = False
+
+
+def load(stream):
+    """
+    yaml.safe_load through the fastest available loader. libyaml is stricter
+    than the Python scanner in a few corners, so a document it rejects is
+    parsed again with SafeLoader before the error is raised.
+    """
+    try:
+        return yaml.load(stream, Loader=Loader)
+    except yaml.YAMLError:
+        if not LIBYAML:
+            raise
+        if hasattr(stream, 'seek'):
+            stream.seek(0)
+        return yaml.load(stream, Loader=yaml.SafeLoader)
+
+
+def dump(data, stream=None, dumper=None, **kwargs):
+    """yaml.safe_dump through SafeDumper (or `dumper`); takes the same keyword arguments."""
+    return yaml.dump(data, stream, Dumper=dumper or Dumper, **kwargs)
+
+
+# Strings PyYAML writes plain but helm reads as a number or a bool
+_AMBIGUOUS_VALUE = re.compile(r'0[0-9]+|[A-Z]')
+_STR_TAG = 'tag:yaml.org,2002:str'
+
+
+class HelmValuesDumper(yaml.SafeDumper):
+    """
+    SafeDumper that double-quotes `value: 08` style scalars (a leading zero,
+    or a single capital letter) while dumping. It quotes the mapping values
+    that generate-config's former
+    `sed -E 's/([[:space:]]+value:[[:space:]]*)(0[0-9]+|[A-Z])([[:space:]]*$)/...'`
+    pass over yaml.dump's text quoted: a key matches when whitespace precedes
+    `value:` on its line, i.e. a key `value` anywhere but the top-level
+    mapping, or any key ending in ` value`. Unlike sed it works on nodes, not
+    lines, so it deliberately leaves alone a line of a multi-line quoted
+    string that happens to read ` value: A`; sed rewrote the string there.
+    """
+
+    def represent(self, data):
+        node = self.represent_data(data)
+        self._quote_ambiguous_values(node, top_level=True)
+        self.serialize(node)
+        self.represented_objects = {}
+        self.object_keeper = []
+        self.alias_key = None
+
+    def _quote_ambiguous_values(self, node, top_level=False, seen=None):
+        seen = set() if seen is None else seen
+        if id(node) in seen:
+            return
+        seen.add(id(node))
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                if self._is_value_key(key_node, top_level) and self._is_plain_ambiguous(value_node):
+                    value_node.style = '"'
+                self._quote_ambiguous_values(key_node, seen=seen)
+                self._quote_ambiguous_values(value_node, seen=seen)
+        elif isinstance(node, yaml.SequenceNode):
+            for item in node.value:
+                self._quote_ambiguous_values(item, seen=seen)
+
+    def _is_plain_ambiguous(self, node):
+        # '0777' resolves to an int, so the emitter already single-quotes it
+        return isinstance(node, yaml.ScalarNode) and node.tag == _STR_TAG and node.style is None \
+            and _AMBIGUOUS_VALUE.fullmatch(node.value) is not None \
+            and self.resolve(yaml.ScalarNode, node.value, (True, False)) == _STR_TAG
+
+    def _is_value_key(self, key_node, top_level):
+        # only simple (single-line, < 128 chars) keys share a line with their value
+        if not isinstance(key_node, yaml.ScalarNode) or key_node.tag != _STR_TAG or len(key_node.value) >= 128:
+            return False
+        if not ((key_node.value == 'value' and not top_level) or key_node.value.endswith(' value')):
+            return False
+        # and sed only sees `value:` when the key is written plain, not quoted
+        # (e.g. "caf\xE9 value" is escaped since allow_unicode is off)
+        analysis = self.analyze_scalar(key_node.value)
+        return key_node.style is None and analysis.allow_block_plain and not analysis.multiline \
+            and self.resolve(yaml.ScalarNode, key_node.value, (True, False)) == _STR_TAG
@@ -0,0 +1,166 @@
+import yaml
+from yaml.constructor import SafeConstructor
+
+from utilities import yaml_codec, structural_hash
+
+# Python types a YAML scalar constructs to (safe tag set, as the release note
+# only ever carries JSON values)
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_MERGE_TAG = 'tag:yaml.org,2002:merge'
+# PyYAML's default best_width
+_EMITTER_WIDTH = 80
+
+
+class NotPatchable(Exception):
+    """The change is not a scalar-for-scalar edit of the existing text; dump the document instead."""
+
+
+def patch_yaml(text, new_data, key_paths, dumper=None):
+    """
+    `text` (a YAML document) rewritten to parse to `new_data`, changing only
+    the bytes of the scalars that differ under `key_paths` (lists of keys
+    from the document root, as in the release note's `a//b//c`; [] is the
+    whole document). Everything else, comments and key order included, is
+    kept as it is. Returns None when the edit is more than swapping scalars
+    (keys or list items added or removed, a type changed to or from a
+    map/list, aliases, block scalars...), or when the result does not parse
+    to `new_data` (a change outside `key_paths`); the caller dumps the
+    document then.
+    """
+    if not key_paths:
+        return text if _parses_to(text, new_data) else None
+    try:
+        root = yaml.compose(text, Loader=yaml_codec.Loader)
+        if root is None or ('&' in text and _has_aliases(root)):
+            return None
+        patcher = _Patcher(root, dumper or yaml_codec.Dumper)
+        for key_path in key_paths:
+            node, value, parent = root, new_data, None
+            for key in key_path:
+                if not isinstance(value, dict) or key not in value:
+                    return None
+                node, value, parent = patcher.get_value_node(node, key), value[key], node
+            patcher.diff(node, value, key_path[-1] if key_path else None, top_level=parent is root)
+    except (NotPatchable, yaml.YAMLError):
+        return None
+
+    # back to front, so the earlier offsets stay valid
+    for start, end, replacement in sorted(patcher.edits.values(), reverse=True):
+        text = text[:start] + replacement + text[end:]
+    return text if _parses_to(text, new_data) else None
+
+
+def _parses_to(text, data):
+    # type-strict: 1, 1.0 and True are different values in a values file
+    try:
+        return structural_hash.same(yaml_codec.load(text), data)
+    except yaml.YAMLError:
+        return False
+
+
+def _has_aliases(root):
+    seen = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            return True
+        seen.add(id(node))
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                stack.extend((key_node, value_node))
+        elif isinstance(node, yaml.SequenceNode):
+            stack.extend(node.value)
+    return False
+
+
+class _Patcher:
+
+    def __init__(self, root, dumper):
+        self.root = root
+        self.dumper = dumper
+        self.constructor = SafeConstructor()
+        # {start offset: (start, end, replacement)}; paths may overlap
+        self.edits = {}
+
+    def get_value_node(self, node, key):
+        pairs = self.get_pairs(node)
+        if key not in pairs:
+            raise NotPatchable(key)
+        return pairs[key]
+
+    def get_pairs(self, node):
+        # a scalar rendered for block context may not be valid inside {...}
+        if not isinstance(node, yaml.MappingNode) or node.flow_style:
+            raise NotPatchable(node.tag)
+        pairs = {}
+        for key_node, value_node in node.value:
+            if not isinstance(key_node, yaml.ScalarNode) or key_node.tag == _MERGE_TAG:
+                raise NotPatchable(key_node.tag)
+            key = self.construct(key_node)
+            if key in pairs:
+                raise NotPatchable(f"duplicate key {key}")
+            pairs[key] = value_node
+        return pairs
+
+    def construct(self, node):
+        return self.constructor.construct_object(node, deep=True)
+
+    def diff(self, node, value, key=None, top_level=False):
+        """Record an edit for every scalar under `node` that differs from `value`; `key` is the key `node` is the value of."""
+        if isinstance(value, _SCALAR_TYPES) and isinstance(node, yaml.ScalarNode):
+            current = self.construct(node)
+            if type(current) is not type(value) or current != value:
+                self.replace(node, value, key, top_level)
+        elif isinstance(value, dict) and isinstance(node, yaml.MappingNode):
+            pairs = self.get_pairs(node)
+            if list(pairs) != list(value):
+                raise NotPatchable("keys differ")
+            for k, value_node in pairs.items():
+                self.diff(value_node, value[k], k, top_level=node is self.root)
+        elif isinstance(value, list) and isinstance(node, yaml.SequenceNode) and not node.flow_style:
+            if len(node.value) != len(value):
+                raise NotPatchable("length differs")
+            for item_node, item in zip(node.value, value):
+                self.diff(item_node, item)
+        else:
+            raise NotPatchable(f"{node.tag} -> {type(value).__name__}")
+
+    def replace(self, node, value, key, top_level):
+        # block scalars and multi-line flow scalars carry their indentation;
+        # an empty `key:` has no bytes to replace. libyaml reports plain as ''
+        if node.style not in (None, '', "'", '"') or node.start_mark.line != node.end_mark.line \
+                or node.start_mark.index == node.end_mark.index:
+            raise NotPatchable("not a single-line scalar")
+        replacement = render_scalar(value, key, top_level, self.dumper, column=node.start_mark.column)
+        self.edits[node.start_mark.index] = (node.start_mark.index, node.end_mark.index, replacement)
+
+
+def render_scalar(value, key, top_level, dumper, column=None):
+    """
+    `value` as `dumper` writes it as the value of `key` (an item of a block
+    sequence when `key` is None), nested unless `top_level`, starting at
+    `column` as far as line folding goes. Raises NotPatchable when that takes
+    more than one line.
+    """
+    if key is None:
+        doc = {'_': [value]}
+    elif top_level:
+        doc = {key: value}
+    else:
+        doc = {'_': {key: value}}
+    out, node = _dump_scalar(doc, dumper)
+    if column is not None and node.start_mark.column != column:
+        # the emitter folds at column 80; shift that to where the scalar really starts
+        out, node = _dump_scalar(doc, dumper, width=_EMITTER_WIDTH + node.start_mark.column - column)
+    if node.start_mark.line != node.end_mark.line:
+        raise NotPatchable("multi-line scalar")
+    return out[node.start_mark.index:node.end_mark.index]
+
+
+def _dump_scalar(doc, dumper, width=None):
+    out = yaml_codec.dump(doc, dumper=dumper, default_flow_style=False, sort_keys=False, width=width)
+    node = yaml.compose(out, Loader=yaml_codec.Loader)
+    while not isinstance(node, yaml.ScalarNode):
+        node = node.value[0][1] if isinstance(node, yaml.MappingNode) else node.value[0]
+    return out, node
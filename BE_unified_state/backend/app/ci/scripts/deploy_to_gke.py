@@ -4,6 +4,10 @@ import sys
 import tempfile
 import yaml
 
+# libyaml's C loader when available; same results as safe_load. Dumping keeps
+# safe_dump: the C emitter's text differs on long non-ASCII values and empty keys.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 def run_command(cmd, cwd=None):
     print(f"\n>>> Running Command:\n{cmd}")
     print(f">>> Working Directory: {cwd or os.getcwd()}")
@@ -44,7 +48,7 @@ def update_helm_chart_temp(repo_url, image_repo, image_tag, ns, microservice):
 
         print(f"\n>>> Found YAML file: {yaml_path}")
         with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=YAML_LOADER)
 
         if 'image' not in data or not isinstance(data['image'], dict):
             data['image'] = {}
@@ -183,7 +183,7 @@ def save_to_excel(differences, scaled_resources, output_file):
         df.to_excel(writer, sheet_name="differences", index=False)
         dff.to_excel(writer, sheet_name="scaled_resources", index=False)
  
-def clone_repo(repo_url, branch_name, target_folder):
+def clone_repo(repo_url, branch_name, target_folder, paths=None, depth=None):
     try:
         if os.path.exists(target_folder):
             shutil.rmtree(target_folder)
@@ -200,11 +200,17 @@ def clone_repo(repo_url, branch_name, target_folder):
             repo_url = repo_url.replace("https://", f"https://{github_token}@")
         else:
             raise ValueError("Unsupported repo_url format. Must start with https://")
+    # With paths, fetch blobs lazily and check out only those folders (cone mode)
+    sparse_args = ["--filter=blob:none", "--sparse"] if paths is not None else []
+    # With depth, only the branch tip is fetched: no history, no other branches, no tags
+    depth_args = ["--depth", str(depth), "--single-branch", "--no-tags"] if depth else []
     try:
         subprocess.run(
-            ["git", "clone", "--branch", branch_name, repo_url, target_folder],
+            ["git", "clone", *sparse_args, *depth_args, "--branch", branch_name, repo_url, target_folder],
             check=True
         )
+        if paths:
+            subprocess.run(["git", "sparse-checkout", "set", "--cone", "--", *paths], cwd=target_folder, check=True)
         print(f"Successfully cloned '{branch_name}' branch into '{target_folder}'.")
     except subprocess.CalledProcessError as e:
         print(f"Error cloning the repository: {e}")
@@ -234,10 +240,11 @@ def main():
     target_folder_x_1 = os.path.join(os.getcwd(),"promo_x_1")
     target_folder_x = os.path.join(os.getcwd(),"promo_x")
  
+    infra_paths = [f"helm-charts/{env}-values/infra-values" for env in (lenv, henv)]
      # To Clone the repo from promotion-x-1 branch
-    clone_repo(repo_url, promote_branch_x_1, target_folder_x_1)
+    clone_repo(repo_url, promote_branch_x_1, target_folder_x_1, paths=infra_paths, depth=1)
     # To Clone the repo from promotion-x branch
-    clone_repo(repo_url, promote_branch_x, target_folder_x)
+    clone_repo(repo_url, promote_branch_x, target_folder_x, paths=infra_paths, depth=1)
  
  
     input_excel_1 = os.path.join(target_folder_x_1, "helm-charts", f"{lenv}-values", "infra-values", "dataset", "infra_sheet.xlsx")
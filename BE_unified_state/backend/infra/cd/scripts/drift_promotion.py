@@ -146,7 +146,7 @@ def load_excel_sheets(file_path):
     """Load all sheets from an Excel file into a dictionary."""
     return pd.read_excel(file_path, sheet_name=None,header=0)
  
-def clone_repo(repo_url, branch_name, target_folder):
+def clone_repo(repo_url, branch_name, target_folder, paths=None, depth=None):
     try:
         if os.path.exists(target_folder):
             shutil.rmtree(target_folder)
@@ -162,11 +162,17 @@ def clone_repo(repo_url, branch_name, target_folder):
             repo_url = repo_url.replace("https://", f"https://{github_token}@")
         else:
             raise ValueError("Unsupported repo_url format. Must start with https://")
+    # With paths, fetch blobs lazily and check out only those folders (cone mode)
+    sparse_args = ["--filter=blob:none", "--sparse"] if paths is not None else []
+    # With depth, only the branch tip is fetched: no history, no other branches, no tags
+    depth_args = ["--depth", str(depth), "--single-branch", "--no-tags"] if depth else []
     try:
         subprocess.run(
-            ["git", "clone", "--branch", branch_name, repo_url, target_folder],
+            ["git", "clone", *sparse_args, *depth_args, "--branch", branch_name, repo_url, target_folder],
             check=True
         )
+        if paths:
+            subprocess.run(["git", "sparse-checkout", "set", "--cone", "--", *paths], cwd=target_folder, check=True)
         print(f"Successfully cloned '{branch_name}' branch into '{target_folder}'.")
     except subprocess.CalledProcessError as e:
         print(f"Error cloning the repository: {e}")
@@ -183,8 +189,8 @@ def main():
     # target_folder_x_1 = os.path.join(os.getcwd(),"promo_x_1")
     target_folder_x = os.path.join(os.getcwd(),"promo_x")
     src_folder = os.path.join(os.getcwd(),"src")
-    clone_repo(src_repo, "zdt-application", src_folder)
-    clone_repo(repo_url, promote_branch_x, target_folder_x)
+    clone_repo(src_repo, "zdt-application", src_folder, paths=["backend/infra/cd"], depth=1)
+    clone_repo(repo_url, promote_branch_x, target_folder_x, paths=[f"helm-charts/{henv}-values/infra-values"], depth=1)
  
  
     differences_file = os.path.join(target_folder_x, "helm-charts", f"{henv}-values", "infra-values", "release_note", "infra_difference.xlsx")
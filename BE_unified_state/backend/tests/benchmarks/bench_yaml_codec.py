@@ -0,0 +1,50 @@
+"""
+Micro-benchmark: pure-Python PyYAML loading against utilities/yaml_codec.
+
+Runs on the same values the unit-test fixtures build (three small service
+files and the >32K env-var file). Not collected by pytest; run it directly:
+
+    python tests/benchmarks/bench_yaml_codec.py [repeat]
+"""
+import os
+import sys
+import timeit
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import yaml_codec
+
+
+def fixture_values():
+    small = [
+        {"app": {"name": "admin-app"}, "image": {"image_name": "gcr.io/project/admin:1.0.0-b10-dev1"},
+         "replicas": 2, "resources": {"cpu": "500m", "memory": "512Mi"}},
+        {"app": {"name": "user-app"}, "image": {"image_name": "gcr.io/project/user:2.0.0-b20-dev1"}, "replicas": 3},
+        {"app": {"name": "auth-app"}, "image": {"image_name": "gcr.io/project/auth:3.0.0-b30-dev1"}, "replicas": 1},
+    ]
+    large = {"app": {"name": "large-service"}, "image": {"image_name": "gcr.io/project/large:1.0.0-b1-dev1"},
+             "env": [{"name": f"ENV_VAR_{i:04d}", "value": f"value_{i:04d}_{'x' * 50}"} for i in range(500)]}
+    return small + [large]
+
+
+def bench(label, func, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{label:<28}{best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    values = fixture_values()
+    texts = [yaml.dump(v, default_flow_style=False, sort_keys=False) for v in values]
+    print(f"libyaml available: {yaml_codec.LIBYAML}, {sum(map(len, texts))} bytes of YAML, best of {repeat}")
+
+    pure_load = bench("load  yaml.safe_load", lambda: [yaml.safe_load(t) for t in texts], repeat)
+    fast_load = bench("load  yaml_codec.load", lambda: [yaml_codec.load(t) for t in texts], repeat)
+    # dump() stays on the pure Python SafeDumper, so only loading is compared
+    print(f"speedup: load x{pure_load / fast_load:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Shared fixtures for all test tiers.
 Creates in-memory / tmp_path-based fixtures for Excel, YAML, and JSON test data.
 """
 import os
+import sys
 import json
 import pytest
 import yaml
@@ -248,3 +249,64 @@ def sample_tmpl_dir(tmp_path):
     )
 
     return d
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Git Fixtures
+# ──────────────────────────────────────────────────────────────────────
+
+def _git(cwd, *args):
+    import subprocess
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def git_identity(monkeypatch):
+    """Commit identity for git commands run inside tests."""
+    for var, value in (("GIT_AUTHOR_NAME", "test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+                       ("GIT_COMMITTER_NAME", "test"), ("GIT_COMMITTER_EMAIL", "test@example.com")):
+        monkeypatch.setenv(var, value)
+
+
+@pytest.fixture
+def promotion_remote(tmp_path, git_identity):
+    """
+    Create a bare 'remote' promotion repo with master, release/1.0.0 and
+    release/2.0.0 branches laid out like the real helm-charts repo.
+    """
+    seed = tmp_path / "seed"
+    seed.mkdir()
+    _git(seed, 'init', '--quiet', '-b', 'master')
+    (seed / "meta-sheet.xlsx").write_text("meta")
+    _git(seed, 'add', '.')
+    _git(seed, 'commit', '--quiet', '-m', 'master')
+
+    for branch, replicas in (("release/1.0.0", 2), ("release/2.0.0", 4)):
+        _git(seed, 'checkout', '--quiet', '-b', branch, 'master')
+        for env in ("dev1", "sit1"):
+            d = seed / "helm-charts" / f"{env}-values" / "app-values"
+            d.mkdir(parents=True, exist_ok=True)
+            (d / "service-admin.yaml").write_text(yaml.dump({"app": {"name": "admin-app"}, "replicas": replicas}))
+            (d / "service-user.yaml").write_text(yaml.dump({"app": {"name": "user-app"}, "replicas": 3}))
+        (seed / "helm-charts" / "templates").mkdir(exist_ok=True)
+        (seed / "helm-charts" / "templates" / "deployment.yaml").write_text("kind: Deployment\n")
+        _git(seed, 'add', '.')
+        _git(seed, 'commit', '--quiet', '-m', branch)
+
+    remote = tmp_path / "remote.git"
+    _git(tmp_path, 'clone', '--quiet', '--bare', str(seed), str(remote))
+    return str(remote)
+
+
+# ──────────────────────────────────────────────────────────────────────
+# Cache isolation
+# ──────────────────────────────────────────────────────────────────────
+
+@pytest.fixture(autouse=True)
+def parse_cache_dir(tmp_path, monkeypatch):
+    """Keep the YAML parse cache of every test in its own tmp_path, never in ~/.cache."""
+    parse_cache = sys.modules.get("utilities.parse_cache")
+    if parse_cache is not None:
+        monkeypatch.setattr(parse_cache, "CACHE_DIR", str(tmp_path / "parse-cache"))
+        monkeypatch.setattr(parse_cache, "_eviction_scheduled", True)
+    return tmp_path / "parse-cache"
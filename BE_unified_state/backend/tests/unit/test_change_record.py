@@ -0,0 +1,147 @@
+"""
+Unit tests for change_record.py — release note rows rendered on demand.
+
+Functions tested:
+1. JsonText.render()  — same text as json.dumps(indent=4) / dump_and_replace()
+2. ChangeRecord       — lazy rendering, and interchangeable with the 8-tuple
+"""
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import change_record
+from utilities.change_record import ChangeRecord, JsonText
+from utilities.json_and_yaml_helpers import dump_and_replace
+import utilities.garuda_engine as engine
+
+
+SERVICE = {
+    "app": {"name": "admin-app"},
+    "image": {"image_name": "gcr.io/project/admin:1.0.0-b10-dev1"},
+    "env": [{"name": "DB_HOST", "value": "db-dev1"}],
+}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. JsonText.render() — SAME TEXT AS THE EAGER CALLS
+# ═══════════════════════════════════════════════════════════════════
+
+class TestJsonText:
+    """
+    JsonText(value, envs=None, bracketed=False).render() gives the text
+    compare() used to build with json.dumps / dump_and_replace.
+    """
+
+    @pytest.mark.parametrize("value", [SERVICE, SERVICE["env"], "gcr.io/x:1-dev1", 2, None, True])
+    def test_same_as_json_dumps_and_dump_and_replace(self, value):
+        """
+        SCENARIO: Dicts, lists and scalars, with and without env swapping.
+        WHAT IT TESTS: Byte-identical to the calls JsonText replaces.
+        """
+        assert JsonText(value).render() == json.dumps(value, indent=4)
+        assert JsonText(value, ['dev1', 'sit1']).render() == dump_and_replace(value, 'dev1', 'sit1')
+        assert JsonText(value, bracketed=True).render() == "[" + json.dumps(value, indent=4) + "]"
+
+    def test_value_serialised_once(self, monkeypatch):
+        """
+        SCENARIO: One subtree fills the le_cur and the env-swapped he_cur cell of a record.
+        WHAT IT TESTS: json.dumps runs once for it.
+        """
+        value = {"image": {"image_name": "gcr.io/project/admin:1.0.0-b10-dev1"}}
+        calls = []
+        original = change_record.json.dumps
+        monkeypatch.setattr(change_record.json, "dumps", lambda *a, **kw: calls.append(a) or original(*a, **kw))
+
+        record = ChangeRecord('svc', 'add', 'image', JsonText(value), '', JsonText(value, ['dev1', 'sit1']), '', 'Added')
+        record.as_tuple()
+        assert len(calls) == 1
+
+    def test_no_text_outlives_its_record(self):
+        """
+        SCENARIO: A value is rendered, changed in place, and rendered again
+        by a new JsonText (as in a later run on the same documents).
+        WHAT IT TESTS: The new text reflects the change; no process-wide memo
+        keeps the value alive or serves the old text.
+        """
+        value = {"replicas": 2}
+        record = ChangeRecord('svc', 'modify', 'replicas', JsonText(value), '', JsonText(value), '', 'Modified')
+        assert record.le_cur == json.dumps(value, indent=4)
+        value["replicas"] = 4
+        assert JsonText(value).render() == json.dumps(value, indent=4)
+        record.he_cur
+        assert record._texts is None
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. ChangeRecord — LAZY, TUPLE-COMPATIBLE ROWS
+# ═══════════════════════════════════════════════════════════════════
+
+class TestChangeRecord:
+    """
+    ChangeRecord(service, type, key, le_cur, le_prev, he_cur, he_prev, comment)
+    indexes, iterates, unpacks and compares like the 8-tuple of strings.
+    """
+
+    def _record(self):
+        return ChangeRecord('service-admin', 'add', 'env', JsonText(SERVICE["env"]), '',
+                            JsonText(SERVICE["env"], ['dev1', 'sit1']), '', 'Added')
+
+    def test_behaves_as_tuple(self):
+        """
+        SCENARIO: A record is read the ways release note code reads rows.
+        WHAT IT TESTS: Indexing, slicing, len, unpacking and equality with the tuple.
+        """
+        expected = ('service-admin', 'add', 'env', json.dumps(SERVICE["env"], indent=4), '',
+                    dump_and_replace(SERVICE["env"], 'dev1', 'sit1'), '', 'Added')
+        record = self._record()
+
+        service_name, change_type, key, le_cur, le_prev, he_cur, he_prev, comment = record
+        assert (service_name, change_type, key, le_cur, le_prev, he_cur, he_prev, comment) == expected
+        assert record == expected and expected == record
+        assert [record] == [expected]
+        assert record[3] == expected[3] and record[-3] == expected[-3] and record[1:3] == ('add', 'env')
+        assert len(record) == 8 and hash(record) == hash(expected)
+
+    def test_filtering_does_not_render(self, monkeypatch):
+        """
+        SCENARIO: Rows are filtered on service, type, key and comment only.
+        WHAT IT TESTS: Nothing is serialised until a value cell is read.
+        """
+        record = self._record()
+        monkeypatch.setattr(change_record.json, "dumps", lambda *a, **kw: pytest.fail("rendered"))
+        assert (record[0], record[1], record[2], record[7], record[-1]) == \
+            ('service-admin', 'add', 'env', 'Added', 'Added')
+
+    def test_compare_output_unchanged(self):
+        """
+        SCENARIO: compare() on a modified env entry and an image tag.
+        WHAT IT TESTS: The rows equal the strings the eager engine built.
+        """
+        le_new = json.loads(json.dumps(SERVICE))
+        le_new["env"][0]["value"] = "db2-dev1"
+        le_new["image"]["image_name"] = "gcr.io/project/admin:1.1.0-b15-dev1"
+        changes = []
+        engine.compare(SERVICE, le_new, "service-admin", changes, json.loads(json.dumps(SERVICE)), ['dev1', 'sit1'])
+
+        old_item, new_item = SERVICE["env"][0], le_new["env"][0]
+        assert sorted(map(tuple, changes)) == sorted([
+            ('service-admin', 'modify', 'env', json.dumps(new_item, indent=4), json.dumps(old_item, indent=4),
+             dump_and_replace(new_item, 'dev1', 'sit1'), json.dumps(old_item, indent=4), 'Modified'),
+            ('service-admin', 'modify', 'image', json.dumps(le_new["image"]["image_name"], indent=4),
+             json.dumps(SERVICE["image"]["image_name"], indent=4),
+             dump_and_replace(le_new["image"]["image_name"], 'dev1', 'sit1'),
+             json.dumps(SERVICE["image"]["image_name"], indent=4), 'Modified'),
+        ])
+
+    def test_cell_attributes_render_one_cell(self):
+        """
+        SCENARIO: The he_cur cell is read by attribute.
+        WHAT IT TESTS: Only that cell is rendered; the others stay JsonText.
+        """
+        record = self._record()
+        assert record.he_cur == dump_and_replace(SERVICE["env"], 'dev1', 'sit1')
+        assert isinstance(record.cells[0], JsonText)
+        assert record.le_prev == '' and record.as_tuple()[3] == json.dumps(SERVICE["env"], indent=4)
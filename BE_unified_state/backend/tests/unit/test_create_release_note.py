@@ -9,6 +9,8 @@ This file covers ALL the pure-logic functions in create_release_note.py:
 4. update_image_repo_in_json_string()— transforms image tags inside JSON blobs
 5. touch_helmignore()                — writes .helmignore excluding non-target envs
 6. create_release_note_dir()         — creates/cleans the release note folder
+7. get_changed_services()            — services changed between two promotion branches
+8. get_written_paths()               — paths committed to the promotion branch
 
 Tested scenarios include:
   - Read metasheet from master branch
@@ -23,6 +25,7 @@ Tested scenarios include:
 import json
 import os
 import sys
+import subprocess
 import pytest
 from unittest.mock import patch, MagicMock
 from openpyxl import Workbook, load_workbook
@@ -292,6 +295,36 @@ class TestCompareJsonFiles:
         assert all(c[7] == 'root object added' for c in changes)
         assert len(changes) == 2
 
+    # ── Scenario 14: Scoped to changed services ─────────────────
+    def test_unchanged_services_match_full_compare(self):
+        """
+        SCENARIO: Only service-admin changed between the promotion branches,
+        so le_old holds just service-admin and service-user is passed as
+        unchanged. service-user has a pending addition in the higher env.
+        WHAT IT TESTS: The result is identical to comparing the full trees,
+        pending rows of unchanged services included.
+        """
+        le_old = {
+            "service-admin": {"replicas": 2},
+            "service-user": {"replicas": 3, "cpu": "500m"},
+            "service-gone": {"replicas": 1},
+        }
+        le_new = {
+            "service-admin": {"replicas": 4},
+            "service-user": {"replicas": 3, "cpu": "500m"},
+        }
+        he_old = {
+            "service-admin": {"replicas": 2},
+            "service-user": {"replicas": 3},
+        }
+        full = compare_json_files(le_old, le_new, he_old, ['dev1', 'sit1'])
+        scoped = compare_json_files(
+            {k: le_old[k] for k in ("service-admin", "service-gone")}, le_new, he_old, ['dev1', 'sit1'],
+            unchanged={"service-user"},
+        )
+        assert scoped == full
+        assert any(c[0] == 'service-user' for c in scoped)
+
 
 # ═══════════════════════════════════════════════════════════════════
 # 2. update_image_tag() — IMAGE TAG TRANSFORMATION
@@ -561,6 +594,27 @@ class TestWriteChangesToExcel:
         assert isinstance(val, str)
         assert 'cpu' in val
 
+    def test_large_record_skips_discarded_cells(self, tmp_path):
+        """
+        SCENARIO: A ChangeRecord whose le_cur spills to a .txt file.
+        WHAT IT TESTS: Only le_cur and he_cur are rendered; the previous
+        values, which the spill row leaves empty, never are.
+        """
+        class Cell(crn_module.JsonText):
+            rendered = []
+
+            def render(self, texts=None):
+                Cell.rendered.append(self.value)
+                return super().render(texts)
+
+        service = {"env": [{"name": f"VAR_{i}", "value": "x" * 40} for i in range(800)]}
+        change = crn_module.ChangeRecord('large-svc', 'add', '', Cell(service), Cell({"old": 1}),
+                                         Cell(service, ['dev1', 'sit1']), Cell({"old": 2}), 'root object added')
+        write_changes_to_excel([change], str(tmp_path), ['dev1', 'sit1'])
+
+        assert os.listdir(tmp_path).count('large-svc.txt') == 1
+        assert Cell.rendered == [service, service]
+
 
 # ═══════════════════════════════════════════════════════════════════
 # 5. touch_helmignore() — .HELMIGNORE GENERATION
@@ -652,3 +706,67 @@ class TestCreateReleaseNoteDir:
         d.mkdir()
         create_release_note_dir(str(d))
         assert d.exists()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 7. get_changed_services() — CHANGED-PATH SCOPING
+# ═══════════════════════════════════════════════════════════════════
+
+class TestGetChangedServices:
+    """
+    get_changed_services(repo_dir, old_rev, new_rev, values_folder) maps the
+    `git diff --name-only` of an env's app-values folder to service names.
+    """
+
+    @pytest.fixture
+    def repo(self, promotion_remote, tmp_path):
+        repo = tmp_path / "work"
+        subprocess.run(['git', 'clone', '--quiet', '--bare', promotion_remote, str(repo)], check=True)
+        return str(repo)
+
+    def test_only_modified_service_reported(self, repo):
+        """
+        SCENARIO: release/1.0.0 → release/2.0.0 changes service-admin replicas
+        in dev1 only.
+        WHAT IT TESTS: service-admin is reported, service-user is not.
+        """
+        changed = crn_module.get_changed_services(repo, "release/1.0.0", "release/2.0.0",
+                                                  "helm-charts/dev1-values/app-values")
+        assert changed == {"service-admin"}
+
+    def test_identical_branches(self, repo):
+        """
+        SCENARIO: Both revisions are the same branch.
+        WHAT IT TESTS: Nothing is reported.
+        """
+        assert crn_module.get_changed_services(repo, "release/2.0.0", "release/2.0.0",
+                                               "helm-charts/dev1-values/app-values") == set()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 8. get_written_paths() — WHAT THE RELEASE NOTE COMMIT CONTAINS
+# ═══════════════════════════════════════════════════════════════════
+
+class TestGetWrittenPaths:
+    """
+    get_written_paths(target_folder_x, envs, helmignore_path, release_note_path, yaml_path)
+    lists every file main() writes, so commit_paths() stages all of them.
+    """
+
+    def test_summary_dir_committed(self, tmp_path):
+        """
+        SCENARIO: create_release_note_summary() copies the release note into
+        helm-charts/sit1-values/release_note/.
+        WHAT IT TESTS: The written summary file lies under one of the committed paths.
+        """
+        target_folder_x = str(tmp_path)
+        release_note_path = os.path.join(target_folder_x, "release_note")
+        yaml_path = os.path.join(target_folder_x, "helm-charts", "dev1-values")
+        paths = crn_module.get_written_paths(target_folder_x, ['dev1', 'sit1'],
+                                             os.path.join(target_folder_x, ".helmignore"), release_note_path, yaml_path)
+
+        summary = os.path.join(target_folder_x, "helm-charts", "sit1-values", "release_note", "release-note-summary.xlsx")
+        assert any(summary == p or summary.startswith(p + os.sep) for p in paths)
+        assert release_note_path in paths
+        assert os.path.join(target_folder_x, "upgrade-services.txt") in paths
+        assert os.path.join(yaml_path, "config-dev1.json") in paths
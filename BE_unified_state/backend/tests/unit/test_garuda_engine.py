@@ -6,6 +6,9 @@ garuda_engine.py contains three key functions:
 2. compare_list_of_dicts() — compares lists keyed by "name"
 3. handle_data_env()     — manages data/env list entries
 
+compare() also skips subtrees that are identical in all three trees by
+structural digest (section 5).
+
 Each function has multiple code branches. Every branch is tested below.
 """
 import json
@@ -401,3 +404,86 @@ class TestHandleDataEnv:
         engine.handle_data_env(json_data, "data", "add", {"name": "KEY", "value": "val"})
         assert "data" in json_data
         assert len(json_data["data"]) == 1
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 5. IDENTICAL-SUBTREE SKIPPING
+# ═══════════════════════════════════════════════════════════════════
+
+class TestIdenticalSubtreeSkip:
+    """
+    compare() returns at once for a subtree whose le_old, le_new and he_old
+    digests are equal, and only then.
+    """
+
+    SERVICE = {
+        "app": {"name": "admin-app"},
+        "resources": {"cpu": "500m", "memory": "512Mi"},
+        "env": [{"name": "PORT", "value": "8080"}],
+    }
+
+    @staticmethod
+    def _record_paths(monkeypatch):
+        """Route compare()'s recursive calls through a wrapper that records their paths."""
+        paths = []
+        original = engine.compare
+
+        def recording_compare(le_old, le_new, root, changes, he_old, envs, path='', memo=None):
+            paths.append(path)
+            return original(le_old, le_new, root, changes, he_old, envs, path, memo)
+
+        monkeypatch.setattr(engine, "compare", recording_compare)
+        return paths
+
+    def test_identical_service_not_walked(self, monkeypatch):
+        """
+        SCENARIO: The service is the same in all three trees (distinct objects).
+        WHAT IT TESTS: No changes, and compare() never recurses.
+        """
+        paths = self._record_paths(monkeypatch)
+        changes = []
+        engine.compare(json.loads(json.dumps(self.SERVICE)), json.loads(json.dumps(self.SERVICE)), "svc", changes,
+                       json.loads(json.dumps(self.SERVICE)), MOCK_ENVS)
+        assert changes == []
+        assert paths == ['']
+
+    def test_only_changed_subtree_walked(self, monkeypatch):
+        """
+        SCENARIO: Only resources//cpu differs in le_new.
+        WHAT IT TESTS: The modify is found; the identical `app` subtree is
+        skipped without visiting its keys.
+        """
+        le_new = json.loads(json.dumps(self.SERVICE))
+        le_new["resources"]["cpu"] = "1000m"
+        paths = self._record_paths(monkeypatch)
+        changes = []
+        engine.compare(self.SERVICE, le_new, "svc", changes, json.loads(json.dumps(self.SERVICE)), MOCK_ENVS)
+
+        assert [c[1:3] for c in changes] == [('modify', 'resources')]
+        assert 'resources//cpu' in paths
+        assert 'app' in paths and 'app//name' not in paths
+
+    def test_same_lower_env_still_reports_pending(self):
+        """
+        SCENARIO: le_old == le_new but the higher env lacks a key and has an extra one.
+        WHAT IT TESTS: No skip — pending add and pending delete are still reported.
+        """
+        he_old = {"app": {"name": "admin-app"}, "legacy": "1"}
+        changes = []
+        engine.compare(self.SERVICE, self.SERVICE, "svc", changes, he_old, MOCK_ENVS)
+        assert sorted(c[1] for c in changes) == ['pending add', 'pending add', 'pending delete']
+
+    def test_documents_changed_between_runs(self):
+        """
+        SCENARIO: Identical trees are compared, then le_new is edited in place
+        (as generate-config edits loaded documents) and compared again.
+        WHAT IT TESTS: The second run sees the edit; no digest outlives a run.
+        """
+        le_new = json.loads(json.dumps(self.SERVICE))
+        changes = []
+        engine.compare(self.SERVICE, le_new, "svc", changes, json.loads(json.dumps(self.SERVICE)), MOCK_ENVS)
+        assert changes == []
+
+        le_new["resources"]["memory"] = "1Gi"
+        engine.compare(self.SERVICE, le_new, "svc", changes, json.loads(json.dumps(self.SERVICE)), MOCK_ENVS)
+        assert [c[1:3] for c in changes] == [('modify', 'resources')]
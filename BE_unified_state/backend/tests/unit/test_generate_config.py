@@ -11,10 +11,16 @@ This file covers ALL logic branches:
 - General key add/modify/delete/pending (for env-list keys vs normal keys)
 - Hotfix scenarios (pending promotions applied)
 - Edge cases: missing key, None parsed_value, empty he_cur
+
+It also covers quote_ambiguous_values(), the in-process replacement for
+the `sed -E` pass over the regenerated YAML files, and the changed key
+paths apply_changes_to_json() reports for patching the files in place.
 """
 import os
 import sys
 import json
+import shutil
+import subprocess
 import pytest
 from openpyxl import Workbook
 
@@ -54,7 +60,7 @@ def _make_release_note(tmp_path, rows, lower_env='dev1', higher_env='sit1'):
     return str(path), higher_env
 
 
-def _load_and_apply(json_data, tmp_path, rows, lower_env='dev1', higher_env='sit1'):
+def _load_and_apply(json_data, tmp_path, rows, lower_env='dev1', higher_env='sit1', changed_paths=None):
     """Helper: create Excel, exec module, call apply_changes_to_json."""
     excel_path, sheet = _make_release_note(tmp_path, rows, lower_env, higher_env)
 
@@ -64,7 +70,7 @@ def _load_and_apply(json_data, tmp_path, rows, lower_env='dev1', higher_env='sit
     generate_config.update_template = []
 
     return generate_config.apply_changes_to_json(
-        json_data, excel_path, sheet, lower_env, higher_env
+        json_data, excel_path, sheet, lower_env, higher_env, changed_paths
     )
 
 
@@ -351,3 +357,115 @@ class TestEdgeCases:
         ]
         with pytest.raises(ValueError, match="Missing or empty key"):
             _load_and_apply(json_data, tmp_path, rows)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 9. VALUE QUOTING (FORMER SED PASS)
+# ═══════════════════════════════════════════════════════════════════
+
+SED_EXPRESSIONS = [
+    '-e', r's/([[:space:]]+value:[[:space:]]*)(0[0-9]+)([[:space:]]*$)/\1"\2"\3/',
+    '-e', r's/([[:space:]]+value:[[:space:]]*)([A-Z])([[:space:]]*$)/\1"\2"\3/',
+]
+
+SED_CASES = """env:
+- name: PORT
+  value: 08080
+- name: FLAG
+  value: Y
+- name: QUOTED
+  value: '0123'
+- name: WORD
+  value: Yes
+- name: NUMBER
+  value: 8080
+- name: TRAILING
+  value: 09\t
+  - value: N
+value: 0999
+nested:
+    value:    0
+    value:    00
+    value:Z
+  value: A # comment
+"""
+
+
+class TestQuoteAmbiguousValues:
+    """
+    quote_ambiguous_values(text) must make exactly the substitutions of
+    `sed -E` with the two expressions generate-config used to shell out to.
+    """
+
+    @pytest.fixture(autouse=True)
+    def module(self):
+        gen_config_spec.loader.exec_module(generate_config)
+
+    @pytest.mark.skipif(shutil.which("sed") is None, reason="sed not installed")
+    def test_same_output_as_sed(self):
+        """
+        SCENARIO: Lines that do and do not match either expression.
+        WHAT IT TESTS: Output identical to GNU sed -E on the same text.
+        """
+        expected = subprocess.run(['sed', '-E', *SED_EXPRESSIONS], input=SED_CASES,
+                                  capture_output=True, text=True, check=True).stdout
+        assert generate_config.quote_ambiguous_values(SED_CASES) == expected
+
+    def test_expected_quoting(self):
+        """
+        SCENARIO: Leading-zero numbers and single capitals after value:.
+        WHAT IT TESTS: They are double-quoted; other values are untouched.
+        """
+        out = generate_config.quote_ambiguous_values(SED_CASES).splitlines()
+        assert '  value: "08080"' in out
+        assert '  value: "Y"' in out
+        assert "  value: '0123'" in out
+        assert '  value: Yes' in out
+        assert 'value: 0999' in out   # top level: no leading whitespace
+
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 10. CHANGED KEY PATHS (FOR IN-PLACE PATCHING)
+# ═══════════════════════════════════════════════════════════════════
+
+class TestChangedPaths:
+    """
+    apply_changes_to_json(..., changed_paths) fills {service: [key path, ...]}
+    with every change it applies; [] means the whole service.
+    """
+
+    def test_key_paths_per_service(self, tmp_path):
+        """
+        SCENARIO: Two changes to one service, one to another, one data/env row.
+        WHAT IT TESTS: Each change is reported under its service, split on //.
+        """
+        json_data = {
+            "svc": {"replicas": 2, "resources": {"cpu": "500m"}},
+            "other": {"env": [{"name": "A", "value": "1"}]},
+            "data": [{"name": "D", "value": "1"}],
+        }
+        rows = [
+            ['svc', 'modify', 'replicas', '4', '2', '4', '2', 'Modified'],
+            ['svc', 'modify', 'resources//cpu', '"1"', '"500m"', '"1"', '"500m"', 'Modified'],
+            ['other', 'modify', 'env', '{"name": "A", "value": "2"}', '', '{"name": "A", "value": "2"}', '', 'Modified'],
+            ['data', 'modify', '', '{"name": "D", "value": "2"}', '', '{"name": "D", "value": "2"}', '', 'Modified'],
+        ]
+        changed_paths = {}
+        _load_and_apply(json_data, tmp_path, rows, changed_paths=changed_paths)
+
+        assert changed_paths == {
+            "svc": [["replicas"], ["resources", "cpu"]],
+            "other": [["env"]],
+            "data": [[]],
+        }
+
+    def test_added_root_object_is_whole_service(self, tmp_path):
+        """
+        SCENARIO: A root object is added.
+        WHAT IT TESTS: It is reported with the whole-service path [].
+        """
+        rows = [['new-svc', '', '', '', '', '{"replicas": 1}', '', 'Root object added']]
+        changed_paths = {}
+        _load_and_apply({}, tmp_path, rows, changed_paths=changed_paths)
+        assert changed_paths == {"new-svc": [[]]}
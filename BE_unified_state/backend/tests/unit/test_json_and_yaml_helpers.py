@@ -7,6 +7,10 @@ Pure logic functions tested:
 3. read_yaml_files_to_json()  — reads YAML dir into JSON dict (via prepare_data path)
 4. create_yaml_files_from_json() — writes JSON back to YAML files
 5. copy_missing_yaml_files()  — copies files missing in higher-env from lower-env
+6. read_yaml_tree_to_json()   — same as read_yaml_files_to_json, from git objects
+7. read_yaml_files_to_json(parallel=True) — process-pool loading
+8. write_json_snapshot() / get_json_data_for_env() — skip-if-unchanged snapshots
+9. write_yaml_files()         — write-only-changed YAML emission, patched in place from `sources`
 """
 import os
 import sys
@@ -16,7 +20,11 @@ import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
 
-from utilities.json_and_yaml_helpers import dump_and_replace, try_parse_json, copy_missing_yaml_files
+from utilities.json_and_yaml_helpers import (
+    dump_and_replace, try_parse_json, copy_missing_yaml_files, read_yaml_files_to_json, read_yaml_tree_to_json
+)
+from utilities.git_helpers import GitBlobReader
+import utilities.json_and_yaml_helpers as json_and_yaml_helpers
 
 
 # ═══════════════════════════════════════════════════════════════════
@@ -199,3 +207,261 @@ class TestCopyMissingYamlFiles:
         copy_missing_yaml_files(str(dst), str(src), "dev1", "sit1")
         # Should not crash, no new files added
         assert len(list(dst.iterdir())) == 1
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 4. read_yaml_tree_to_json() — CHECKOUT-FREE READ
+# ═══════════════════════════════════════════════════════════════════
+
+class TestReadYamlTreeToJson:
+    """
+    read_yaml_tree_to_json(reader, rev, folder)
+
+    Builds the same {service: parsed_yaml} dict as read_yaml_files_to_json,
+    but from blobs at a git revision.
+
+    TESTED WITH a real throwaway git repo (promotion_remote fixture).
+    """
+
+    def test_matches_checked_out_folder(self, promotion_remote, tmp_path):
+        """
+        SCENARIO: Read release/2.0.0 dev1 values from git and from a checkout.
+        WHAT IT TESTS: Both readers return identical data.
+        """
+        import subprocess
+        work = tmp_path / "work"
+        subprocess.run(['git', 'clone', '--quiet', '-b', 'release/2.0.0', promotion_remote, str(work)], check=True)
+        folder = "helm-charts/dev1-values/app-values"
+
+        with GitBlobReader(promotion_remote) as reader:
+            from_git = read_yaml_tree_to_json(reader, "release/2.0.0", folder)
+
+        assert from_git == read_yaml_files_to_json(str(work / folder))
+        assert from_git["service-admin"]["replicas"] == 4
+
+    def test_missing_folder_returns_empty(self, promotion_remote):
+        """
+        SCENARIO: The env folder does not exist at that revision.
+        WHAT IT TESTS: Empty dict, like an empty app-values folder.
+        """
+        with GitBlobReader(promotion_remote) as reader:
+            assert read_yaml_tree_to_json(reader, "master", "helm-charts/uat1-values/app-values") == {}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 5. read_yaml_files_to_json(parallel=True) — PROCESS-POOL LOADING
+# ═══════════════════════════════════════════════════════════════════
+
+class TestParallelYamlLoad:
+    """
+    read_yaml_files_to_json(folder, parallel=True, workers=N) parses the
+    files in a process pool and must return exactly what the serial read does.
+    """
+
+    @pytest.fixture
+    def many_services(self, tmp_path):
+        d = tmp_path / "app-values"
+        d.mkdir()
+        for i in range(40):
+            (d / f"service-{i:02d}.yaml").write_text(yaml.dump({"app": {"name": f"app-{i}"}, "replicas": i}))
+        (d / "config-dev1.json").write_text("{}")
+        (d / "service-legacy.yml").write_text("replicas: 1\n")
+        return str(d)
+
+    def test_same_result_and_key_order(self, many_services, monkeypatch):
+        """
+        SCENARIO: 41 service files loaded with two worker processes.
+        WHAT IT TESTS: Same dict and the same key order as the serial read;
+        non-YAML files are still skipped.
+        """
+        monkeypatch.setattr(json_and_yaml_helpers, "YAML_PARALLEL_MIN_FILES", 2)
+        serial = read_yaml_files_to_json(many_services)
+        parallel = read_yaml_files_to_json(many_services, parallel=True, workers=2)
+        assert parallel == serial
+        assert list(parallel) == list(serial)
+        assert len(parallel) == 41
+
+    def test_small_folder_stays_serial(self, sample_yaml_dir, monkeypatch):
+        """
+        SCENARIO: Three files, below YAML_PARALLEL_MIN_FILES.
+        WHAT IT TESTS: No process pool is started.
+        """
+        def no_pool(*args, **kwargs):
+            raise AssertionError("process pool started")
+        monkeypatch.setattr(json_and_yaml_helpers, "ProcessPoolExecutor", no_pool)
+        data = read_yaml_files_to_json(str(sample_yaml_dir), parallel=True, workers=4)
+        assert set(data) == {"service-admin", "service-user", "service-auth"}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 6. write_json_snapshot() — SKIP-IF-UNCHANGED SNAPSHOTS
+# ═══════════════════════════════════════════════════════════════════
+
+class TestJsonSnapshots:
+    """
+    write_json_snapshot(data, path, compact=False) writes config-<env>.json
+    only when its bytes change; get_json_data_for_env(snapshot=False)
+    writes nothing.
+    """
+
+    DATA = {"service-admin": {"replicas": 2, "app": {"name": "admin-app"}}}
+
+    def test_indented_output_unchanged(self, tmp_path):
+        """
+        SCENARIO: First write of a snapshot.
+        WHAT IT TESTS: Same text json.dump(indent=4) produced before.
+        """
+        path = tmp_path / "config-dev1.json"
+        assert json_and_yaml_helpers.write_json_snapshot(self.DATA, str(path)) is True
+        assert path.read_text() == json.dumps(self.DATA, indent=4)
+
+    def test_identical_content_not_rewritten(self, tmp_path):
+        """
+        SCENARIO: A rerun produces the same snapshot.
+        WHAT IT TESTS: The file is not opened for writing (mtime kept).
+        """
+        path = tmp_path / "config-dev1.json"
+        json_and_yaml_helpers.write_json_snapshot(self.DATA, str(path))
+        os.utime(path, (1000, 1000))
+        assert json_and_yaml_helpers.write_json_snapshot(self.DATA, str(path)) is False
+        assert os.path.getmtime(path) == 1000
+
+    def test_changed_content_rewritten(self, tmp_path):
+        """
+        SCENARIO: One value changed, same length.
+        WHAT IT TESTS: The new content is written.
+        """
+        path = tmp_path / "config-dev1.json"
+        json_and_yaml_helpers.write_json_snapshot(self.DATA, str(path))
+        changed = {"service-admin": {"replicas": 3, "app": {"name": "admin-app"}}}
+        assert json_and_yaml_helpers.write_json_snapshot(changed, str(path)) is True
+        assert json.loads(path.read_text()) == changed
+
+    def test_compact_mode(self, tmp_path):
+        """
+        SCENARIO: A machine-only snapshot.
+        WHAT IT TESTS: No whitespace, same data.
+        """
+        path = tmp_path / "config-sit1.json"
+        json_and_yaml_helpers.write_json_snapshot(self.DATA, str(path), compact=True)
+        assert path.read_text() == '{"service-admin":{"replicas":2,"app":{"name":"admin-app"}}}'
+
+    def test_snapshot_optional(self, tmp_path, sample_yaml_dir):
+        """
+        SCENARIO: Read an env folder with snapshot=False, then with the default.
+        WHAT IT TESTS: Only the second read leaves config-dev1.json behind.
+        """
+        values = tmp_path / "repo" / "helm-charts" / "dev1-values"
+        values.mkdir(parents=True)
+        sample_yaml_dir.rename(values / "app-values")
+        config = values / "app-values" / "config-dev1.json"
+
+        data = json_and_yaml_helpers.get_json_data_for_env(str(tmp_path / "repo"), "dev1", snapshot=False)
+        assert not config.exists()
+        assert json_and_yaml_helpers.get_json_data_for_env(str(tmp_path / "repo"), "dev1") == data
+        assert json.loads(config.read_text()) == data
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 7. write_yaml_files() — WRITE-ONLY-CHANGED YAML EMISSION
+# ═══════════════════════════════════════════════════════════════════
+
+class TestWriteYamlFiles:
+    """
+    write_yaml_files(json_data, folder, postprocess=None) dumps each service
+    once and writes only the files whose bytes change.
+    """
+
+    DATA = {
+        "service-admin": {"app": {"name": "admin-app"}, "replicas": 2},
+        "service-user": {"app": {"name": "user-app"}, "replicas": 3},
+    }
+
+    def test_same_files_as_create_yaml_files_from_json(self, tmp_path):
+        """
+        SCENARIO: Regenerate a folder from memory and from a JSON file.
+        WHAT IT TESTS: Both produce the same text as yaml.dump.
+        """
+        json_file = tmp_path / "config-sit1.json"
+        json_file.write_text(json.dumps(self.DATA))
+        json_and_yaml_helpers.create_yaml_files_from_json(str(json_file), str(tmp_path / "from-file"))
+        json_and_yaml_helpers.write_yaml_files(self.DATA, str(tmp_path / "from-memory"))
+
+        for name, data in self.DATA.items():
+            expected = yaml.dump(data, default_flow_style=False, sort_keys=False)
+            assert (tmp_path / "from-file" / f"{name}.yaml").read_text() == expected
+            assert (tmp_path / "from-memory" / f"{name}.yaml").read_text() == expected
+
+    def test_only_changed_services_written(self, tmp_path):
+        """
+        SCENARIO: Regenerate after only service-user changed.
+        WHAT IT TESTS: service-admin.yaml is not rewritten (mtime kept).
+        """
+        out = tmp_path / "app-values"
+        json_and_yaml_helpers.write_yaml_files(self.DATA, str(out))
+        os.utime(out / "service-admin.yaml", (1000, 1000))
+
+        changed = dict(self.DATA, **{"service-user": {"app": {"name": "user-app"}, "replicas": 5}})
+        written = json_and_yaml_helpers.write_yaml_files(changed, str(out))
+
+        assert written == [str(out / "service-user.yaml")]
+        assert os.path.getmtime(out / "service-admin.yaml") == 1000
+
+    def test_postprocess_applied_before_compare(self, tmp_path):
+        """
+        SCENARIO: A postprocess step rewrites the text (as the value quoting does).
+        WHAT IT TESTS: Its output is what lands on disk, and a rerun writes nothing.
+        """
+        out = tmp_path / "app-values"
+        upper = lambda text: text.upper()
+        json_and_yaml_helpers.write_yaml_files(self.DATA, str(out), postprocess=upper)
+        assert (out / "service-admin.yaml").read_text().startswith("APP:")
+        assert json_and_yaml_helpers.write_yaml_files(self.DATA, str(out), postprocess=upper) == []
+
+    def test_to_json_types_matches_json_round_trip(self):
+        """
+        SCENARIO: A service with integer keys, as YAML can produce.
+        WHAT IT TESTS: Keys come back as strings, as from config-<env>.json.
+        """
+        assert json_and_yaml_helpers.to_json_types({"ports": {80: "http"}}) == {"ports": {"80": "http"}}
+
+    def test_sources_patched_in_place(self, tmp_path):
+        """
+        SCENARIO: The x-1 files carry comments; one service had a scalar
+        changed, the other an env entry added.
+        WHAT IT TESTS: The first is patched (comment kept), the second is
+        dumped in full, and both parse to the new data.
+        """
+        src = tmp_path / "x-1"
+        src.mkdir()
+        (src / "service-admin.yaml").write_text("# admin\napp:\n  name: admin-app\nreplicas: 2  # HPA min\n")
+        (src / "service-user.yaml").write_text("# user\nenv:\n- name: A\n  value: '1'\n")
+        new = {
+            "service-admin": {"app": {"name": "admin-app"}, "replicas": 4},
+            "service-user": {"env": [{"name": "A", "value": "1"}, {"name": "B", "value": "2"}]},
+        }
+        sources = json_and_yaml_helpers.read_yaml_sources(str(src), {"service-admin": [["replicas"]], "service-user": [["env"]]})
+
+        out = tmp_path / "app-values"
+        json_and_yaml_helpers.write_yaml_files(new, str(out), sources=sources)
+
+        assert (out / "service-admin.yaml").read_text() == "# admin\napp:\n  name: admin-app\nreplicas: 4  # HPA min\n"
+        assert (out / "service-user.yaml").read_text() == yaml.dump(new["service-user"], default_flow_style=False, sort_keys=False)
+        for name, data in new.items():
+            assert yaml.safe_load((out / f"{name}.yaml").read_text()) == data
+
+    def test_unchanged_source_copied_verbatim(self, tmp_path):
+        """
+        SCENARIO: A service with no changed key paths.
+        WHAT IT TESTS: Its x-1 text is written as is, formatting included.
+        """
+        src = tmp_path / "x-1"
+        src.mkdir()
+        text = "app: {name: admin-app}   # flow style kept\n"
+        (src / "service-admin.yaml").write_text(text)
+        sources = json_and_yaml_helpers.read_yaml_sources(str(src), {})
+
+        out = tmp_path / "app-values"
+        json_and_yaml_helpers.write_yaml_files({"service-admin": {"app": {"name": "admin-app"}}}, str(out), sources=sources)
+        assert (out / "service-admin.yaml").read_text() == text
+
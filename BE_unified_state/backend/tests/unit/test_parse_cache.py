@@ -0,0 +1,174 @@
+"""
+Unit tests for parse_cache.py — the on-disk cache of parsed YAML.
+
+Functions tested:
+1. load_yaml_bytes() / get() / put() — content-addressed entries
+2. evict()                           — size-bounded LRU eviction
+3. read_yaml_files_to_json() / read_yaml_tree_to_json() — served from the cache
+"""
+import os
+import sys
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import parse_cache
+from utilities.json_and_yaml_helpers import read_yaml_files_to_json, read_yaml_tree_to_json
+from utilities.git_helpers import GitBlobReader
+
+
+def _git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. CONTENT-ADDRESSED ENTRIES
+# ═══════════════════════════════════════════════════════════════════
+
+class TestParseCacheEntries:
+    """
+    load_yaml_bytes(data) parses once per distinct content; entries are
+    keyed by the git blob SHA of the bytes.
+    """
+
+    def test_key_is_git_blob_sha(self, tmp_path):
+        """
+        SCENARIO: Hash a file's bytes.
+        WHAT IT TESTS: The key is what `git hash-object` prints.
+        """
+        path = tmp_path / "service-admin.yaml"
+        path.write_bytes(b"replicas: 2\n")
+        assert parse_cache.blob_sha(path.read_bytes()) == _git(tmp_path, 'hash-object', str(path))
+
+    def test_second_load_is_a_hit(self, parse_cache_dir, monkeypatch):
+        """
+        SCENARIO: The same bytes are loaded twice.
+        WHAT IT TESTS: The second load comes from the pickle, not the parser.
+        """
+        data = b"app:\n  name: admin-app\nreplicas: 2\n"
+        first = parse_cache.load_yaml_bytes(data)
+        monkeypatch.setattr(parse_cache.yaml_codec, "load", lambda _: pytest.fail("parsed again"))
+        assert parse_cache.load_yaml_bytes(data) == first == {"app": {"name": "admin-app"}, "replicas": 2}
+        assert os.path.isfile(parse_cache.get_entry_path(parse_cache.blob_sha(data)))
+
+    def test_hits_are_independent_copies(self):
+        """
+        SCENARIO: A caller mutates a document it got from the cache.
+        WHAT IT TESTS: The next load still returns the original content.
+        """
+        data = b"replicas: 2\n"
+        parse_cache.load_yaml_bytes(data)
+        parse_cache.load_yaml_bytes(data)["replicas"] = 9
+        assert parse_cache.load_yaml_bytes(data) == {"replicas": 2}
+
+    def test_corrupt_entry_is_a_miss(self):
+        """
+        SCENARIO: A truncated pickle is left behind by a killed agent.
+        WHAT IT TESTS: The document is parsed again and the entry rewritten.
+        """
+        data = b"replicas: 3\n"
+        path = parse_cache.get_entry_path(parse_cache.blob_sha(data))
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(b"\x80garbage")
+        assert parse_cache.load_yaml_bytes(data) == {"replicas": 3}
+        assert parse_cache.get(parse_cache.blob_sha(data)) == (True, {"replicas": 3})
+
+    def test_disabled_cache_writes_nothing(self, parse_cache_dir, monkeypatch):
+        """
+        SCENARIO: YAML_PARSE_CACHE_DIR is set to an empty string.
+        WHAT IT TESTS: Documents are parsed and nothing is stored.
+        """
+        monkeypatch.setattr(parse_cache, "CACHE_DIR", "")
+        assert parse_cache.load_yaml_bytes(b"replicas: 1\n") == {"replicas": 1}
+        assert not parse_cache_dir.exists()
+
+    def test_other_layout_version_not_read(self, monkeypatch):
+        """
+        SCENARIO: An entry for the same bytes was stored under another CACHE_VERSION.
+        WHAT IT TESTS: It is a miss; only entries of the current layout are read.
+        """
+        data = b"replicas: 4\n"
+        sha = parse_cache.blob_sha(data)
+        current = parse_cache.CACHE_VERSION
+        monkeypatch.setattr(parse_cache, "CACHE_VERSION", "1")
+        parse_cache.put(sha, ({"replicas": 4}, []))
+        monkeypatch.setattr(parse_cache, "CACHE_VERSION", current)
+        assert parse_cache.get(sha) == (False, None)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. SIZE-BOUNDED LRU EVICTION
+# ═══════════════════════════════════════════════════════════════════
+
+class TestEviction:
+    """
+    evict(max_bytes) removes the least recently used entries (oldest mtime;
+    a hit refreshes it) until the cache fits.
+    """
+
+    def test_least_recently_used_go_first(self):
+        """
+        SCENARIO: Three entries; the oldest one was read again recently.
+        WHAT IT TESTS: Eviction removes the entry that was not used since.
+        """
+        docs = [f"replicas: {i}\n".encode() for i in range(3)]
+        for i, data in enumerate(docs):
+            parse_cache.load_yaml_bytes(data)
+            path = parse_cache.get_entry_path(parse_cache.blob_sha(data))
+            os.utime(path, (1000 + i, 1000 + i))
+        parse_cache.get(parse_cache.blob_sha(docs[0]))   # refreshes docs[0]
+
+        sizes = [os.path.getsize(parse_cache.get_entry_path(parse_cache.blob_sha(d))) for d in docs]
+        assert parse_cache.evict(max_bytes=sum(sizes) - 1) == 1
+
+        assert parse_cache.get(parse_cache.blob_sha(docs[0]))[0] is True
+        assert parse_cache.get(parse_cache.blob_sha(docs[1]))[0] is False
+        assert parse_cache.get(parse_cache.blob_sha(docs[2]))[0] is True
+
+    def test_within_budget_keeps_everything(self):
+        """
+        SCENARIO: The cache is smaller than the budget.
+        WHAT IT TESTS: Nothing is removed.
+        """
+        parse_cache.load_yaml_bytes(b"replicas: 1\n")
+        assert parse_cache.evict() == 0
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 3. FOLDER AND TREE READS
+# ═══════════════════════════════════════════════════════════════════
+
+class TestCachedReads:
+    """
+    read_yaml_files_to_json() and read_yaml_tree_to_json() go through the
+    cache and share entries, since both key by blob SHA.
+    """
+
+    def test_rerun_is_all_hits(self, sample_yaml_dir):
+        """
+        SCENARIO: The same app-values folder is read twice (a retried stage).
+        WHAT IT TESTS: Identical results, the second read parses nothing.
+        """
+        first = read_yaml_files_to_json(str(sample_yaml_dir))
+        before = parse_cache.stats()
+        assert read_yaml_files_to_json(str(sample_yaml_dir)) == first
+        after = parse_cache.stats()
+        assert after["hits"] - before["hits"] == 3
+        assert after["misses"] == before["misses"]
+
+    def test_tree_read_skips_cached_blobs(self, promotion_remote, tmp_path, monkeypatch):
+        """
+        SCENARIO: A checkout was read from disk, then the same branch is read
+        from the object store.
+        WHAT IT TESTS: Every blob is a cache hit, so no blob is read.
+        """
+        work = tmp_path / "work"
+        _git(tmp_path, 'clone', '--quiet', '-b', 'release/1.0.0', promotion_remote, str(work))
+        from_disk = read_yaml_files_to_json(str(work / "helm-charts/dev1-values/app-values"))
+
+        with GitBlobReader(str(work)) as reader:
+            monkeypatch.setattr(reader, "read", lambda sha: pytest.fail("blob read"))
+            from_git = read_yaml_tree_to_json(reader, "release/1.0.0", "helm-charts/dev1-values/app-values")
+        assert from_git == from_disk
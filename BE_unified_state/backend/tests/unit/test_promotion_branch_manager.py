@@ -0,0 +1,127 @@
+"""
+Unit tests for promotion_branch_manager.py — creating a new release branch.
+
+Functions tested:
+1. create_github_branch() / clean_env_trees() — checkout-free branch creation
+   that matches what clean_non_dev_folders() does on a checkout
+"""
+import os
+import sys
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+import promotion_branch_manager
+import utilities.git_helpers as git_helpers
+from utilities.dir_helpers import clean_non_dev_folders
+
+
+def _git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def nested_remote(tmp_path, git_identity, monkeypatch):
+    """A promotion repo whose env folders have nested directories and existing readmes."""
+    monkeypatch.setattr(git_helpers, "MIRROR_ROOT", "")
+    monkeypatch.setattr(git_helpers, "_remote_refs", {})
+    seed = tmp_path / "seed"
+    files = {
+        "meta-sheet.xlsx": "meta",
+        "helm-charts/templates/deployment.yaml": "kind: Deployment\n",
+        "helm-charts/dev1-values/app-values/service-a.yaml": "a: 1\n",
+        "helm-charts/dev1-values/app-values/config-dev1.json": "{}",
+        "helm-charts/dev1-values/app-values/release_note/release-note.xlsx": "xlsx",
+        "helm-charts/dev1-values/infra-values/nested/deeper/main.tfvars": "x = 1\n",
+        "helm-charts/sit1-values/readme.md": "old readme",
+        "helm-charts/sit1-values/app-values/service-a.yaml": "a: 2\n",
+    }
+    for path, content in files.items():
+        (seed / path).parent.mkdir(parents=True, exist_ok=True)
+        (seed / path).write_text(content)
+    _git(seed, 'init', '--quiet', '-b', 'mb-baseline')
+    _git(seed, 'add', '.')
+    _git(seed, 'commit', '--quiet', '-m', 'baseline')
+    remote = tmp_path / "remote.git"
+    _git(tmp_path, 'clone', '--quiet', '--bare', str(seed), str(remote))
+    return str(remote)
+
+
+def _snapshot(repo, rev):
+    """{path: content} of every file at `rev`."""
+    paths = _git(repo, 'ls-tree', '-r', '--name-only', rev).splitlines()
+    return {path: subprocess.run(['git', 'show', f'{rev}:{path}'], cwd=repo, check=True,
+                                 capture_output=True, text=True).stdout for path in paths}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. create_github_branch() — CHECKOUT-FREE BRANCH CREATION
+# ═══════════════════════════════════════════════════════════════════
+
+class TestCreateGithubBranch:
+    """
+    create_github_branch(url, base, new, lower_env, temp_dir)
+
+    Builds the new branch from tree objects: every *-values subtree is
+    replaced by a readme-only tree and the commit is pushed directly.
+    """
+
+    def test_same_layout_as_clean_non_dev_folders(self, nested_remote, tmp_path):
+        """
+        SCENARIO: Branch from mb-baseline with nested env folders.
+        WHAT IT TESTS: The new branch has the same files as a checkout cleaned
+        by clean_non_dev_folders, readme texts use the repo-relative env path.
+        """
+        promotion_branch_manager.create_github_branch(nested_remote, "mb-baseline", "release/1.0.0", "dev1", str(tmp_path))
+
+        checkout = tmp_path / "checkout"
+        _git(tmp_path, 'clone', '--quiet', '-b', 'mb-baseline', nested_remote, str(checkout))
+        clean_non_dev_folders(str(checkout))
+        expected = {}
+        for root, _, files in os.walk(checkout):
+            if '.git' in root.split(os.sep):
+                continue
+            for f in files:
+                rel = os.path.relpath(os.path.join(root, f), checkout).replace(os.sep, '/')
+                content = open(os.path.join(root, f)).read()
+                expected[rel] = content.replace(str(checkout) + os.sep, "")
+
+        assert _snapshot(nested_remote, "release/1.0.0") == expected
+
+    def test_commit_on_top_of_base(self, nested_remote, tmp_path):
+        """
+        SCENARIO: A new branch is created.
+        WHAT IT TESTS: One commit whose parent is the base tip; trees outside
+        the env folders are reused unchanged.
+        """
+        promotion_branch_manager.create_github_branch(nested_remote, "mb-baseline", "release/1.0.0", "dev1", str(tmp_path))
+
+        assert _git(nested_remote, 'rev-parse', 'release/1.0.0^') == _git(nested_remote, 'rev-parse', 'mb-baseline')
+        assert _git(nested_remote, 'log', '-1', '--format=%s', 'release/1.0.0') == \
+            "Initialize release/1.0.0: Clean  environment folders"
+        assert _git(nested_remote, 'rev-parse', 'release/1.0.0:helm-charts/templates') == \
+            _git(nested_remote, 'rev-parse', 'mb-baseline:helm-charts/templates')
+
+    def test_missing_base_branch_raises(self, nested_remote, tmp_path):
+        """
+        SCENARIO: The base branch does not exist.
+        WHAT IT TESTS: ValueError, and no branch is created.
+        """
+        with pytest.raises(ValueError):
+            promotion_branch_manager.create_github_branch(nested_remote, "nope", "release/1.0.0", "dev1", str(tmp_path))
+        assert "release/1.0.0" not in _git(nested_remote, 'branch')
+
+    def test_inside_transaction(self, nested_remote, tmp_path, monkeypatch):
+        """
+        SCENARIO: The pipeline runs in a promotion transaction.
+        WHAT IT TESTS: The branch is created in the transaction repo only.
+        """
+        monkeypatch.setattr(git_helpers, "_transaction_urls", {})
+        txn = git_helpers.begin_transaction(nested_remote, str(tmp_path / "txn"))
+        monkeypatch.setenv(git_helpers.TRANSACTION_ENV, txn)
+
+        promotion_branch_manager.create_github_branch(nested_remote, "mb-baseline", "release/1.0.0", "dev1", str(tmp_path))
+
+        assert "release/1.0.0" in _git(txn, 'branch')
+        assert "release/1.0.0" not in _git(nested_remote, 'branch')
@@ -0,0 +1,169 @@
+"""
+Unit tests for repo_layout.py — env folder index of a promotion checkout.
+
+Functions tested:
+1. find_env_paths() / get_env_paths() — env → values/app-values/release_note/infra-values
+2. fetch_json()                       — resolves through the index instead of os.walk
+"""
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import repo_layout
+from utilities.json_and_yaml_helpers import fetch_json
+from utilities.git_helpers import checkout_worktrees
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    """A promotion checkout with two envs, a .git dir and release notes."""
+    repo = tmp_path / "mb-helmcharts"
+    for path in ("helm-charts/dev1-values/app-values/service-admin.yaml",
+                 "helm-charts/dev1-values/infra-values/terraform.tfvars",
+                 "helm-charts/sit1-values/app-values/release_note/release-note.xlsx",
+                 "helm-charts/templates/deployment.yaml",
+                 ".git/refs/heads/uat1-values/HEAD"):
+        (repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / path).write_text("x")
+    repo_layout.invalidate()
+    return repo
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. find_env_paths() / get_env_paths() — ENV FOLDER INDEX
+# ═══════════════════════════════════════════════════════════════════
+
+class TestEnvPaths:
+    """
+    find_env_paths(repo_root, env) answers hits and misses from an index
+    built once per checkout, until makedirs() or a clone invalidates it;
+    get_env_paths() also covers env folders not created yet.
+    """
+
+    def test_paths_of_an_env(self, checkout):
+        """
+        SCENARIO: Look up dev1 in a standard checkout.
+        WHAT IT TESTS: All four paths point into helm-charts/dev1-values.
+        """
+        values = str(checkout / "helm-charts" / "dev1-values")
+        assert repo_layout.find_env_paths(str(checkout), "dev1") == repo_layout.EnvPaths(
+            values=values,
+            app_values=os.path.join(values, "app-values"),
+            release_note=os.path.join(values, "app-values", "release_note"),
+            infra_values=os.path.join(values, "infra-values"),
+        )
+
+    def test_git_dir_not_indexed(self, checkout):
+        """
+        SCENARIO: A ref under .git happens to be named uat1-values.
+        WHAT IT TESTS: It is not mistaken for an env folder.
+        """
+        assert repo_layout.find_env_paths(str(checkout), "uat1") is None
+
+    def test_index_built_once(self, checkout, monkeypatch):
+        """
+        SCENARIO: Several lookups in the same checkout.
+        WHAT IT TESTS: The tree is walked once.
+        """
+        walks = []
+        real_walk = os.walk
+        monkeypatch.setattr(repo_layout.os, "walk", lambda *a, **k: walks.append(a) or real_walk(*a, **k))
+        for env in ("dev1", "sit1", "dev1", "sit1"):
+            assert repo_layout.find_env_paths(str(checkout), env) is not None
+        assert len(walks) == 1
+
+    def test_recreated_checkout_is_reindexed(self, checkout):
+        """
+        SCENARIO: The checkout is deleted and cloned again with a new env.
+        WHAT IT TESTS: The stale entry is dropped and the new env is found.
+        """
+        assert repo_layout.find_env_paths(str(checkout), "dev1") is not None
+        (checkout / "helm-charts" / "dev1-values").rename(checkout / "helm-charts" / "dev2-values")
+        assert repo_layout.find_env_paths(str(checkout), "dev1") is None
+        assert repo_layout.find_env_paths(str(checkout), "dev2").values.endswith("dev2-values")
+
+    def test_misses_answered_from_index(self, checkout, monkeypatch):
+        """
+        SCENARIO: An env that is not checked out is looked up repeatedly.
+        WHAT IT TESTS: The miss is cached; the tree is still walked once.
+        """
+        walks = []
+        real_walk = os.walk
+        monkeypatch.setattr(repo_layout.os, "walk", lambda *a, **k: walks.append(a) or real_walk(*a, **k))
+        for env in ("prod", "dev1", "prod", "uat1"):
+            repo_layout.find_env_paths(str(checkout), env)
+        assert repo_layout.find_env_paths(str(checkout), "prod") is None
+        assert len(walks) == 1
+
+    def test_makedirs_invalidates(self, checkout):
+        """
+        SCENARIO: A missing env is looked up, then its app-values folder is
+        created through makedirs() (as write_yaml_files does).
+        WHAT IT TESTS: The next lookup finds it; other checkouts keep their index.
+        """
+        other = checkout.parent / "other"
+        (other / "helm-charts" / "dev1-values").mkdir(parents=True)
+        assert repo_layout.find_env_paths(str(other), "dev1") is not None
+        assert repo_layout.find_env_paths(str(checkout), "prod") is None
+
+        repo_layout.makedirs(str(checkout / "helm-charts" / "prod-values" / "app-values"))
+        assert repo_layout.find_env_paths(str(checkout), "prod").values.endswith("prod-values")
+        assert os.path.abspath(str(other)) in repo_layout._layouts
+
+    def test_checkout_invalidates(self, promotion_remote, tmp_path):
+        """
+        SCENARIO: An env is looked up before its worktree is checked out.
+        WHAT IT TESTS: checkout_worktrees() drops the cached miss.
+        """
+        x = str(tmp_path / "x")
+        assert repo_layout.find_env_paths(x, "dev1") is None
+        checkout_worktrees(promotion_remote, [("release/2.0.0", x)], base_dir=str(tmp_path / "base"), depth=1)
+        assert repo_layout.find_env_paths(x, "dev1") is not None
+
+    def test_get_env_paths_for_missing_env(self, checkout):
+        """
+        SCENARIO: The release note folder of an env not checked out yet.
+        WHAT IT TESTS: The conventional helm-charts/<env>-values location.
+        """
+        paths = repo_layout.get_env_paths(str(checkout), "prod")
+        assert paths.release_note == os.path.join(str(checkout), "helm-charts", "prod-values", "app-values", "release_note")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. fetch_json() — CONFIG SNAPSHOT PATH
+# ═══════════════════════════════════════════════════════════════════
+
+class TestFetchJson:
+    """
+    fetch_json(target_folder, env) returns app-values/config-<env>.json,
+    creating it as {} when missing, and '' when the env is not checked out.
+    """
+
+    def test_creates_empty_config(self, checkout):
+        """
+        SCENARIO: No config-dev1.json yet.
+        WHAT IT TESTS: It is created with {} and its path returned.
+        """
+        path = fetch_json(str(checkout), "dev1")
+        assert path == str(checkout / "helm-charts" / "dev1-values" / "app-values" / "config-dev1.json")
+        assert json.loads(open(path).read()) == {}
+
+    def test_keeps_existing_config(self, checkout):
+        """
+        SCENARIO: config-sit1.json already holds a snapshot.
+        WHAT IT TESTS: It is returned untouched.
+        """
+        existing = checkout / "helm-charts" / "sit1-values" / "app-values" / "config-sit1.json"
+        existing.write_text('{"service-admin": {}}')
+        assert fetch_json(str(checkout), "sit1") == str(existing)
+        assert existing.read_text() == '{"service-admin": {}}'
+
+    def test_env_not_checked_out(self, checkout):
+        """
+        SCENARIO: A sparse checkout without prod.
+        WHAT IT TESTS: Empty string, as before.
+        """
+        assert fetch_json(str(checkout), "prod") == ''
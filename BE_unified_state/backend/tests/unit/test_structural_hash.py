@@ -0,0 +1,93 @@
+"""
+Unit tests for structural_hash.py — digests that let compare() skip
+identical subtrees.
+
+Functions tested:
+1. digest() / same() — equal digests exactly for equal values
+2. digest(memo=...)  — subtree digests memoised per comparison
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import structural_hash
+
+
+SERVICE = {
+    "app": {"name": "admin-app"},
+    "replicas": 2,
+    "env": [{"name": "PORT", "value": "8080"}, {"name": "MODE", "value": None}],
+}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. digest() / same() — STRUCTURAL EQUALITY
+# ═══════════════════════════════════════════════════════════════════
+
+class TestDigest:
+    """
+    digest(value) is equal for equal parsed values and differs otherwise.
+    """
+
+    def test_equal_values_equal_digests(self):
+        """
+        SCENARIO: The same service parsed twice (distinct objects).
+        WHAT IT TESTS: Same digest, also with the keys in another order.
+        """
+        reordered = {"env": [dict(e) for e in SERVICE["env"]], "replicas": 2, "app": {"name": "admin-app"}}
+        assert structural_hash.digest(SERVICE) == structural_hash.digest(reordered)
+        assert structural_hash.same(SERVICE, reordered, dict(reordered))
+
+    @pytest.mark.parametrize("a, b", [
+        ({"replicas": 2}, {"replicas": 3}),
+        ({"replicas": 1}, {"replicas": True}),
+        ({"replicas": 1}, {"replicas": 1.0}),
+        ({"replicas": "2"}, {"replicas": 2}),
+        ({"a": None}, {"a": "null"}),
+        ({"a": {"b": 1}}, {"a": [{"b": 1}]}),
+        (["a", "b"], ["b", "a"]),
+        ({"a": 1}, {"a": 1, "b": None}),
+        ({1: "x"}, {"1": "x"}),
+    ])
+    def test_different_values_different_digests(self, a, b):
+        """
+        SCENARIO: Values that differ in content, type, order of a list or keys.
+        WHAT IT TESTS: Their digests differ (so compare() never skips them).
+        """
+        assert not structural_hash.same(a, b)
+
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. digest(memo=...) — ONE MEMO PER COMPARISON
+# ═══════════════════════════════════════════════════════════════════
+
+class TestMemo:
+    """
+    digest(value, memo) memoises dict and list digests in the caller's
+    `memo`; without one, nothing outlives the call.
+    """
+
+    def test_subtree_digest_memoised(self, monkeypatch):
+        """
+        SCENARIO: A service is hashed, then one of its subtrees, with one memo.
+        WHAT IT TESTS: The subtree digest is looked up, not computed again.
+        """
+        service = {"app": {"name": "admin-app"}, "replicas": 2}
+        memo = {}
+        structural_hash.digest(service, memo)
+        monkeypatch.setattr(structural_hash, "_hash", lambda data: pytest.fail("hashed again"))
+        structural_hash.digest(service["app"], memo)
+
+    def test_no_state_between_calls(self):
+        """
+        SCENARIO: A document is hashed, changed in place, and hashed again.
+        WHAT IT TESTS: The second digest reflects the change; no module-level
+        memo keeps the document alive or serves a stale digest.
+        """
+        service = {"app": {"name": "admin-app"}, "replicas": 2}
+        before = structural_hash.digest(service)
+        service["app"]["name"] = "admin-v2"
+        assert structural_hash.digest(service) != before
@@ -0,0 +1,191 @@
+"""
+Unit tests for sync_yaml.py — collecting dev-values from service repos.
+
+Functions tested:
+1. collect_all_yaml_files() — bounded-concurrency collection with failure report
+2. get_remote_heads() / select_changed_repos() / apply_sync_results() — SHA manifest
+"""
+import os
+import sys
+import subprocess
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+import sync_yaml
+import utilities.git_helpers as git_helpers
+
+
+def _git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def service_repos(tmp_path, git_identity, monkeypatch):
+    """Three service repos with helm-charts/dev-values on main; tokenize_url is a no-op for local paths."""
+    monkeypatch.setattr(sync_yaml, "tokenize_url", lambda url: url)
+    monkeypatch.setattr(git_helpers, "MIRROR_ROOT", "")
+    urls = []
+    for name in ("svc-a", "svc-b", "svc-c"):
+        repo = tmp_path / "remotes" / name
+        values = repo / "helm-charts" / "dev-values"
+        values.mkdir(parents=True)
+        (values / f"{name}.yaml").write_text(yaml.dump({"app": {"name": name}}))
+        (repo / "src.txt").write_text("code")
+        _git(repo, 'init', '--quiet', '-b', 'main')
+        _git(repo, 'add', '.')
+        _git(repo, 'commit', '--quiet', '-m', 'init')
+        urls.append(f"file://{repo}")
+    return urls
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. collect_all_yaml_files() — CONCURRENT COLLECTION
+# ═══════════════════════════════════════════════════════════════════
+
+class TestCollectAllYamlFiles:
+    """
+    collect_all_yaml_files(repo_urls, working_dir, relative_path, workers, timeout)
+
+    Clones every service repo (depth 1, dev-values only) on a thread pool
+    and returns files in services_list order plus a list of failures.
+    """
+
+    def test_files_in_input_order(self, service_repos, tmp_path):
+        """
+        SCENARIO: Three healthy repos collected with two workers.
+        WHAT IT TESTS: All files are returned in services_list order,
+        whatever order the clones finish in.
+        """
+        files, failures = sync_yaml.collect_all_yaml_files(
+            service_repos, str(tmp_path / "work"), os.path.join("helm-charts", "dev-values"), workers=2
+        )
+        assert failures == []
+        assert [name for name, _ in files] == ["svc-a.yaml", "svc-b.yaml", "svc-c.yaml"]
+
+    def test_failures_are_aggregated(self, service_repos, tmp_path):
+        """
+        SCENARIO: One repo URL does not exist.
+        WHAT IT TESTS: The other repos are still collected and the failure
+        is reported once, against its URL.
+        """
+        broken = f"file://{tmp_path}/remotes/missing"
+        files, failures = sync_yaml.collect_all_yaml_files(
+            [service_repos[0], broken, service_repos[2]], str(tmp_path / "work"),
+            os.path.join("helm-charts", "dev-values"),
+        )
+        assert [name for name, _ in files] == ["svc-a.yaml", "svc-c.yaml"]
+        assert [url for url, _ in failures] == [broken]
+
+    def test_only_dev_values_checked_out(self, service_repos, tmp_path):
+        """
+        SCENARIO: Service repos contain source code next to helm-charts.
+        WHAT IT TESTS: The clone is depth 1 and only materialises dev-values.
+        """
+        work = tmp_path / "work"
+        sync_yaml.collect_all_yaml_files(service_repos[:1], str(work), os.path.join("helm-charts", "dev-values"))
+        clone = work / git_helpers.get_repo_slug(service_repos[0])
+        assert (clone / "helm-charts" / "dev-values" / "svc-a.yaml").exists()
+        assert _git(clone, 'rev-parse', '--is-shallow-repository') == "true"
+
+    def test_same_repo_name_in_two_orgs(self, service_repos, tmp_path):
+        """
+        SCENARIO: Two repos named `config` under different parents, collected
+        concurrently into one working dir.
+        WHAT IT TESTS: Each gets its own clone directory and its own files.
+        """
+        urls = []
+        for org in ("org-a", "org-b"):
+            repo = tmp_path / "remotes" / org / "config"
+            values = repo / "helm-charts" / "dev-values"
+            values.mkdir(parents=True)
+            (values / f"{org}.yaml").write_text(yaml.dump({"app": {"name": org}}))
+            _git(repo, 'init', '--quiet', '-b', 'main')
+            _git(repo, 'add', '.')
+            _git(repo, 'commit', '--quiet', '-m', 'init')
+            urls.append(f"file://{repo}")
+
+        files, failures = sync_yaml.collect_all_yaml_files(urls, str(tmp_path / "work"),
+                                                           os.path.join("helm-charts", "dev-values"), workers=2)
+        assert failures == []
+        assert [name for name, _ in files] == ["org-a.yaml", "org-b.yaml"]
+        assert len(os.listdir(tmp_path / "work")) == 2
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. INCREMENTAL SYNC — SHA MANIFEST
+# ═══════════════════════════════════════════════════════════════════
+
+class TestIncrementalSync:
+    """
+    get_remote_heads / select_changed_repos / apply_sync_results
+
+    The promotion branch keeps {repo: {"sha", "files"}}; only repos whose
+    main moved (or whose files went missing) are cloned again.
+    """
+
+    def _sync(self, urls, dest, manifest, work):
+        heads = sync_yaml.get_remote_heads(urls)
+        changed = sync_yaml.select_changed_repos(urls, manifest, heads, str(dest))
+        results, failures = sync_yaml.collect_yaml_files_by_repo(
+            changed, str(work), os.path.join("helm-charts", "dev-values"))
+        assert failures == []
+        files, manifest = sync_yaml.apply_sync_results(str(dest), manifest, results, heads, urls)
+        sync_yaml.write_and_verify(str(dest), files)
+        return changed, manifest
+
+    def test_first_sync_takes_every_repo(self, service_repos, tmp_path):
+        """
+        SCENARIO: No manifest on the promotion branch yet.
+        WHAT IT TESTS: Every repo is synced and recorded with its main SHA.
+        """
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        changed, manifest = self._sync(service_repos, dest, {}, tmp_path / "work")
+        assert changed == service_repos
+        assert sorted(os.listdir(dest)) == ["svc-a.yaml", "svc-b.yaml", "svc-c.yaml"]
+        repo_a = service_repos[0][len("file://"):]
+        assert manifest[service_repos[0]] == {"sha": _git(repo_a, 'rev-parse', 'HEAD'), "files": ["svc-a.yaml"]}
+
+    def test_only_moved_repos_are_resynced(self, service_repos, tmp_path):
+        """
+        SCENARIO: After a sync, svc-b gets a new commit that renames its file.
+        WHAT IT TESTS: Only svc-b is cloned again, and its old file is removed.
+        """
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        _, manifest = self._sync(service_repos, dest, {}, tmp_path / "work1")
+
+        repo_b = service_repos[1][len("file://"):]
+        _git(repo_b, 'mv', 'helm-charts/dev-values/svc-b.yaml', 'helm-charts/dev-values/svc-b2.yaml')
+        _git(repo_b, 'commit', '--quiet', '-m', 'rename')
+        git_helpers._remote_refs.clear()
+
+        changed, manifest = self._sync(service_repos, dest, manifest, tmp_path / "work2")
+        assert changed == [service_repos[1]]
+        assert sorted(os.listdir(dest)) == ["svc-a.yaml", "svc-b2.yaml", "svc-c.yaml"]
+        assert manifest[service_repos[1]]["files"] == ["svc-b2.yaml"]
+
+    def test_missing_file_forces_resync(self, service_repos, tmp_path):
+        """
+        SCENARIO: The SHA is unchanged but a synced file was deleted from the branch.
+        WHAT IT TESTS: That repo is selected again.
+        """
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        _, manifest = self._sync(service_repos, dest, {}, tmp_path / "work")
+        os.remove(dest / "svc-c.yaml")
+        heads = sync_yaml.get_remote_heads(service_repos)
+        assert sync_yaml.select_changed_repos(service_repos, manifest, heads, str(dest)) == [service_repos[2]]
+
+    def test_manifest_round_trip(self, tmp_path):
+        """
+        SCENARIO: A manifest is saved and loaded; a corrupt one is loaded.
+        WHAT IT TESTS: Round trip is lossless and a corrupt file counts as empty.
+        """
+        path = tmp_path / "sync-manifest.json"
+        sync_yaml.save_sync_manifest(str(path), {"u": {"sha": "abc", "files": ["a.yaml"]}})
+        assert sync_yaml.load_sync_manifest(str(path)) == {"u": {"sha": "abc", "files": ["a.yaml"]}}
+        path.write_text("{not json")
+        assert sync_yaml.load_sync_manifest(str(path)) == {}
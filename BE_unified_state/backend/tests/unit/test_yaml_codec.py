@@ -0,0 +1,202 @@
+"""
+Unit tests for yaml_codec.py — the shared YAML load/dump entry points.
+
+Functions tested:
+1. load() / dump() — libyaml-backed loading when available, and byte-for-byte
+   identical to yaml.safe_load / yaml.dump on our values files
+2. HelmValuesDumper — dump-time quoting, matching the former sed pass on mapping values
+"""
+import os
+import sys
+import random
+import shutil
+import subprocess
+import yaml
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import yaml_codec
+
+
+# Scalars whose quoting or folding differs between emitters if anything does
+TRICKY_VALUES = {
+    "app": {"name": "admin-app"},
+    "image": {"image_name": "gcr.io/project/admin:1.0.0-b10-dev1"},
+    "env": [
+        {"name": "PORT", "value": "08080"},
+        {"name": "FLAG", "value": "yes"},
+        {"name": "NUMBER_LIKE", "value": "1e3"},
+        {"name": "URL", "value": "jdbc:postgresql://db:5432/app?ssl=true"},
+        {"name": "UNICODE", "value": "café ü"},
+        {"name": "LONG_UNICODE", "value": "Café au lait " * 8},
+        {"name": "MULTILINE", "value": "line one\nline two\n"},
+        {"name": "LONG", "value": " ".join(["word"] * 60)},
+        {"name": "EMPTY", "value": ""},
+        {"name": "COMMENT", "value": "#not-a-comment"},
+        {"name": "SPACES", "value": "  padded  "},
+    ],
+    "replicas": 2,
+    "ratio": 0.5,
+    "enabled": True,
+    "nothing": None,
+    "empty_map": {},
+    "empty_list": [],
+    "": "empty key",
+    "description": {"": ["é" * 90, "naïve " * 20]},
+}
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. load() / dump() — SAME RESULTS AS PURE-PYTHON PYYAML
+# ═══════════════════════════════════════════════════════════════════
+
+class TestYamlCodec:
+    """
+    yaml_codec.load(stream) / yaml_codec.dump(data, stream, **kwargs)
+
+    Drop-in replacements for yaml.safe_load and yaml.dump that use the
+    libyaml C loader/dumper when PyYAML was built with it.
+    """
+
+    @pytest.mark.parametrize("kwargs", [
+        {"default_flow_style": False, "sort_keys": False},
+        {"default_flow_style": False},
+    ])
+    def test_dump_identical_to_pure_python(self, kwargs, large_yaml_content):
+        """
+        SCENARIO: Dump tricky values and a >32K values file with the
+        arguments the call sites use.
+        WHAT IT TESTS: The text is identical to yaml.dump's.
+        """
+        for data in (TRICKY_VALUES, large_yaml_content):
+            assert yaml_codec.dump(data, **kwargs) == yaml.dump(data, **kwargs)
+
+    def test_load_identical_to_safe_load(self, sample_yaml_dir):
+        """
+        SCENARIO: Load the sample service files and the tricky values.
+        WHAT IT TESTS: Same Python objects as yaml.safe_load.
+        """
+        texts = [p.read_text() for p in sorted(sample_yaml_dir.iterdir())]
+        texts.append(yaml.dump(TRICKY_VALUES))
+        for text in texts:
+            assert yaml_codec.load(text) == yaml.safe_load(text)
+
+    def test_load_from_stream(self, sample_yaml_dir):
+        """
+        SCENARIO: Load from an open file, as read_yaml_files_to_json does.
+        WHAT IT TESTS: Streams are accepted like yaml.safe_load.
+        """
+        path = sample_yaml_dir / "service-admin.yaml"
+        with open(path) as f:
+            assert yaml_codec.load(f) == yaml.safe_load(path.read_text())
+
+    def test_safe_tags_only(self):
+        """
+        SCENARIO: A document carries a python/object tag.
+        WHAT IT TESTS: It is rejected, as with yaml.safe_load.
+        """
+        with pytest.raises(yaml.YAMLError):
+            yaml_codec.load("!!python/object/apply:os.system ['true']")
+
+    def test_uses_libyaml_when_built(self):
+        """
+        SCENARIO: PyYAML in this environment.
+        WHAT IT TESTS: The C loader is picked exactly when PyYAML has libyaml.
+        """
+        assert yaml_codec.LIBYAML == yaml.__with_libyaml__
+        assert (yaml_codec.Loader.__name__ == "CSafeLoader") == yaml.__with_libyaml__
+
+    def test_dumper_is_pure_python(self):
+        """
+        SCENARIO: A value the C emitter folds differently (long, non-ASCII).
+        WHAT IT TESTS: dump() uses SafeDumper, so the text is yaml.dump's.
+        """
+        data = {"app": {"description": "Café au lait " * 8}}
+        assert yaml_codec.Dumper is yaml.SafeDumper
+        assert yaml_codec.dump(data) == yaml.dump(data)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. HelmValuesDumper — DUMP-TIME QUOTING
+# ═══════════════════════════════════════════════════════════════════
+
+SED_COMMAND = [
+    'sed', '-E',
+    '-e', r's/([[:space:]]+value:[[:space:]]*)(0[0-9]+)([[:space:]]*$)/\1"\2"\3/',
+    '-e', r's/([[:space:]]+value:[[:space:]]*)([A-Z])([[:space:]]*$)/\1"\2"\3/',
+]
+
+# Values PyYAML writes plain ('08', 'A'), quotes itself ('0777', '00') or
+# resolves to other types, under keys that do and do not count as `value`
+QUOTING_VALUES = ['08', '0999', '089', '0777', '00', '0', 'A', 'Z', 'a', 'AB', 'Y', 'N',
+                  '08.5', '0_8', 8, True, None, '',
+                  'Café au lait ' * 8, 'naïve ' * 20, 'x ' * 60, 'ü' * 90]
+QUOTING_KEYS = ['value', 'Value', 'values', 'a value', 'value ', 'name', '', 'café value']
+
+
+def _random_values(rng, depth=0):
+    r = rng.random()
+    if depth > 3 or r < 0.3:
+        return rng.choice(QUOTING_VALUES)
+    if r < 0.65:
+        return {rng.choice(QUOTING_KEYS): _random_values(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return [_random_values(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+
+
+def _sed(text):
+    return subprocess.run(SED_COMMAND, input=text, capture_output=True, text=True, check=True).stdout
+
+
+@pytest.mark.skipif(shutil.which("sed") is None, reason="sed not installed")
+class TestHelmValuesDumper:
+    """
+    yaml_codec.dump(data, dumper=HelmValuesDumper) must equal what
+    generate-config wrote before, yaml.dump piped through the sed
+    expressions it used to run per file, except inside multi-line strings,
+    which sed corrupted.
+    """
+
+    KWARGS = {"default_flow_style": False, "sort_keys": False}
+
+    def test_env_list_fixture(self, large_yaml_content):
+        """
+        SCENARIO: A service with env entries whose values need quoting.
+        WHAT IT TESTS: Identical bytes to sed on the plain dump.
+        """
+        data = dict(large_yaml_content)
+        data["env"] = data["env"] + [{"name": "PORT", "value": "08080"}, {"name": "FLAG", "value": "Y"},
+                                     {"name": "OCTAL", "value": "0777"}, {"name": "WORD", "value": "Yes"}]
+        data["value"] = "08"   # top-level key: sed never touched it
+        data["description"] = {"value": "Café au lait " * 8, "": "é" * 90, "café value": "Z"}
+        quoted = yaml_codec.dump(data, dumper=yaml_codec.HelmValuesDumper, **self.KWARGS)
+        assert quoted == _sed(yaml.dump(data, **self.KWARGS))
+        assert '  value: "08080"' in quoted and "  value: '0777'" in quoted and "\nvalue: 08\n" in quoted
+        assert '  "caf\\xE9 value": Z\n' in quoted   # escaped key: sed saw no `value:`
+
+    def test_random_documents(self):
+        """
+        SCENARIO: 500 random nested mappings/sequences mixing the tricky
+        keys and values above, long non-ASCII ones and empty keys included.
+        WHAT IT TESTS: Identical bytes to sed for every one of them.
+        """
+        rng = random.Random(22)
+        docs = [_random_values(rng) for _ in range(500)]
+        separator = "#---\n"
+        plain = separator.join(yaml.dump(d, **self.KWARGS) for d in docs)
+        quoted = separator.join(yaml_codec.dump(d, dumper=yaml_codec.HelmValuesDumper, **self.KWARGS) for d in docs)
+        assert quoted == _sed(plain)
+
+    def test_multiline_string_left_alone(self):
+        """
+        SCENARIO: A quoted string folded over lines, one of which reads ` value: A`.
+        WHAT IT TESTS: The dumper leaves the string as yaml.dump writes it and
+        it reads back unchanged; sed rewrote it to `value: "A"`, changing the
+        data. This difference from the sed pass is intended.
+        """
+        data = {"note": "x value: A\ny"}
+        plain = yaml.dump(data, **self.KWARGS)
+        quoted = yaml_codec.dump(data, dumper=yaml_codec.HelmValuesDumper, **self.KWARGS)
+        assert quoted == plain
+        assert yaml.safe_load(quoted) == data
+        assert _sed(plain) != plain and yaml.safe_load(_sed(plain)) != data
@@ -0,0 +1,219 @@
+"""
+Unit tests for yaml_patch.py — rewriting only the changed scalars of a
+values file instead of dumping it again.
+
+Functions tested:
+1. patch_yaml() — scalar edits in place; None whenever the change is structural
+2. patch_yaml() on generate-config output — byte-identical to a full dump
+"""
+import os
+import sys
+import copy
+import random
+import yaml
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'cd', 'scripts'))
+
+from utilities import yaml_codec
+from utilities.yaml_codec import HelmValuesDumper
+from utilities.yaml_patch import patch_yaml
+
+
+VALUES = """\
+# service-admin values, maintained by the platform team
+app:
+  name: admin-app   # do not rename
+replicas: 2
+image:
+  image_name: gcr.io/project/admin:1.0.0-b10-dev1
+env:
+- name: PORT
+  value: '8080'
+- name: MODE
+  value: prod
+"""
+
+
+def _dump(data):
+    return yaml_codec.dump(data, dumper=HelmValuesDumper, default_flow_style=False, sort_keys=False)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 1. patch_yaml() — IN-PLACE SCALAR EDITS
+# ═══════════════════════════════════════════════════════════════════
+
+class TestPatchYaml:
+    """
+    patch_yaml(text, new_data, key_paths, dumper=None)
+
+    Rewrites the bytes of the scalars under `key_paths` that differ in
+    `new_data`, or returns None so the caller dumps the document.
+    """
+
+    def test_only_changed_scalars_rewritten(self):
+        """
+        SCENARIO: Replicas and an image tag change in a commented file.
+        WHAT IT TESTS: Those two values change; comments and layout do not.
+        """
+        new = yaml.safe_load(VALUES)
+        new["replicas"] = 4
+        new["image"]["image_name"] = "gcr.io/project/admin:1.1.0-b15-sit1"
+
+        out = patch_yaml(VALUES, new, [["replicas"], ["image", "image_name"]])
+
+        assert out == VALUES.replace("replicas: 2", "replicas: 4").replace("1.0.0-b10-dev1", "1.1.0-b15-sit1")
+        assert yaml.safe_load(out) == new
+
+    def test_env_entry_value_rewritten(self):
+        """
+        SCENARIO: An env entry's value is modified (key path `env`).
+        WHAT IT TESTS: The list is walked item by item; only that value changes.
+        """
+        new = yaml.safe_load(VALUES)
+        new["env"][1]["value"] = "maintenance"
+        out = patch_yaml(VALUES, new, [["env"]])
+        assert out == VALUES.replace("value: prod", "value: maintenance")
+
+    def test_dumper_quoting_applied(self):
+        """
+        SCENARIO: A value becomes `08` under HelmValuesDumper.
+        WHAT IT TESTS: It is double-quoted exactly as a full dump would quote it.
+        """
+        new = yaml.safe_load(VALUES)
+        new["env"][1]["value"] = "08"
+        out = patch_yaml(VALUES, new, [["env"]], dumper=HelmValuesDumper)
+        assert '  value: "08"\n' in out
+        assert yaml.safe_load(out) == new
+
+    def test_string_needing_quotes(self):
+        """
+        SCENARIO: A value that would read back as a bool or a comment.
+        WHAT IT TESTS: The new scalar is quoted so it parses to the same string.
+        """
+        new = yaml.safe_load(VALUES)
+        new["app"]["name"] = "yes"
+        new["env"][1]["value"] = "#1 a: b"
+        out = patch_yaml(VALUES, new, [["app", "name"], ["env"]])
+        assert "# do not rename" in out
+        assert yaml.safe_load(out) == new
+
+    def test_no_key_paths_returns_text(self):
+        """
+        SCENARIO: A service without changes.
+        WHAT IT TESTS: The text comes back untouched.
+        """
+        assert patch_yaml(VALUES, yaml.safe_load(VALUES), []) == VALUES
+
+    @pytest.mark.parametrize("key_paths", [[], [["replicas"]]])
+    def test_change_outside_key_paths_falls_back(self, key_paths):
+        """
+        SCENARIO: new_data also changes image_name, which no key path names.
+        WHAT IT TESTS: None is returned, so the change is dumped rather than
+        dropped with the old bytes.
+        """
+        new = yaml.safe_load(VALUES)
+        new["replicas"] = 4
+        new["image"]["image_name"] = "gcr.io/project/admin:1.1.0-b15-sit1"
+        assert patch_yaml(VALUES, new, key_paths) is None
+
+    @pytest.mark.parametrize("change, key_paths", [
+        (lambda d: d["app"].update(version="2"), [["app"]]),
+        (lambda d: d["env"].append({"name": "NEW", "value": "1"}), [["env"]]),
+        (lambda d: d["env"].pop(), [["env"]]),
+        (lambda d: d.update(replicas={"min": 2}), [["replicas"]]),
+        (lambda d: d.update(gpu="1"), [["gpu"]]),
+    ])
+    def test_structural_changes_fall_back(self, change, key_paths):
+        """
+        SCENARIO: Keys or list items added or removed, a scalar turned into a map.
+        WHAT IT TESTS: None is returned so the document is dumped instead.
+        """
+        new = yaml.safe_load(VALUES)
+        change(new)
+        assert patch_yaml(VALUES, new, key_paths) is None
+
+    @pytest.mark.parametrize("text", [
+        "app: {name: admin-app}\n",                        # flow mapping
+        "base: &name admin-app\napp:\n  name: *name\n",     # alias
+        "app:\n  name: |\n    admin-app\n",                 # block scalar
+        "app:\n  name:\n",                                  # empty scalar
+    ])
+    def test_unsafe_layouts_fall_back(self, text):
+        """
+        SCENARIO: The changed scalar sits where a rewrite could change its meaning.
+        WHAT IT TESTS: None is returned rather than a guessed edit.
+        """
+        new = yaml.safe_load(text)
+        new["app"]["name"] = "admin-v2"
+        assert patch_yaml(text, new, [["app", "name"]]) is None
+
+    def test_root_list_document(self):
+        """
+        SCENARIO: The `data` service is a list at the root (key path []).
+        WHAT IT TESTS: The whole document is compared and the entry patched.
+        """
+        text = "- name: DB_HOST\n  value: db-dev1\n- name: DB_PORT\n  value: '5432'\n"
+        new = yaml.safe_load(text)
+        new[0]["value"] = "db-sit1"
+        assert patch_yaml(text, new, [[]]) == text.replace("db-dev1", "db-sit1")
+
+
+# ═══════════════════════════════════════════════════════════════════
+# 2. patch_yaml() ON GENERATE-CONFIG OUTPUT — SAME BYTES AS A FULL DUMP
+# ═══════════════════════════════════════════════════════════════════
+
+SCALARS = ['08', 'X', 'Y', 'yes', '1e3', '0777', 'café', "it's", '#c', 'a: b', '- x', '"q"', '',
+           'multi\nline', 'x' * 100, ' '.join(['w'] * 40), 1, 2.5, True, None]
+
+
+def _random_values(rnd, depth=0):
+    if depth > 3 or rnd.random() < 0.3:
+        return rnd.choice(SCALARS)
+    if rnd.random() < 0.5:
+        keys = ['value', 'name', 'default value', 'key']
+        return {rnd.choice(keys) if i < 3 else f'k{i}': _random_values(rnd, depth + 1) for i in range(rnd.randint(1, 4))}
+    return [_random_values(rnd, depth + 1) for _ in range(rnd.randint(1, 3))]
+
+
+def _leaf_paths(data, path=()):
+    if isinstance(data, dict):
+        for k, v in data.items():
+            yield from _leaf_paths(v, path + (k,))
+    elif isinstance(data, list):
+        for i, v in enumerate(data):
+            yield from _leaf_paths(v, path + (i,))
+    elif path:
+        yield path
+
+
+class TestPatchMatchesFullDump:
+    """
+    On a file HelmValuesDumper wrote, a patched document must be exactly the
+    text a full dump of the new data gives, folding and quoting included.
+    """
+
+    def test_random_documents(self):
+        """
+        SCENARIO: 500 random values documents with two scalars changed each.
+        WHAT IT TESTS: Every patch that applies equals the full dump.
+        """
+        rnd = random.Random(23)
+        patched = 0
+        for _ in range(500):
+            data = {"svc": _random_values(rnd), "value": _random_values(rnd, 1)}
+            text = _dump(data)
+            new = copy.deepcopy(data)
+            key_paths = []
+            for path in rnd.sample(list(_leaf_paths(new)), 2):
+                target = new
+                for k in path[:-1]:
+                    target = target[k]
+                target[path[-1]] = rnd.choice(SCALARS)
+                key_paths.append([k for k in path if isinstance(k, str)][:1])
+
+            out = patch_yaml(text, new, key_paths, dumper=HelmValuesDumper)
+            if out is not None:
+                patched += 1
+                assert out == _dump(new)
+        assert patched > 200